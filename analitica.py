@@ -0,0 +1,253 @@
+"""
+Análisis en memoria: una foto (snapshot) compacta de la tabla obras en columnas de NumPy/pandas
+para responder agrupaciones y filtros arbitrarios sin volver a SQLite en cada pregunta.
+
+* Las FK se guardan como enteros (id del catálogo, -1 = sin dato) y los nombres de los
+  catálogos aparte; recién al consultar se arman columnas Categorical (sin copiar textos por fila).
+* Montos, avance y plazos como float64 (NaN = sin dato), fechas como datetime64.
+* actualizar() no recarga todo: si la BD no cambió (PRAGMA data_version / total_changes) no lee nada;
+  si cambió, compara la 'version' de cada obra con la de la foto y solo trae las obras nuevas o
+  modificadas (y saca las borradas).
+
+La foto es de una BD: si se reemplaza el archivo o se cambia con configurar_db(), usar recargar().
+"""
+import threading
+
+import numpy
+import pandas
+import peewee
+
+from indicadores import (
+    COMUNAS_INDICADOR, PLAZO_INDICADOR, BarrioDeComuna, Indicadores, InversionPorTipo, ObrasPorEtapa, version_bd,
+)
+from modelo_orm import (
+    db, catalogos, AreaResponsable, Barrio, Comuna, Empresa, Etapa, FuenteFinanciamiento,
+    Obra, TipoContratacion, TipoObra, lote_maximo,
+)
+
+# Columnas FK de la foto -> catálogo
+CATALOGOS = {
+    'etapa': Etapa,
+    'tipo_obra': TipoObra,
+    'area_responsable': AreaResponsable,
+    'barrio': Barrio,
+    'empresa': Empresa,
+    'tipo_contratacion': TipoContratacion,
+    'fuente_financiamiento': FuenteFinanciamiento,
+}
+NUMERICAS = ['monto_contrato', 'porcentaje_avance', 'plazo_meses', 'mano_obra', 'lat', 'lng']
+FECHAS = ['fecha_inicio', 'fecha_fin_inicial']
+# Con más de esta proporción de obras cambiadas conviene releer todo de una
+PROPORCION_RECARGA = 0.5
+
+# Agregación por defecto de agrupar()
+VALORES_DEFECTO = {'cantidad': ('monto_contrato', 'size'), 'monto_total': ('monto_contrato', 'sum')}
+
+
+class AnaliticaObras:
+    """Foto en memoria de obras + catálogos, con agrupaciones vectorizadas."""
+
+    def __init__(self, db=db):
+        self.db = db
+        self._datos = None        # DataFrame indexado por id, con FK como enteros
+        self._catalogos = {}      # columna -> Series id -> nombre
+        self._comuna_de_barrio = pandas.Series(dtype='int64')
+        self._tabla = None        # versión con nombres (se arma al consultar y se guarda hasta el próximo cambio)
+        self._version = None
+        self._lock = threading.RLock()
+
+    # --- CARGA ---
+
+    def _columnas(self):
+        return [Obra.id, Obra.version, Obra.vigente] + [
+            getattr(Obra, nombre) for nombre in [*CATALOGOS, *NUMERICAS, *FECHAS]
+        ]
+
+    def _leer(self, ids=None):
+        """DataFrame con las obras pedidas (todas si ids es None), leído con el cursor crudo."""
+        columnas = self._columnas()
+        nombres = [columna.name for columna in columnas]
+        if ids is None:
+            consultas = [Obra.select(*columnas)]
+        else:
+            consultas = [Obra.select(*columnas).where(Obra.id.in_(lote)) for lote in peewee.chunked(ids, lote_maximo())]
+        filas = [fila for consulta in consultas for fila in self.db.execute(consulta).fetchall()]
+        df = pandas.DataFrame.from_records(filas, columns=nombres)
+
+        df['id'] = df['id'].astype('int64')
+        df['version'] = df['version'].fillna(0).astype('int64')
+        df['vigente'] = df['vigente'].fillna(True).astype(bool)
+        for columna in CATALOGOS:
+            df[columna] = pandas.to_numeric(df[columna]).fillna(-1).astype('int32')
+        for columna in NUMERICAS:
+            df[columna] = pandas.to_numeric(df[columna], errors='coerce').astype('float64')
+        for columna in FECHAS:
+            df[columna] = pandas.to_datetime(df[columna], format='%Y-%m-%d', errors='coerce')
+        return df.set_index('id').sort_index()
+
+    def _leer_catalogos(self):
+        for columna, Modelo in CATALOGOS.items():
+            campo = getattr(Modelo, Modelo.CAMPO_NOMBRE)
+            filas = Modelo.select(Modelo.id, campo).order_by(Modelo.id).tuples()
+            self._catalogos[columna] = pandas.Series(dict(filas), dtype=object)
+        self._catalogos['comuna'] = pandas.Series(
+            dict(Comuna.select(Comuna.id, Comuna.numero).order_by(Comuna.id).tuples()), dtype=object
+        )
+        self._comuna_de_barrio = pandas.Series(
+            {id_barrio: id_comuna for id_barrio, id_comuna in Barrio.select(Barrio.id, Barrio.comuna).tuples()
+             if id_comuna is not None},
+            dtype='int64',
+        )
+
+    def recargar(self):
+        """Vuelve a leer todas las obras y catálogos."""
+        with self._lock, self.db.atomic():
+            self._version = version_bd(self.db)
+            self._leer_catalogos()
+            self._datos = self._leer()
+            self._tabla = None
+        return self
+
+    def actualizar(self):
+        """
+        Pone la foto al día con lo que cambió desde la última lectura.
+        Devuelve los conteos ({'nuevas', 'modificadas', 'borradas'}), o None si la BD no cambió.
+        """
+        with self._lock:
+            if self._datos is None:
+                self.recargar()
+                return {'nuevas': len(self._datos), 'modificadas': 0, 'borradas': 0}
+            version = version_bd(self.db)
+            if version == self._version:
+                return None
+
+            with self.db.atomic():
+                version = version_bd(self.db)
+                filas = self.db.execute(Obra.select(Obra.id, Obra.version)).fetchall()
+                actuales = pandas.Series(
+                    [v or 0 for _, v in filas], index=pandas.Index([i for i, _ in filas], dtype='int64'), dtype='int64'
+                )
+                anteriores = self._datos['version']
+
+                borradas = anteriores.index.difference(actuales.index)
+                comunes = actuales.index.intersection(anteriores.index)
+                modificadas = comunes[actuales[comunes].to_numpy() != anteriores[comunes].to_numpy()]
+                nuevas = actuales.index.difference(anteriores.index)
+                a_leer = modificadas.union(nuevas)
+
+                self._leer_catalogos()
+                if len(a_leer) > PROPORCION_RECARGA * max(len(actuales), 1):
+                    self._datos = self._leer()
+                elif len(a_leer) or len(borradas):
+                    resto = self._datos.drop(index=borradas.union(modificadas))
+                    partes = [resto, self._leer(a_leer.tolist())] if len(a_leer) else [resto]
+                    self._datos = pandas.concat(partes).sort_index()
+                self._version = version
+                self._tabla = None
+
+            return {'nuevas': len(nuevas), 'modificadas': len(modificadas), 'borradas': len(borradas)}
+
+    # --- CONSULTAS ---
+
+    def _categoria(self, codigos, columna):
+        """Columna de ids -> Categorical con los nombres del catálogo (vectorizado con take)."""
+        nombres = self._catalogos[columna]
+        posicion = pandas.Series(numpy.arange(len(nombres)), index=nombres.index)
+        codigos_categoria = posicion.reindex(codigos).fillna(-1).to_numpy(dtype='int64')
+        return pandas.Categorical.from_codes(codigos_categoria, categories=pandas.Index(nombres.to_numpy()))
+
+    def tabla(self):
+        """
+        DataFrame de trabajo (al día): FK con nombres como Categorical, más 'comuna'
+        (por el barrio) y 'anio' (de fecha_inicio). Índice: id de la obra.
+        """
+        with self._lock:
+            self.actualizar()
+            if self._tabla is None:
+                df = self._datos.copy()
+                comunas = self._comuna_de_barrio.reindex(df['barrio']).fillna(-1).to_numpy(dtype='int64')
+                for columna in CATALOGOS:
+                    df[columna] = self._categoria(df[columna].to_numpy(), columna)
+                df['comuna'] = self._categoria(comunas, 'comuna')
+                df['anio'] = df['fecha_inicio'].dt.year.astype('Int64')
+                self._tabla = df
+            return self._tabla
+
+    def filtrar(self, filtro=None, solo_vigentes=False):
+        """
+        filtro: expresión de DataFrame.query ("anio >= 2018 and etapa == 'Finalizada'")
+        o función DataFrame -> máscara booleana.
+        """
+        df = self.tabla()
+        if solo_vigentes:
+            df = df[df['vigente']]
+        if filtro is None:
+            return df
+        if callable(filtro):
+            return df[filtro(df)]
+        return df.query(filtro)
+
+    def agrupar(self, por, valores=None, filtro=None, solo_vigentes=False):
+        """
+        Agrupa las obras (filtradas) por una o más columnas y calcula 'valores':
+        dict nombre -> (columna, función), como DataFrame.agg. Por defecto cantidad y monto_total.
+        Ej: agrupar(['comuna', 'anio']), agrupar('tipo_obra', {'plazo_medio': ('plazo_meses', 'mean')}).
+        """
+        df = self.filtrar(filtro, solo_vigentes)
+        return df.groupby(por, observed=True, dropna=False).agg(**(valores or VALORES_DEFECTO))
+
+    # --- INDICADORES (los mismos de GestionarObra.calcular_indicadores, desde la foto) ---
+
+    def indicadores(self, comunas=COMUNAS_INDICADOR, plazo_meses=PLAZO_INDICADOR):
+        with self._lock:
+            self.actualizar()
+            # Como en la BD, los conteos y montos son solo de las obras vigentes
+            datos = self._datos[self._datos['vigente']]
+            nombres = self._catalogos
+
+            por_etapa = datos.groupby('etapa').size()
+            obras_por_etapa = sorted(
+                (ObrasPorEtapa(nombre, int(por_etapa.get(id_etapa, 0))) for id_etapa, nombre in nombres['etapa'].items()),
+                key=lambda fila: (-fila.cantidad, fila.etapa),
+            )
+
+            por_tipo = datos.groupby('tipo_obra')['monto_contrato'].agg(['size', 'sum'])
+            inversion_por_tipo = sorted(
+                (
+                    InversionPorTipo(
+                        nombre,
+                        int(por_tipo['size'].get(id_tipo, 0)),
+                        float(por_tipo['sum'].get(id_tipo, 0)),
+                    )
+                    for id_tipo, nombre in nombres['tipo_obra'].items()
+                ),
+                key=lambda fila: (-fila.monto_total, fila.tipo_obra),
+            )
+
+            comunas = tuple(str(c) for c in comunas)
+            numero_comuna = nombres['comuna']
+            barrios = sorted(
+                (numero_comuna[id_comuna], nombres['barrio'][id_barrio])
+                for id_barrio, id_comuna in self._comuna_de_barrio.items()
+                if numero_comuna.get(id_comuna) in comunas
+            )
+
+            etapa_finalizada = catalogos.buscar(Etapa, "Finalizada")
+            if etapa_finalizada is None:
+                finalizadas = None
+            else:
+                finalizadas = int(
+                    ((datos['etapa'] == etapa_finalizada.id) & (datos['plazo_meses'] <= plazo_meses)).sum()
+                )
+
+            return Indicadores(
+                areas_responsables=tuple(nombres['area_responsable']),
+                tipos_obra=tuple(nombres['tipo_obra']),
+                obras_por_etapa=tuple(obras_por_etapa),
+                inversion_por_tipo=tuple(inversion_por_tipo),
+                barrios_por_comuna=tuple(BarrioDeComuna(numero, barrio) for numero, barrio in barrios),
+                finalizadas_en_plazo=finalizadas,
+                inversion_total=float(datos['monto_contrato'].sum()),
+                comunas=comunas,
+                plazo_meses=plazo_meses,
+            )
@@ -0,0 +1,311 @@
+"""
+Benchmark del ETL (extraer -> limpiar -> cargar) y de los indicadores, a distintas escalas.
+
+Genera CSVs sintéticos con la forma del CSV del Observatorio (1x, 10x, 100x, 1000x el incluido):
+cada copia cambia el nombre de las obras (para que no se descarten como duplicadas), reparte
+las empresas en más variantes (el catálogo de empresas crece con la escala, el de barrios no)
+y ensucia una parte de los valores (mayúsculas, espacios, acentos, montos y fechas que no se
+pueden interpretar, coordenadas con punto).
+
+Cada escala se mide en un proceso aparte, sobre una BD temporal nueva, y por cada etapa se
+guarda el tiempo, el pico de memoria (RSS) y las filas por segundo en un JSON.
+Con --comparar se muestran las diferencias contra una corrida anterior (la base es etl_base.json).
+
+Uso: python benchmarks/etl.py [escalas...] [--procesos N] [--por-partes] [--salida archivo.json] [--comparar base.json]
+     (default: escalas 1 10 100)
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+
+import numpy
+import pandas
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import modelo_orm
+from gestionar_obras import GestionarObra
+from instrumentacion import Metricas
+
+CARPETA = Path(__file__).resolve().parent
+BASE = CARPETA / "etl_base.json"
+SALIDA = CARPETA / "resultados_etl.json"
+
+ESCALAS = (1, 10, 100)
+# Proporción de valores que se ensucian en cada columna
+SUCIEDAD = 0.05
+# Variantes de cada empresa: con la escala aparecen más empresas distintas (hasta 50x)
+VARIANTES_EMPRESA = 50
+# Copias del CSV que se generan y escriben juntas (para no tener el CSV entero en memoria)
+COPIAS_POR_PARTE = 50
+# Más lento que la base en más de esta proporción = regresión
+TOLERANCIA = 1.25
+# ...y por lo menos esta cantidad de segundos (las etapas cortas varían mucho entre corridas)
+MINIMO_SEGUNDOS = 0.05
+
+COLUMNAS_CATALOGO = [
+    'etapa', 'tipo', 'area_responsable', 'barrio',
+    'licitacion_oferta_empresa', 'contratacion_tipo', 'financiamiento',
+]
+INDICADORES = [
+    'indicador_areas_responsables', 'indicador_tipos_obra', 'indicador_obras_por_etapa',
+    'indicador_inversion_por_tipo', 'indicador_barrios_por_comuna',
+    'indicador_finalizadas_en_plazo', 'indicador_inversion_total',
+]
+
+
+# --- CSV SINTÉTICO ---
+
+def _sin_acentos(texto):
+    return unicodedata.normalize('NFD', texto).encode('ascii', 'ignore').decode('ascii')
+
+
+def _ensuciar(df, azar):
+    """Ensucia (en el lugar) una proporción SUCIEDAD de los valores, como vienen en el CSV real."""
+    cantidad = len(df)
+    for columna in COLUMNAS_CATALOGO:
+        valores = df[columna]
+        sucios = azar.random(cantidad) < SUCIEDAD
+        forma = azar.integers(0, 3, cantidad)
+        df[columna] = valores.where(~(sucios & (forma == 0)), valores.str.upper())
+        df[columna] = df[columna].where(~(sucios & (forma == 1)), '  ' + valores.str.lower() + ' ')
+        df[columna] = df[columna].where(~(sucios & (forma == 2)), valores.map(_sin_acentos, na_action='ignore'))
+
+    df['monto_contrato'] = df['monto_contrato'].mask(azar.random(cantidad) < SUCIEDAD, 's/d')
+    df['fecha_inicio'] = df['fecha_inicio'].mask(azar.random(cantidad) < SUCIEDAD, '31/2/2020')
+    df['plazo_meses'] = df['plazo_meses'].mask(azar.random(cantidad) < SUCIEDAD, '')
+    for columna in ('lat', 'lng'):
+        df[columna] = df[columna].mask(azar.random(cantidad) < SUCIEDAD, df[columna].str.replace(',', '.'))
+
+
+def generar_csv(ruta, escala, semilla=0):
+    """Escribe en 'ruta' un CSV con 'escala' copias del incluido (la primera sin cambiar los nombres)."""
+    base = pandas.read_csv(GestionarObra.CSV_PATH, **GestionarObra.OPCIONES_CSV)
+    azar = numpy.random.default_rng(semilla)
+    opciones = dict(sep=GestionarObra.OPCIONES_CSV['sep'], encoding=GestionarObra.OPCIONES_CSV['encoding'], index=False)
+
+    for desde in range(0, escala, COPIAS_POR_PARTE):
+        partes = []
+        for copia in range(desde, min(desde + COPIAS_POR_PARTE, escala)):
+            df = base.copy()
+            if copia:
+                df['nombre'] = df['nombre'].fillna('Obra') + f' - lote {copia}'
+                variante = copia % VARIANTES_EMPRESA
+                if variante:
+                    df['licitacion_oferta_empresa'] = df['licitacion_oferta_empresa'] + f' {variante}'
+            partes.append(df)
+        df = pandas.concat(partes, ignore_index=True)
+        _ensuciar(df, azar)
+        df.to_csv(ruta, mode='w' if desde == 0 else 'a', header=desde == 0, **opciones)
+    return len(base) * escala
+
+
+# --- MEDICIÓN ---
+
+def _rss_actual():
+    """RSS del proceso en bytes (Linux), o None si no se puede leer."""
+    try:
+        with open('/proc/self/statm') as archivo:
+            return int(archivo.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _rss_maximo():
+    """Pico de RSS de todo el proceso en bytes (getrusage), o None."""
+    if resource is None:
+        return None
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maximo if sys.platform == 'darwin' else maximo * 1024  # en Linux viene en KiB
+
+
+def _mb(valor):
+    return None if valor is None else round(valor / 2**20, 1)
+
+
+class PicoMemoria:
+    """
+    Pico de RSS mientras dura un with: un hilo mira el RSS cada 'intervalo' segundos.
+    Donde no se puede leer el RSS actual, se usa el pico de todo el proceso.
+    """
+
+    def __init__(self, intervalo=0.005):
+        self.intervalo = intervalo
+        self.pico = None
+        self._fin = threading.Event()
+
+    def _muestrear(self):
+        while not self._fin.wait(self.intervalo):
+            self.pico = max(self.pico, _rss_actual())
+
+    def __enter__(self):
+        self.pico = _rss_actual()
+        if self.pico is not None:
+            self._hilo = threading.Thread(target=self._muestrear, daemon=True)
+            self._hilo.start()
+        return self
+
+    def __exit__(self, *excepcion):
+        if self.pico is None:
+            self.pico = _rss_maximo()
+            return
+        self._fin.set()
+        self._hilo.join()
+        self.pico = max(self.pico, _rss_actual())
+
+
+def medir(resultados, nombre, funcion, filas=None):
+    """Corre funcion() (sin sus prints), guarda tiempo/memoria/velocidad/consultas y devuelve lo que devuelva."""
+    with open(os.devnull, 'w') as nulo, contextlib.redirect_stdout(nulo), PicoMemoria() as memoria, Metricas() as metricas:
+        inicio = time.perf_counter()
+        valor = funcion()
+        segundos = time.perf_counter() - inicio
+    resultados[nombre] = {
+        'segundos': round(segundos, 4),
+        'pico_rss_mb': _mb(memoria.pico),
+        'filas': filas,
+        'filas_por_seg': round(filas / segundos) if filas and segundos > 0 else None,
+        'consultas': metricas.consultas,
+        'segundos_sql': round(metricas.segundos_sql, 4),
+    }
+    return valor
+
+
+def medir_cargas_por_partes(etapas, ruta_csv, carpeta):
+    """Carga completa con cargar_csv_por_partes y con cargar_csv_en_tuberia, cada una en una BD nueva."""
+    for nombre in ('cargar_csv_por_partes', 'cargar_csv_en_tuberia'):
+        modelo_orm.configurar_db(ruta=str(Path(carpeta) / f'{nombre}.db'))
+        GestionarObra.CSV_PATH = Path(ruta_csv)
+        resultado = medir(etapas, nombre, getattr(GestionarObra, nombre))
+        filas = resultado['insertadas'] + resultado['actualizadas'] + resultado['sin_cambios']
+        etapas[nombre]['filas'] = filas
+        etapas[nombre]['filas_por_seg'] = round(filas / etapas[nombre]['segundos'])
+        modelo_orm.db.close()
+
+
+def medir_escala(ruta_csv, filas_csv, procesos=1, por_partes=False):
+    """Corre el pipeline entero sobre ruta_csv con una BD temporal nueva (en el proceso que llama)."""
+    etapas = {}
+    logging.getLogger('obras').setLevel(logging.ERROR)  # los avisos de valores sucios son esperables
+    with tempfile.TemporaryDirectory() as carpeta:
+        modelo_orm.configurar_db(ruta=str(Path(carpeta) / 'etl.db'))
+        GestionarObra.CSV_PATH = Path(ruta_csv)
+
+        medir(etapas, 'extraer_datos', GestionarObra.extraer_datos, filas_csv)
+        medir(etapas, 'limpiar_datos', lambda: GestionarObra.limpiar_datos(procesos), filas_csv)
+        obras = len(GestionarObra.dataframe)
+        medir(etapas, 'cargar_datos', GestionarObra.cargar_datos, obras)
+        medir(etapas, 'sincronizar_datos (sin cambios)', GestionarObra.sincronizar_datos, obras)
+
+        for nombre in INDICADORES:
+            GestionarObra.invalidar_indicadores()
+            medir(etapas, nombre, getattr(GestionarObra, nombre), obras)
+        GestionarObra.invalidar_indicadores()
+        medir(etapas, 'obtener_indicadores', GestionarObra.obtener_indicadores, obras)
+        medir(etapas, 'obtener_indicadores (cacheado)', GestionarObra.obtener_indicadores, obras)
+
+        modelo_orm.db.close()
+        if por_partes:
+            medir_cargas_por_partes(etapas, ruta_csv, carpeta)
+    return {'filas_csv': filas_csv, 'obras': obras, 'pico_rss_proceso_mb': _mb(_rss_maximo()), 'etapas': etapas}
+
+
+def correr(escalas, procesos=1, por_partes=False):
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pandas.__version__,
+        'sqlite': sqlite3.sqlite_version,
+        'plataforma': platform.platform(),
+        'nucleos': os.cpu_count(),
+        'procesos_limpieza': procesos,
+        'escalas': {},
+    }
+    # Un proceso nuevo por escala: la memoria y los caches de una no afectan a la siguiente
+    contexto = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as carpeta:
+        for escala in escalas:
+            ruta_csv = Path(carpeta) / f'obras_{escala}x.csv'
+            inicio = time.perf_counter()
+            filas_csv = generar_csv(ruta_csv, escala)
+            print(f"{escala}x: {filas_csv:,} filas ({ruta_csv.stat().st_size / 2**20:,.1f} MB) "
+                  f"generadas en {time.perf_counter() - inicio:.1f} s")
+
+            with concurrent.futures.ProcessPoolExecutor(1, mp_context=contexto) as proceso:
+                medicion = proceso.submit(medir_escala, str(ruta_csv), filas_csv, procesos, por_partes).result()
+            resultado['escalas'][str(escala)] = medicion
+            mostrar(medicion)
+            ruta_csv.unlink()
+    return resultado
+
+
+def mostrar(medicion):
+    for nombre, etapa in medicion['etapas'].items():
+        velocidad = f"{etapa['filas_por_seg']:>12,} filas/s" if etapa['filas_por_seg'] else ' ' * 19
+        memoria = f"{etapa['pico_rss_mb']:>8,.1f} MB" if etapa['pico_rss_mb'] is not None else ''
+        print(f"  {nombre:<34} {etapa['segundos'] * 1000:>10,.1f} ms {velocidad} {memoria}")
+
+
+def comparar(resultado, base):
+    """Muestra cada etapa contra la misma etapa/escala de la base. Devuelve las regresiones."""
+    regresiones = []
+    print(f"\nComparación con la base del {base.get('fecha')}:")
+    for escala, medicion in resultado['escalas'].items():
+        anterior = base.get('escalas', {}).get(escala)
+        if anterior is None:
+            continue
+        print(f"  {escala}x")
+        for nombre, etapa in medicion['etapas'].items():
+            previa = anterior['etapas'].get(nombre)
+            if not previa or not previa['segundos']:
+                continue
+            proporcion = etapa['segundos'] / previa['segundos']
+            marca = ''
+            if proporcion > TOLERANCIA and etapa['segundos'] - previa['segundos'] >= MINIMO_SEGUNDOS:
+                marca = '  <-- más lento'
+                regresiones.append((escala, nombre, proporcion))
+            print(f"    {nombre:<34} {proporcion:6.2f}x{marca}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del ETL y los indicadores.")
+    parser.add_argument('escalas', nargs='*', type=int, default=ESCALAS, help="veces el CSV incluido")
+    parser.add_argument('--salida', type=Path, default=SALIDA, help="JSON donde guardar la corrida")
+    parser.add_argument('--procesos', type=int, default=1,
+                        help="procesos para limpiar_datos (1 = en serie, 0 = uno por núcleo)")
+    parser.add_argument('--por-partes', action='store_true',
+                        help="medir también cargar_csv_por_partes y cargar_csv_en_tuberia (cada una en una BD nueva)")
+    parser.add_argument('--comparar', type=Path, default=BASE if BASE.exists() else None,
+                        help="JSON de una corrida anterior (default: etl_base.json)")
+    argumentos = parser.parse_args()
+
+    resultado = correr(argumentos.escalas, argumentos.procesos, argumentos.por_partes)
+    argumentos.salida.write_text(json.dumps(resultado, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(f"\nResultados en '{argumentos.salida}'")
+
+    if argumentos.comparar and argumentos.comparar.resolve() != argumentos.salida.resolve():
+        base = json.loads(argumentos.comparar.read_text(encoding='utf-8'))
+        if comparar(resultado, base):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
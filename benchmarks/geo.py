@@ -0,0 +1,116 @@
+"""
+Benchmark de las consultas por ubicación: índice R*Tree (UbicacionObras) vs. recorrer
+todas las obras calculando la distancia en Python.
+
+Arma una BD temporal con las coordenadas del CSV incluido repetidas N veces
+(cada copia corrida unos metros al azar) y compara radio, rectángulo y k más cercanas.
+
+Uso: python benchmarks/geo.py [repeticiones]   (default 100)
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import peewee
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import modelo_orm
+from gestionar_obras import GestionarObra
+from modelo_orm import Obra, UbicacionObras, distancia_metros
+
+CONSULTAS = 20
+RADIOS = (200, 500, 1500)
+K = 10
+
+
+def armar_bd(repeticiones):
+    GestionarObra.extraer_datos()
+    GestionarObra.limpiar_datos()
+    df = GestionarObra.dataframe.dropna(subset=['lat', 'lng'])
+    base = list(zip(df['nombre'], df['lat'], df['lng']))
+
+    azar = random.Random(0)
+    filas = [
+        (nombre, lat + azar.uniform(-0.003, 0.003), lng + azar.uniform(-0.003, 0.003))
+        for _ in range(repeticiones)
+        for nombre, lat, lng in base
+    ]
+    campos = [Obra.nombre, Obra.lat, Obra.lng]
+    with modelo_orm.db.atomic():
+        for lote in peewee.chunked(filas, GestionarObra._tamanio_lote(len(campos))):
+            Obra.insert_many(lote, fields=campos).execute()
+        UbicacionObras.reconstruir()
+    return [(lat, lng) for _, lat, lng in azar.sample(filas, CONSULTAS)]
+
+
+def todas():
+    return list(Obra.select(Obra.id, Obra.lat, Obra.lng).where(Obra.lat.is_null(False)).tuples())
+
+
+def cerca_recorriendo(lat, lng, metros):
+    return sorted(i for i, la, ln in todas() if distancia_metros(lat, lng, la, ln) <= metros)
+
+
+def rectangulo_recorriendo(lat_min, lng_min, lat_max, lng_max):
+    return sorted(i for i, la, ln in todas() if lat_min <= la <= lat_max and lng_min <= ln <= lng_max)
+
+
+def mas_cercanas_recorriendo(lat, lng, k):
+    distancias = sorted((distancia_metros(lat, lng, la, ln), i) for i, la, ln in todas())
+    return [i for _, i in distancias[:k]]
+
+
+def medir(nombre, recorriendo, con_indice, puntos):
+    inicio = time.perf_counter()
+    esperado = [recorriendo(*p) for p in puntos]
+    t_recorrido = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    obtenido = [con_indice(*p) for p in puntos]
+    t_indice = time.perf_counter() - inicio
+
+    if esperado != obtenido:
+        raise SystemExit(f"Resultados distintos en '{nombre}'")
+    print(
+        f"  {nombre:<22} recorrido: {t_recorrido / len(puntos) * 1000:8.2f} ms   "
+        f"R*Tree: {t_indice / len(puntos) * 1000:7.2f} ms  ({t_recorrido / t_indice:,.0f}x)"
+    )
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    with tempfile.TemporaryDirectory() as carpeta:
+        modelo_orm.configurar_db(ruta=str(Path(carpeta) / 'geo.db'))
+        GestionarObra.mapear_orm()
+        puntos = armar_bd(repeticiones)
+        print(f"{UbicacionObras.select().count():,} obras con coordenadas ({repeticiones}x el CSV incluido)")
+
+        for metros in RADIOS:
+            medir(
+                f"radio {metros} m",
+                lambda lat, lng: cerca_recorriendo(lat, lng, metros),
+                lambda lat, lng: sorted(obra.id for obra, _ in UbicacionObras.cerca(lat, lng, metros, Obra.id)),
+                puntos,
+            )
+
+        rectangulos = [UbicacionObras.rectangulo(lat, lng, 500) for lat, lng in puntos]
+        medir(
+            "rectángulo 1 km",
+            rectangulo_recorriendo,
+            lambda *r: sorted(i for (i,) in UbicacionObras.en_rectangulo(*r, Obra.id).tuples()),
+            rectangulos,
+        )
+        medir(
+            f"{K} más cercanas",
+            lambda lat, lng: mas_cercanas_recorriendo(lat, lng, K),
+            lambda lat, lng: [obra.id for obra, _ in UbicacionObras.mas_cercanas(lat, lng, K, Obra.id)],
+            puntos,
+        )
+        modelo_orm.db.close()
+    modelo_orm.configurar_db()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark de la normalización de columnas de catálogo de limpiar_datos():
+cadena de .str original (fila por fila) vs. canonizar_serie (solo valores únicos).
+
+Uso: python benchmarks/normalizacion.py [repeticiones]   (default 100)
+"""
+import sys
+import time
+from pathlib import Path
+
+import pandas
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from gestionar_obras import GestionarObra
+from normalizacion import canonizar, canonizar_serie
+
+# columna del CSV -> nombre interno (el interno decide qué reglas aplican)
+COLUMNAS = {
+    'etapa': 'etapa',
+    'tipo': 'tipo_obra',
+    'area_responsable': 'area_responsable',
+    'barrio': 'barrio',
+    'licitacion_oferta_empresa': 'empresa',
+    'contratacion_tipo': 'tipo_contratacion',
+    'financiamiento': 'fuente_financiamiento',
+}
+
+
+def normalizar_original(serie, col):
+    """La cadena de .str que usaba limpiar_datos() antes de canonizar_serie."""
+    es_nulo = serie.isnull()
+    serie = serie.astype(str).str.strip().str.title().replace("None", None)
+    if col == 'barrio':
+        serie = serie.str.replace("Monserrat", "Montserrat", case=False)
+    serie = serie.str.normalize('NFD').str.encode('ascii', 'ignore').str.decode('utf-8')
+    serie = serie.str.replace("Secretari A", "Secretaria", case=False)
+    serie = serie.str.replace(r'\s+', ' ', regex=True)
+    serie = serie.str.strip()
+    serie = serie.replace("None", None)
+    serie[es_nulo] = None
+    return serie
+
+
+def medir(funcion, df):
+    inicio = time.perf_counter()
+    resultado = {interno: funcion(df[csv], interno) for csv, interno in COLUMNAS.items()}
+    return time.perf_counter() - inicio, resultado
+
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    base = pandas.read_csv(GestionarObra.CSV_PATH, **GestionarObra.OPCIONES_CSV)
+    df = pandas.concat([base] * repeticiones, ignore_index=True)
+    df = df.where(pandas.notnull(df), None)
+    print(f"{len(df):,} filas ({repeticiones}x el CSV incluido)")
+
+    t_original, original = medir(normalizar_original, df)
+    canonizar.cache_clear()  # el tiempo incluye llenar el cache
+    t_nuevo, nuevo = medir(canonizar_serie, df)
+
+    for col in original:
+        a = original[col].where(original[col].notna(), None)
+        if not a.equals(nuevo[col]):
+            raise SystemExit(f"Resultados distintos en la columna '{col}'")
+
+    print(f"  cadena .str original: {t_original:8.3f} s")
+    print(f"  canonizar_serie:      {t_nuevo:8.3f} s  ({t_original / t_nuevo:,.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Búsqueda aproximada de nombres en memoria (para elegir barrios, empresas, etc. desde la terminal).
+
+Se arma una sola vez con todos los nombres de un catálogo y después cada búsqueda
+devuelve los mejores candidatos sin ir a la BD:
+* índice de prefijos (lista ordenada + bisect) sobre el nombre completo y sobre cada palabra,
+* índice de trigramas para tolerar errores de tipeo ("Palerno" -> "Palermo").
+Los nombres se comparan sin acentos, mayúsculas ni signos.
+"""
+import bisect
+import re
+from collections import Counter, defaultdict, namedtuple
+
+from normalizacion import sin_acentos
+
+# tipo: cómo coincidió, de mejor a peor
+EXACTA, PREFIJO, PALABRAS, APROXIMADA = 'exacta', 'prefijo', 'palabras', 'aproximada'
+
+Candidato = namedtuple('Candidato', ['item', 'nombre', 'puntaje', 'tipo'])
+
+_NO_ALFANUMERICO = re.compile(r'[^a-z0-9]+')
+
+
+def normalizar(texto):
+    """'Villa del Parque (Comuna 11)' -> 'villa del parque comuna 11'."""
+    return _NO_ALFANUMERICO.sub(' ', sin_acentos(str(texto)).lower()).strip()
+
+
+def trigramas(texto):
+    """Trigramas con relleno, así el principio de cada palabra pesa más: 'sol' -> '  s', ' so', 'sol', 'ol '."""
+    relleno = f'  {texto} '
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class BuscadorNombres:
+    """
+    items: lo que se busca (instancias de un modelo, por ejemplo);
+    nombre: función item -> texto por el que se lo busca.
+    """
+
+    def __init__(self, items, nombre=str):
+        self._items = []                       # posición -> (item, nombre original, clave normalizada)
+        self._claves = []                      # (clave, posición), ordenado: prefijos del nombre completo
+        self._palabras = []                    # (palabra, posición), ordenado: prefijos de cada palabra
+        self._trigramas = defaultdict(list)    # trigrama -> posiciones
+        self._cantidad_trigramas = []
+
+        for posicion, item in enumerate(items):
+            texto = nombre(item)
+            clave = normalizar(texto)
+            self._items.append((item, texto, clave))
+            self._claves.append((clave, posicion))
+            self._palabras.extend((palabra, posicion) for palabra in set(clave.split()))
+            propios = trigramas(clave)
+            for trigrama in propios:
+                self._trigramas[trigrama].append(posicion)
+            self._cantidad_trigramas.append(len(propios))
+
+        self._claves.sort()
+        self._palabras.sort()
+
+    def __len__(self):
+        return len(self._items)
+
+    @staticmethod
+    def _con_prefijo(indice, prefijo):
+        """Posiciones cuya clave empieza con 'prefijo' (búsqueda binaria + recorrido del rango)."""
+        desde = bisect.bisect_left(indice, (prefijo,))
+        posiciones = set()
+        for clave, posicion in indice[desde:]:
+            if not clave.startswith(prefijo):
+                break
+            posiciones.add(posicion)
+        return posiciones
+
+    def buscar(self, texto, k=5, minimo=0.45):
+        """
+        Los k mejores candidatos para 'texto', del más al menos parecido.
+        Puntaje: 1 exacta, 0.9 prefijo del nombre, 0.8 todas las palabras como prefijo
+        ("parq pat" -> "Parque Patricios"), y hasta 0.7 por parecido de trigramas
+        (solo si supera 'minimo', entre 0 y 1).
+        """
+        clave = normalizar(texto)
+        if not clave:
+            return []
+        mejores = {}
+
+        def anotar(posicion, puntaje, tipo):
+            if puntaje > mejores.get(posicion, (0, None))[0]:
+                mejores[posicion] = (puntaje, tipo)
+
+        for posicion in self._con_prefijo(self._claves, clave):
+            if self._items[posicion][2] == clave:
+                anotar(posicion, 1.0, EXACTA)
+            else:
+                anotar(posicion, 0.9, PREFIJO)
+
+        conjuntos = [self._con_prefijo(self._palabras, palabra) for palabra in clave.split()]
+        for posicion in set.intersection(*conjuntos):
+            anotar(posicion, 0.8, PALABRAS)
+
+        # Parecido: el mayor entre el coeficiente de Dice (nombres parecidos en general) y
+        # cuánto de lo buscado aparece en el nombre (búsquedas cortas con un error dentro de un nombre largo)
+        buscados = trigramas(clave)
+        comunes = Counter(
+            posicion for trigrama in buscados for posicion in self._trigramas.get(trigrama, ())
+        )
+        for posicion, cantidad in comunes.items():
+            dice = 2 * cantidad / (len(buscados) + self._cantidad_trigramas[posicion])
+            cobertura = 0.8 * cantidad / len(buscados)
+            parecido = max(dice, cobertura)
+            if parecido >= minimo:
+                anotar(posicion, 0.7 * parecido, APROXIMADA)
+
+        orden = sorted(mejores.items(), key=lambda par: (-par[1][0], len(self._items[par[0]][1]), self._items[par[0]][1]))
+        return [
+            Candidato(self._items[posicion][0], self._items[posicion][1], round(puntaje, 3), tipo)
+            for posicion, (puntaje, tipo) in orden[:k]
+        ]
@@ -0,0 +1,186 @@
+"""
+Exportación columnar (Parquet / Feather) de las obras con los catálogos resueltos,
+para los análisis que quieren la tabla entera sin pasar por objetos de peewee.
+
+* Se lee la tabla obras de a partes (por id, sin joins) y cada parte se escribe como
+  un row group (Parquet) o un record batch (Feather), así la memoria queda acotada.
+* Las columnas de catálogo (etapa, barrio, comuna, empresa...) van dictionary-encoded:
+  un índice entero por fila contra el catálogo entero, que se lee una sola vez.
+* Fechas como date32, montos y coordenadas como float64, enteros como int64.
+
+pyarrow es opcional: solo hace falta para exportar y leer (pip install pyarrow).
+"""
+import os
+from pathlib import Path
+
+import pandas
+
+try:
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.feather
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+import peewee
+
+from modelo_orm import db, Barrio, Comuna, Obra
+
+FORMATOS = {'.parquet': 'parquet', '.feather': 'feather', '.arrow': 'feather'}
+
+
+def _requiere_pyarrow():
+    if pyarrow is None:
+        raise ImportError("La exportación columnar necesita pyarrow (pip install pyarrow).")
+
+
+def _formato(ruta, formato=None):
+    formato = formato or FORMATOS.get(Path(ruta).suffix.lower())
+    if formato not in ('parquet', 'feather'):
+        raise ValueError(f"No sé en qué formato escribir '{ruta}' (usar .parquet, .feather o formato=...).")
+    return formato
+
+
+def _tipo(campo):
+    """Tipo de arrow para un campo de Obra (que no sea FK)."""
+    if isinstance(campo, (peewee.AutoField, peewee.IntegerField)):
+        return pyarrow.int64()
+    if isinstance(campo, peewee.FloatField):
+        return pyarrow.float64()
+    if isinstance(campo, peewee.DateField):
+        return pyarrow.date32()
+    if isinstance(campo, peewee.BooleanField):
+        return pyarrow.bool_()
+    return pyarrow.string()
+
+
+def _catalogo(Modelo):
+    """(diccionario con los nombres, id -> posición en el diccionario)."""
+    columna = getattr(Modelo, Modelo.CAMPO_NOMBRE)
+    filas = list(Modelo.select(Modelo.id, columna).order_by(columna).tuples())
+    nombres = pyarrow.array([nombre for _, nombre in filas], pyarrow.string())
+    return nombres, {id_: posicion for posicion, (id_, _) in enumerate(filas)}
+
+
+def _columnas():
+    """
+    Plan de la exportación: lista de (nombre, campo de Obra, cómo convertirla).
+    La comuna no está en obras: sale del barrio.
+    """
+    plan = []
+    for campo in Obra._meta.sorted_fields:
+        if isinstance(campo, peewee.ForeignKeyField):
+            plan.append((campo.name, campo, _catalogo(campo.rel_model)))
+            if campo.rel_model is Barrio:
+                comunas, posiciones = _catalogo(Comuna)
+                por_barrio = {
+                    id_barrio: posiciones[id_comuna]
+                    for id_barrio, id_comuna in Barrio.select(Barrio.id, Barrio.comuna).tuples()
+                    if id_comuna is not None
+                }
+                plan.append(('comuna', campo, (comunas, por_barrio)))
+        else:
+            plan.append((campo.name, campo, _tipo(campo)))
+    return plan
+
+
+def esquema(plan):
+    campos = []
+    for nombre, _, conversion in plan:
+        if isinstance(conversion, tuple):
+            tipo = pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+        else:
+            tipo = conversion
+        campos.append(pyarrow.field(nombre, tipo))
+    return pyarrow.schema(campos)
+
+
+def _array(valores, conversion):
+    if isinstance(conversion, tuple):
+        diccionario, posiciones = conversion
+        indices = pyarrow.array([posiciones.get(valor) for valor in valores], pyarrow.int32())
+        return pyarrow.DictionaryArray.from_arrays(indices, diccionario)
+    if conversion == pyarrow.date32():
+        # En SQLite las fechas son texto 'AAAA-MM-DD'; lo que no sea una fecha queda nulo
+        texto = pyarrow.array(valores, pyarrow.string())
+        fechas = pyarrow.compute.strptime(texto, format='%Y-%m-%d', unit='s', error_is_null=True)
+        return fechas.cast(pyarrow.date32())
+    if conversion == pyarrow.bool_():
+        return pyarrow.array([None if valor is None else bool(valor) for valor in valores], conversion)
+    return pyarrow.array(valores, conversion)
+
+
+def _partes(plan, tamanio_chunk):
+    """Record batches de hasta tamanio_chunk obras, en orden de id (paginando por id, no con OFFSET)."""
+    campos = list(dict.fromkeys(campo for _, campo, _ in plan))
+    posicion = {campo.name: i for i, campo in enumerate(campos)}
+    ultimo_id = 0
+    while True:
+        query = Obra.select(*campos).where(Obra.id > ultimo_id).order_by(Obra.id).limit(tamanio_chunk)
+        # Cursor crudo: los valores tal como están en SQLite, sin armar objetos de peewee
+        filas = db.execute(query).fetchall()
+        if not filas:
+            return
+        columnas = list(zip(*filas))
+        yield pyarrow.RecordBatch.from_arrays(
+            [_array(columnas[posicion[campo.name]], conversion) for _, campo, conversion in plan],
+            names=[nombre for nombre, _, _ in plan],
+        )
+        ultimo_id = filas[-1][posicion['id']]
+
+
+def exportar(ruta, formato=None, tamanio_chunk=50_000):
+    """
+    Escribe la vista desnormalizada de obras en 'ruta' (.parquet o .feather).
+    Se escribe en un archivo temporal y se renombra al final: nunca queda un archivo a medias.
+    Devuelve la cantidad de obras exportadas.
+    """
+    _requiere_pyarrow()
+    formato = _formato(ruta, formato)
+    ruta = Path(ruta)
+    temporal = ruta.with_name(ruta.name + '.tmp')
+
+    with db.atomic():  # Todas las partes leen la misma versión de la tabla
+        plan = _columnas()
+        tipos = esquema(plan)
+        if formato == 'parquet':
+            escritor = pyarrow.parquet.ParquetWriter(temporal, tipos)
+        else:
+            opciones = pyarrow.ipc.IpcWriteOptions(compression='lz4')
+            escritor = pyarrow.ipc.new_file(temporal, tipos, options=opciones)
+
+        cantidad = 0
+        try:
+            for parte in _partes(plan, tamanio_chunk):
+                if formato == 'parquet':
+                    escritor.write_table(pyarrow.Table.from_batches([parte]))
+                else:
+                    escritor.write_batch(parte)
+                cantidad += parte.num_rows
+        except BaseException:
+            escritor.close()
+            temporal.unlink(missing_ok=True)
+            raise
+        escritor.close()
+
+    os.replace(temporal, ruta)
+    return cantidad
+
+
+def leer(ruta, columnas=None, formato=None):
+    """
+    Lee una exportación a un DataFrame: los catálogos vienen como Categorical,
+    las fechas como datetime64 y los enteros como Int64 (admiten nulos).
+    columnas: lista opcional, para leer solo esas (en Parquet y Feather no se lee el resto).
+    """
+    _requiere_pyarrow()
+    if _formato(ruta, formato) == 'parquet':
+        tabla = pyarrow.parquet.read_table(ruta, columns=columnas)
+    else:
+        tabla = pyarrow.feather.read_table(ruta, columns=columnas)
+    return tabla.to_pandas(
+        date_as_object=False,
+        types_mapper={pyarrow.int64(): pandas.Int64Dtype()}.get,
+    )
@@ -1,8 +1,27 @@
 """"SEGUIMOS CON EL PUNTO 4."""
 from abc import ABC
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import os
+import pickle
+import queue
+import re
+import threading
+import time
 import pandas           
 import peewee
-from modelo_orm import db, Comuna, Barrio, TipoObra, AreaResponsable, Empresa, Etapa, TipoContratacion, FuenteFinanciamiento, Obra   
+from playhouse.sqlite_ext import VirtualModel
+import exportacion
+import lectura
+from analitica import AnaliticaObras
+from buscador import APROXIMADA, EXACTA, BuscadorNombres
+from instrumentacion import Metricas, agregar_filas, log, medido, tramo
+from indicadores import (
+    COMUNAS_INDICADOR, PLAZO_INDICADOR, BarrioDeComuna, CacheIndicadores, Indicadores, InversionPorTipo, ObrasPorEtapa,
+)
+from normalizacion import REGLAS, canonizar_serie
+from parseo import FORMATOS_FECHA, NULOS, parsear_coordenada, parsear_fecha, parsear_numero
+from modelo_orm import db, agregar_observador_conexion, catalogos, lote_maximo, CatalogoModel, Comuna, Barrio, TipoObra, AreaResponsable, Empresa, Etapa, TipoContratacion, FuenteFinanciamiento, Obra, Metadato, ResumenObras, BusquedaObras, UbicacionObras
 from pathlib import Path
 
 #Crear clase abstracta
@@ -10,10 +29,73 @@ class GestionarObra(ABC):
     CSV_PATH = Path(__file__).parent / "observatorio-de-obras-urbanas.csv"
     #Ruta relativa para correrlo en cualquier ordenador
     dataframe = None
+    # Exportación columnar para análisis (.parquet o .feather, ver exportacion.py)
+    EXPORTACION_PATH = Path(__file__).parent / "obras.parquet"
+
+    # Formato del CSV del Observatorio (dtype=str para no pelearme con tipos raros)
+    OPCIONES_CSV = dict(dtype=str, encoding='latin-1', sep=';')
+    # Filas por parte en la carga en streaming (cargar_csv_por_partes)
+    TAMANIO_CHUNK = 50_000
+    # Columna -> cantidad de valores que no se pudieron parsear en la última limpieza
+    fallos_parseo = {}
+
+    # Indicadores: resultados cacheados por (indicador, parámetros); se descartan
+    # a los TTL_INDICADORES segundos (se lee en cada consulta), apenas se escribe algo en la BD
+    # o al abrir una conexión nueva
+    TTL_INDICADORES = 60
+    cache_indicadores = CacheIndicadores(db)
+    # Foto en memoria de obras para análisis ad-hoc (se crea en el primer analisis())
+    analitica = None
+    # Consultas que tardan más que esto (segundos) se registran con su plan en instrumentar()
+    UMBRAL_CONSULTA_LENTA = 0.5
+
+    TABLAS = [Comuna, Barrio, TipoObra, AreaResponsable, Empresa, Etapa, TipoContratacion, FuenteFinanciamiento, Obra, Metadato, ResumenObras, BusquedaObras, UbicacionObras]
+    # Tablas que se calculan a partir de obras (ver reconstruir_derivadas)
+    DERIVADAS = [ResumenObras, BusquedaObras, UbicacionObras]
+    # Subir al cambiar qué cuenta ResumenObras: mapear_orm lo reconstruye en las BD de otra versión
+    # (2: solo cuenta las obras vigentes)
+    VERSION_RESUMEN = 2
+    # Índices de versiones anteriores que ya cubre otro (se borran al migrar)
+    INDICES_VIEJOS = [
+        'obra_etapa_id_plazo_meses_monto_contrato', 'obra_tipo_obra_id_monto_contrato',
+        'obra_barrio_id_monto_contrato', 'obra_monto_contrato',
+    ]
+
+    # Carga de obras: 'bulk' (INSERT multi-fila por lotes) o 'create' (Model.create() por fila)
+    MODO_CARGA = 'bulk'
+    TAMANIO_LOTE = 500
+
+    # Limpieza en paralelo: procesos que reparten el DataFrame (1 = en serie, 0 = uno por núcleo).
+    # Con menos filas que MINIMO_FILAS_PARALELO se limpia en serie (no compensa mandar los datos a otros procesos)
+    PROCESOS_LIMPIEZA = 1
+    MINIMO_FILAS_PARALELO = 100_000
+    # Partes por proceso: varias, así un proceso que termina antes toma otra
+    PARTES_POR_PROCESO = 4
+    # Carga en tubería: partes que puede haber esperando entre una etapa y la siguiente
+    PARTES_EN_COLA = 2
+
+    # Cache del DataFrame limpio (preparar_datos): carpeta (None = 'cache_limpieza' al lado de la BD).
+    # Subir VERSION_LIMPIEZA al cambiar _limpiar_con_fallos: invalida lo cacheado y la marca de la BD
+    CACHE_LIMPIEZA_DIR = None
+    VERSION_LIMPIEZA = 1
+    # Huella (CSV + reglas de limpieza) del DataFrame actual, si salió de preparar_datos()
+    huella_dataframe = None
+
+    # Columnas de Obra que se cargan desde el DataFrame (las FK se resuelven aparte)
+    CAMPOS_OBRA = [
+        'nombre', 'descripcion', 'entorno', 'monto_contrato', 'direccion', 'lat', 'lng',
+        'fecha_inicio', 'fecha_fin_inicial', 'plazo_meses', 'porcentaje_avance', 'mano_obra',
+        'nro_contratacion', 'nro_expediente', 'cuit_contratista', 'destacada', 'codigo',
+    ]
+    CAMPOS_FK_OBRA = [
+        'barrio', 'tipo_obra', 'area_responsable', 'empresa',
+        'etapa', 'tipo_contratacion', 'fuente_financiamiento',
+    ]
 
 
 #Punto A extraer datos!
     @classmethod
+    @medido()
     def extraer_datos(cls):
         """
         leo el csv y devuelvo un DataFrame.
@@ -25,61 +107,350 @@ class GestionarObra(ABC):
         *si no existe → frena el programa a propósito
         *te da un mensaje claro diciendo: “Che, no encontré el CSV en tal ruta”"""
         try:
-            df = pandas.read_csv(cls.CSV_PATH, dtype=str, low_memory=False, encoding='latin-1',sep=';')
+            df = pandas.read_csv(cls.CSV_PATH, low_memory=False, **cls.OPCIONES_CSV)
             cls.dataframe = df
-            print(f"(A) Extracción de datos del CSV '{cls.CSV_PATH}' exitosa.")
+            cls.huella_dataframe = None
+            agregar_filas(len(df))
+            log.info(f"(A) Extracción de datos del CSV '{cls.CSV_PATH}' exitosa.")
         except FileNotFoundError:
-            raise FileNotFoundError(
-                f"No encontre el csv en '{cls.CSV_PATH}'. "
-                "Si el archivo tiene otro nombre o carpeta, cambiar GestionarObra.CSV_PATH."
-            )
+            raise cls._csv_no_encontrado()
         except Exception as e:
-            print(f"Error inesperado al leer el CSV: {e}")
+            log.error(f"Error inesperado al leer el CSV: {e}")
             raise
 
+    @classmethod
+    def _csv_no_encontrado(cls):
+        """El error de cuando falta el CSV: “Che, no encontré el CSV en tal ruta”."""
+        return FileNotFoundError(
+            f"No encontre el csv en '{cls.CSV_PATH}'. "
+            "Si el archivo tiene otro nombre o carpeta, cambiar GestionarObra.CSV_PATH."
+        )
+
     # A partir de aca tenemos la conexion y las tablas
 
 
+    # (a) + (d) con cache: el CSV limpio se guarda por su huella y no se vuelve a procesar si no cambió
+    @classmethod
+    def huella_csv(cls):
+        """Huella del CSV (contenido) + versión de las reglas de limpieza: identifica al DataFrame limpio."""
+        huella = hashlib.blake2b(digest_size=16)
+        reglas = (cls.VERSION_LIMPIEZA, REGLAS, FORMATOS_FECHA, NULOS, cls.OPCIONES_CSV)
+        huella.update(repr(reglas).encode('utf-8'))
+        try:
+            with open(cls.CSV_PATH, 'rb') as archivo:
+                while bloque := archivo.read(1 << 20):
+                    huella.update(bloque)
+        except FileNotFoundError:
+            raise cls._csv_no_encontrado()
+        return huella.hexdigest()
+
+    @classmethod
+    def _carpeta_cache_limpieza(cls):
+        if cls.CACHE_LIMPIEZA_DIR is not None:
+            return Path(cls.CACHE_LIMPIEZA_DIR)
+        base = db.database if db.obj is not None and db.database != ':memory:' else cls.CSV_PATH
+        return Path(base).parent / 'cache_limpieza'
+
+    @classmethod
+    @medido()
+    def preparar_datos(cls, usar_cache=True):
+        """
+        Extrae y limpia el CSV (a + d) salvo que no haga falta:
+        * 'cargado': la BD ya se cargó con este mismo CSV y estas reglas -> no se lee nada (cls.dataframe = None)
+        * 'cache': el DataFrame limpio sale del archivo guardado para esta huella
+        * 'csv': se extrae y limpia como siempre, y se guarda el resultado para la próxima
+        Devuelve cuál de los tres fue. usar_cache=False fuerza 'csv' (y vuelve a guardar).
+        """
+        huella = cls.huella_csv()
+        if usar_cache and Metadato.table_exists() and Metadato.leer('huella_csv') == huella:
+            cls.dataframe = None
+            cls.huella_dataframe = huella
+            log.info("(A)(D) La base de datos ya tiene los datos de este CSV: no hace falta leerlo ni limpiarlo.")
+            return 'cargado'
+
+        ruta = cls._carpeta_cache_limpieza() / f"limpio-{huella}.pkl"
+        if usar_cache and ruta.exists():
+            try:
+                with open(ruta, 'rb') as archivo:
+                    guardado = pickle.load(archivo)
+                cls.dataframe = guardado['dataframe']
+                cls.fallos_parseo = guardado['fallos_parseo']
+                cls.huella_dataframe = huella
+                agregar_filas(len(cls.dataframe))
+                log.info(f"(A)(D) Datos limpios leídos de '{ruta}' (el CSV no cambió).")
+                return 'cache'
+            except Exception as e:
+                log.warning(f"No se pudo leer '{ruta}' ({e}); se vuelve a procesar el CSV.")
+
+        cls.extraer_datos()
+        cls.limpiar_datos()
+        cls.huella_dataframe = huella
+        cls._guardar_cache_limpieza(ruta)
+        return 'csv'
+
+    @classmethod
+    def _guardar_cache_limpieza(cls, ruta):
+        """Guarda el DataFrame limpio (archivo temporal + rename) y borra los de otras huellas."""
+        try:
+            ruta.parent.mkdir(parents=True, exist_ok=True)
+            temporal = ruta.with_name(ruta.name + '.tmp')
+            with open(temporal, 'wb') as archivo:
+                pickle.dump(
+                    {'dataframe': cls.dataframe, 'fallos_parseo': cls.fallos_parseo},
+                    archivo, protocol=pickle.HIGHEST_PROTOCOL,
+                )
+            os.replace(temporal, ruta)
+            for viejo in ruta.parent.glob('limpio-*.pkl'):
+                if viejo != ruta:
+                    viejo.unlink(missing_ok=True)
+        except OSError as e:
+            # Sin cache se sigue igual: la próxima vez se vuelve a limpiar el CSV
+            log.warning(f"No se pudo guardar el cache de la limpieza en '{ruta}': {e}")
+
+    @classmethod
+    def _registrar_origen(cls, huella):
+        """Anota en la BD de qué CSV (huella) salen sus obras; None = de uno desconocido."""
+        Metadato.escribir('huella_csv', huella)
+
 #Punto B conectar la base de datos!
     @classmethod
     def conectar_db(cls):
         """Abro la conexion; reuse_if_open=True evita error si ya estaba abierta."""
         try:
+            # Los pragmas (foreign_keys, WAL, cache, etc.) se aplican solos en cada conexión,
+            # ver configuracion_db() en modelo_orm.py
             db.connect(reuse_if_open=True)
-            # Habilitar soporte de Foreign Keys en SQLite
-            db.execute_sql('PRAGMA foreign_keys = ON;')
-            print("(B) Conexión exitosa a la base de datos.")
+            log.info("(B) Conexión exitosa a la base de datos.")
 
         except peewee.OperationalError as e:
-            print(f"Error al conectar con la base de datos: {e}")
+            log.error(f"Error al conectar con la base de datos: {e}")
             raise
 
 #Punto C mapear el Orm Crear la estructura de tablas de la BD!
     @classmethod
+    @medido()
     def mapear_orm(cls):
         """
         nos aseguramos de que las tablas existan.
         safe=True evita explotar si ya estaban creadas.
         """
         try:
-            tablas = [Comuna, Barrio, TipoObra, AreaResponsable, Empresa, Etapa, TipoContratacion, FuenteFinanciamiento, Obra]
-            db.create_tables(tablas, safe=True)
-            print("(c) Mapeo ORM y creación de tablas exitosos.")
+            cls._migrar_esquema()
+            derivadas_nuevas = [Modelo for Modelo in cls.DERIVADAS if not Modelo.table_exists()]
+            indices_antes = {
+                Modelo: {indice.name for indice in db.get_indexes(Modelo._meta.table_name)}
+                for Modelo in cls.TABLAS if Modelo.table_exists()
+            }
+
+            # create_tables(safe=True) también crea los índices declarados que le falten a una BD existente
+            db.create_tables(cls.TABLAS, safe=True)
+
+            for Modelo, anteriores in indices_antes.items():
+                for indice in db.get_indexes(Modelo._meta.table_name):
+                    if indice.name not in anteriores:
+                        log.info(f"  Migración: índice '{indice.name}' creado en '{Modelo._meta.table_name}'.")
+            # BD de una versión anterior (o vacía): el resumen y los índices se arman con lo que haya en obras
+            for Modelo in derivadas_nuevas:
+                Modelo.reconstruir()
+            if Metadato.leer('version_resumen') != str(cls.VERSION_RESUMEN):
+                if ResumenObras not in derivadas_nuevas:
+                    ResumenObras.reconstruir()
+                    log.info("  Migración: resumen de indicadores recalculado.")
+                Metadato.escribir('version_resumen', str(cls.VERSION_RESUMEN))
+            log.info("(c) Mapeo ORM y creación de tablas exitosos.")
         except peewee.OperationalError as e:
-            print(f"Error al crear las tablas: {e}")
+            log.error(f"Error al crear las tablas: {e}")
             raise
 
+    @classmethod
+    @medido()
+    def reconstruir_derivadas(cls, modelos=None):
+        """
+        Recalcula desde obras el resumen de indicadores y los índices de búsqueda y ubicación
+        (o solo los 'modelos' pedidos). Lo usa cargar_datos con la tabla vacía; las cargas
+        incrementales actualizan solo las obras que escriben. Sirve también para reparar
+        las tablas derivadas si se tocaron obras por fuera de la app.
+        """
+        with db.atomic():
+            for Modelo in modelos or cls.DERIVADAS:
+                with tramo(Modelo.__name__):
+                    Modelo.reconstruir()
+
+    @classmethod
+    def _indexar_obras(cls, ids):
+        """Reindexa (búsqueda de texto y ubicación) las obras que escribió una carga por lotes."""
+        BusquedaObras.indexar(ids)
+        UbicacionObras.indexar(ids)
+
+    @classmethod
+    def _migrar_esquema(cls):
+        """
+        Pone al día una BD creada con una versión anterior de los modelos:
+        agrega las columnas que falten y borra los índices reemplazados (los nuevos los crea después create_tables).
+        """
+        for indice in cls.INDICES_VIEJOS:
+            if db.execute_sql("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (indice,)).fetchone():
+                db.execute_sql(f'DROP INDEX "{indice}"')
+                log.info(f"  Migración: índice '{indice}' reemplazado.")
+
+        for Modelo in cls.TABLAS:
+            tabla = Modelo._meta.table_name
+            # Las tablas virtuales (índices FTS5 y R*Tree) no admiten ALTER TABLE: se reconstruyen
+            if not db.table_exists(tabla) or issubclass(Modelo, VirtualModel):
+                continue
+
+            existentes = {columna.name for columna in db.get_columns(tabla)}
+            for campo in Modelo._meta.sorted_fields:
+                if campo.column_name in existentes:
+                    continue
+                ctx = db.get_sql_context()
+                ddl, _ = ctx.sql(campo.ddl(ctx)).query()
+                db.execute_sql(f'ALTER TABLE "{tabla}" ADD COLUMN {ddl}')
+                log.info(f"  Migración: columna '{campo.column_name}' agregada a '{tabla}'.")
+
+                if Modelo is Obra and campo is Obra.codigo:
+                    cls._completar_codigos()
+
+    @classmethod
+    def _completar_codigos(cls):
+        """Calcula el 'codigo' (NOMBRE-BARRIO) de las obras cargadas antes de que existiera la columna."""
+        query = (
+            Obra.select(Obra.id, Obra.nombre, Barrio.nombre)
+            .join(Barrio, peewee.JOIN.LEFT_OUTER)
+            .tuples()
+        )
+        codigos = {}
+        for id_obra, nombre, barrio in query:
+            codigo = f"{(nombre or 'SIN_NOMBRE').upper()}-{(barrio or 'SIN_BARRIO').upper()}"
+            codigos.setdefault(codigo, id_obra)  # Si se repite, se queda la primera (el índice es único)
+
+        with db.atomic():
+            for codigo, id_obra in codigos.items():
+                Obra.update(codigo=codigo).where(Obra.id == id_obra).execute()
+
+    @classmethod
+    def _consultas_frecuentes(cls):
+        """
+        Las consultas que corren seguido, por nombre: las de cada indicador (armadas por los mismos
+        _consulta_* que usan los indicador_*, con los parámetros por defecto) y las que recalculan el resumen.
+        """
+        etapa_finalizada = catalogos.buscar(Etapa, "Finalizada")
+        consultas = {
+            'areas_responsables': cls._consulta_areas_responsables(),
+            'tipos_obra': cls._consulta_tipos_obra(),
+            'obras_por_etapa': cls._consulta_obras_por_etapa(),
+            'inversion_por_tipo': cls._consulta_inversion_por_tipo(),
+            'barrios_por_comuna': cls._consulta_barrios_por_comuna(COMUNAS_INDICADOR),
+            'finalizadas_en_plazo': cls._consulta_finalizadas_en_plazo(
+                etapa_finalizada.id if etapa_finalizada is not None else 0, PLAZO_INDICADOR
+            ),
+            'inversion_total': cls._consulta_inversion_total(),
+        }
+        for dimension, query in ResumenObras._agrupar().items():
+            consultas[f'reconstruir_resumen_{dimension}'] = query
+        return consultas
+
+    @classmethod
+    def planes_de_consultas(cls):
+        """nombre -> líneas de EXPLAIN QUERY PLAN de cada consulta frecuente (con las tablas por su nombre, no t1, t2...)."""
+        planes = {}
+        for nombre, query in cls._consultas_frecuentes().items():
+            sql, parametros = query.sql()
+            tablas = dict((alias, tabla) for tabla, alias in re.findall(r'(?:FROM|JOIN) "(\w+)" AS "(\w+)"', sql))
+            planes[nombre] = [
+                re.sub(r'^(SCAN|SEARCH) (\w+)', lambda m: f"{m[1]} {tablas.get(m[2], m[2])}", fila[-1])
+                for fila in db.execute_sql(f'EXPLAIN QUERY PLAN {sql}', parametros)
+            ]
+        return planes
+
+    @classmethod
+    def verificar_plan_consultas(cls):
+        """
+        Falla (RuntimeError) si alguna consulta frecuente recorre una tabla entera
+        sin índice ("SCAN tabla" a secas). Devuelve los planes si está todo bien.
+        Los catálogos son la excepción: son chicos y los indicadores (a)-(d) los listan enteros.
+        """
+        planes = cls.planes_de_consultas()
+        catalogos_enteros = {Modelo._meta.table_name for Modelo in cls.TABLAS if issubclass(Modelo, CatalogoModel)}
+        con_scan = {
+            nombre: plan for nombre, plan in planes.items()
+            if any(
+                (scan := re.fullmatch(r'SCAN (\S+)', linea)) and scan[1] not in catalogos_enteros
+                for linea in plan
+            )
+        }
+        if con_scan:
+            detalle = "; ".join(f"{nombre}: {' | '.join(plan)}" for nombre, plan in con_scan.items())
+            raise RuntimeError(f"Consultas que recorren la tabla completa: {detalle}")
+        return planes
+
     #Punto D A partir de aca hacemos la limpieza y la normalizacion
     @classmethod
-    def limpiar_datos(cls):
+    @medido()
+    def limpiar_datos(cls, procesos=None):
         #limpiar_datos(), que debe incluir las sentencias necesarias para realizar la “limpieza” de 
         #los datos nulos y no accesibles del Dataframe.
+        # procesos: pisa a PROCESOS_LIMPIEZA (1 = en serie, 0 = uno por núcleo)
 
         if cls.dataframe is None:
-            print("Error: No hay dataframe para limpiar. Ejecute extraer_datos() primero.")
+            log.error("Error: No hay dataframe para limpiar. Ejecute extraer_datos() primero.")
             return
-        
-        df= cls.dataframe.copy()
+
+        cls.fallos_parseo = {}
+        agregar_filas(len(cls.dataframe))
+        procesos = cls.PROCESOS_LIMPIEZA if procesos is None else procesos
+        procesos = procesos or os.cpu_count() or 1
+        if procesos > 1 and len(cls.dataframe) >= cls.MINIMO_FILAS_PARALELO:
+            cls.dataframe = cls._limpiar_en_paralelo(cls.dataframe, procesos)
+            log.info(f"(D) Limpieza de datos completada ({procesos} procesos).")
+        else:
+            cls.dataframe = cls._limpiar(cls.dataframe)
+            log.info("(D) Limpieza de datos completada.")
+        cls._informar_fallos_parseo()
+
+    @classmethod
+    def _informar_fallos_parseo(cls):
+        """Muestra cuántos valores de cada columna numérica/fecha no se pudieron interpretar."""
+        con_fallos = {columna: cantidad for columna, cantidad in cls.fallos_parseo.items() if cantidad}
+        if con_fallos:
+            detalle = ", ".join(f"{columna}={cantidad}" for columna, cantidad in con_fallos.items())
+            log.warning(f"  Valores que no se pudieron interpretar (quedan vacíos): {detalle}")
+
+    @classmethod
+    def _acumular_fallos(cls, fallos):
+        for columna, cantidad in fallos.items():
+            cls.fallos_parseo[columna] = cls.fallos_parseo.get(columna, 0) + cantidad
+
+    @classmethod
+    def _limpiar(cls, df):
+        """Limpia el DataFrame (ver _limpiar_con_fallos) y suma sus fallos de parseo a cls.fallos_parseo."""
+        limpio, fallos = cls._limpiar_con_fallos(df)
+        cls._acumular_fallos(fallos)
+        return limpio
+
+    @classmethod
+    @medido()
+    def _limpiar_en_paralelo(cls, df, procesos):
+        """
+        Reparte el DataFrame en partes consecutivas entre 'procesos' procesos, limpia cada una
+        con _limpiar_con_fallos y las junta en el orden original. Cada parte ya viene sin sus
+        duplicados; el drop_duplicates final (keep='first', con las partes en orden) deja
+        exactamente las mismas filas que la limpieza en serie.
+        """
+        cantidad_partes = min(len(df), procesos * cls.PARTES_POR_PROCESO)
+        tamanio = -(-len(df) // cantidad_partes)
+        partes = [df.iloc[desde:desde + tamanio] for desde in range(0, len(df), tamanio)]
+
+        with ProcessPoolExecutor(procesos) as ejecutor:
+            resultados = list(ejecutor.map(_limpiar_parte, partes))
+
+        for _, fallos in resultados:
+            cls._acumular_fallos(fallos)
+        limpio = pandas.concat([parte for parte, _ in resultados])
+        return limpio.drop_duplicates(subset=["codigo"], keep='first')
+
+    @classmethod
+    def _limpiar_con_fallos(cls, df):
         """
         limpio y normalizo columnas del csv
         uso esto para
@@ -88,6 +459,8 @@ class GestionarObra(ABC):
           * dejar strings prolijos
           * tipar numeros o fechas sin romper
           * generar una especie de "codigo" único si falta
+        No modifica el DataFrame recibido (el rename/selección de columnas ya arma uno nuevo)
+        ni el estado de la clase: devuelve (DataFrame limpio, {columna: valores que no se pudieron parsear}).
         """
         
         df = df.rename(columns=str.lower)
@@ -146,36 +519,26 @@ class GestionarObra(ABC):
         
         for col in columnas_texto_fk:
             if col in df.columns:
-                es_nulo = df[col].isnull()
-                # .str.title() es clave para unificar "Palermo" y "palermo"
-                df[col] = (
-                    df[col].astype(str).str.strip().str.title().replace("None", None) 
-                    # Estandariza "en ejecución" -> "En Ejecución"
-                    # # Reemplaza el texto "None" si existe
-                )
-                if col == 'barrio':
-                    df[col] = df[col].str.replace("Monserrat", "Montserrat", case=False)
-                df[col] = df[col].str.normalize('NFD').str.encode('ascii', 'ignore').str.decode('utf-8')
-                df[col] = df[col].str.replace("Secretari A", "Secretaria", case=False)
-                df[col] = df[col].str.replace(r'\s+', ' ', regex=True)
-                df[col] = df[col].str.strip()
-                df[col] = df[col].replace("None", None)
-                df.loc[es_nulo, col] = None # Restaurar nulos
-
-
-        # 4. Limpiar y tipar números y fechas
-        for c in ["monto_contrato", "lat", "lng", "porcentaje_avance", "plazo_meses", "mano_obra"]:
+                # Se normaliza cada valor distinto una sola vez ("en ejecución" -> "En Ejecucion",
+                # "Monserrat" -> "Montserrat", etc.) y se expande al resto de las filas
+                df[col] = canonizar_serie(df[col], col)
+
+
+        # 4. Limpiar y tipar números y fechas (formato argentino: "$ 67.065.700,00", "-34,567", "16/3/2015")
+        # Lo que no se puede interpretar queda en NaN/NaT (que luego son None) y se cuenta como fallo
+        fallos = {}
+        for c in ["monto_contrato", "porcentaje_avance", "plazo_meses", "mano_obra"]:
+            if c in df.columns:
+                df[c], fallos[c] = parsear_numero(df[c])
+
+        for c, maximo in [("lat", 90), ("lng", 180)]:
             if c in df.columns:
-                # Quitar símbolos de $ antes de convertir
-                if c == 'monto_contrato':
-                    df[c] = (df[c].astype(str).str.replace(r'[$,]', '', regex=True))  # Quita $ y ,
-                # errors='coerce' convierte errores en NaT/NaN (que luego son None)
-                df[c] = pandas.to_numeric(df[c], errors="coerce")
+                df[c], fallos[c] = parsear_coordenada(df[c], maximo)
 
         for d in ["fecha_inicio", "fecha_fin_inicial"]:
             if d in df.columns:
-                # errors='coerce' convierte fechas inválidas en NaT (Not a Time)
-                df[d] = pandas.to_datetime(df[d], dayfirst=True, errors="coerce").dt.date
+                fechas, fallos[d] = parsear_fecha(df[d])
+                df[d] = fechas.dt.date
 
         df["codigo"] = (
             df["nombre"].fillna("SIN_NOMBRE").str.upper() + "-" +
@@ -184,8 +547,7 @@ class GestionarObra(ABC):
         
         df = df.drop_duplicates(subset=["codigo"], keep='first')
 
-        print("(D) Limpieza de datos completada.")
-        cls.dataframe=df
+        return df, fallos
 
     # Punto E cargar datos! ORM
     """
@@ -195,146 +557,531 @@ class GestionarObra(ABC):
     cada una de las clase del modelo ORM definido.  
     """
     @classmethod
-    def cargar_datos(cls):
+    @medido()
+    def cargar_datos(cls, modo=None, tamanio_lote=None):
 
         """
         (e) Persiste los datos del DataFrame (cls.dataframe) en la BD SQLite.
         
-        1. Carga las "Tablas Catálogo" (Barrio, TipoObra, etc.) usando get_or_create().
-        2. Carga la tabla principal "Obra" usando create() y los FKs.
-        usar Model.create().
+        1. Sincroniza las "Tablas Catálogo" (Barrio, TipoObra, etc.) por conjuntos.
+        2. Carga la tabla principal "Obra":
+           * modo='bulk' (default): INSERT de varias filas por sentencia, en lotes.
+           * modo='create': usa Model.create() fila por fila (como pide el enunciado).
+        tamanio_lote: filas por INSERT en modo bulk (se recorta al límite de variables de SQLite).
         """
 
+        modo = modo or cls.MODO_CARGA
+
         if cls.dataframe is None:
-            print("No hay DataFrame para cargar.")
+            log.error("No hay DataFrame para cargar.")
             return
 
-        print("Iniciando carga de datos.")
+        log.info("Iniciando carga de datos.")
 
         try:
             # nos aAsegurarse de que las tablas existan
             cls.mapear_orm() 
 
             # Cargar Tablas Catálogo (FKs) ---
-            # Usamos "caches" (diccionarios) para no consultar la BD miles de veces, sino solo una vez por valor único.
+            # Una pasada por tabla (no por valor único): devuelve los mapas nombre -> id
+            caches_fk = cls._sincronizar_catalogos(cls.dataframe)
+            # None = tabla vacía; si no, las obras nuevas son las de id mayor a este
+            id_maximo = Obra.select(peewee.fn.MAX(Obra.id)).scalar()
 
-            comunas_df = cls.dataframe[['comuna', 'barrio']].drop_duplicates()
-            comunas_cache = {}
-            barrios_cache = {}
-            
-            with db.atomic(): # Transacción para las comunas/barrios
-                for _, row in comunas_df.iterrows():
-                    comuna_num = str(row['comuna']) if row['comuna'] else "Sin Comuna"
-                    barrio_nom = str(row['barrio']) if row['barrio'] else "Sin Barrio"
-                    
-                    # Get-or-Create para Comuna
-                    if comuna_num not in comunas_cache:
-                        comuna_obj, _ = Comuna.get_or_create(numero=comuna_num)
-                        comunas_cache[comuna_num] = comuna_obj
-                    else:
-                        comuna_obj = comunas_cache[comuna_num]
-                    
-                    # Get-or-Create para Barrio
-                    if barrio_nom not in barrios_cache:
-                        barrio_obj, _ = Barrio.get_or_create(nombre=barrio_nom, comuna=comuna_obj)
-                        barrios_cache[barrio_nom] = barrio_obj
-
-            # Función helper para cargar catálogos simples
-            def cargar_catalogo_cache(columna_df, Modelo):
-                cache_dict = {}
-                items_unicos = cls.dataframe[columna_df].dropna().unique()
-                with db.atomic():
-                    for item in items_unicos:
-                        obj, _ = Modelo.get_or_create(nombre=item)
-                        cache_dict[item] = obj
-                return cache_dict
-
-            # Creamos todas las FKs
-            tipos_obra_cache = cargar_catalogo_cache('tipo_obra', TipoObra)
-            areas_cache = cargar_catalogo_cache('area_responsable', AreaResponsable)
-            empresas_cache = cargar_catalogo_cache('empresa', Empresa)
-            etapas_cache = cargar_catalogo_cache('etapa', Etapa)
-            tipos_contrat_cache = cargar_catalogo_cache('tipo_contratacion', TipoContratacion)
-            fuentes_finan_cache = cargar_catalogo_cache('fuente_financiamiento', FuenteFinanciamiento)
-            
-            # Cargar Tabla Principal "Obra"
-            # Ahora iteramos el DataFrame y usamos create() 
-            
-            # El DF pasa a ser una lista de diccionarios para iterar
-            filas_obras = cls.dataframe.to_dict('records')
-            
-            with db.atomic(): # Transacción masiva para todas las obras
-                for row in filas_obras:
-                    
-                    # Buscamos los OBJETOS FK en nuestros caches
-                    barrio_obj = barrios_cache.get(row['barrio'])
-                    tipo_obra_obj = tipos_obra_cache.get(row['tipo_obra'])
-                    area_obj = areas_cache.get(row['area_responsable'])
-                    empresa_obj = empresas_cache.get(row['empresa'])
-                    etapa_obj = etapas_cache.get(row['etapa'])
-                    tipo_contrat_obj = tipos_contrat_cache.get(row['tipo_contratacion'])
-                    fuente_finan_obj = fuentes_finan_cache.get(row['fuente_financiamiento'])
-                    pa_valor = row.get('porcentaje_avance')
-                    pa_final = 0 if pandas.isna(pa_valor) else pa_valor
-                    f_inicio_valor = row.get('fecha_inicio')
-                    f_inicio_final = None if pandas.isna(f_inicio_valor) else f_inicio_valor
-
-                    f_fin_valor = row.get('fecha_fin_inicial')
-                    f_fin_final = None if pandas.isna(f_fin_valor) else f_fin_valor
-
-                    # Usamos el método Model.create() como es pedido
-                    Obra.create(
-
-                        # Campos directos 
-                        nombre=row.get('nombre'),
-                        descripcion=row.get('descripcion'),
-                        entorno=row.get('entorno'),
-                        monto_contrato=row.get('monto_contrato'),
-                        direccion=row.get('direccion'),
-                        lat=row.get('lat'),
-                        lng=row.get('lng'),
-                        fecha_inicio=f_inicio_final,
-                        fecha_fin_inicial=f_fin_final,
-                        plazo_meses=row.get('plazo_meses'),
-                        porcentaje_avance=pa_final,
-                        mano_obra=row.get('mano_obra'),
-                        nro_contratacion=row.get('nro_contratacion'),
-                        nro_expediente=row.get('nro_expediente'),
-                        cuit_contratista=row.get('cuit_contratista'),
-                        destacada=row.get('destacada'),
-                        
-                        # Campos ForeignKey
-                        barrio=barrio_obj,
-                        tipo_obra=tipo_obra_obj,
-                        area_responsable=area_obj,
-                        empresa=empresa_obj,
-                        etapa=etapa_obj,
-                        tipo_contratacion=tipo_contrat_obj,
-                        fuente_financiamiento=fuente_finan_obj
-                    )
-            
-            print(f"Carga de {len(filas_obras)} obras completada.")
-            print(f"(E) Carga de datos finalizada exitosamente.")
+            with db.atomic():
+                inicio = time.perf_counter()
+                if modo == 'create':
+                    # Obra.create() pasa por save(): el resumen y los índices se actualizan fila por fila
+                    cantidad = cls._cargar_obras_create(cls.dataframe, caches_fk)
+                elif modo == 'bulk':
+                    cantidad = cls._cargar_obras_bulk(cls.dataframe, caches_fk, tamanio_lote)
+                else:
+                    raise ValueError(f"Modo de carga desconocido: '{modo}' (usar 'bulk' o 'create').")
+                duracion = time.perf_counter() - inicio
+                velocidad = cantidad / duracion if duracion > 0 else 0
+
+                # Las cargas por lote no pasan por Obra.save(): con la tabla vacía el resumen y los índices
+                # se arman enteros, si ya había obras solo se agregan las nuevas
+                # (se mide aparte: las filas/seg son solo de la inserción)
+                inicio = time.perf_counter()
+                if modo == 'bulk' and id_maximo is None:
+                    cls.reconstruir_derivadas()
+                elif modo == 'bulk':
+                    nuevas = [id_obra for (id_obra,) in Obra.select(Obra.id).where(Obra.id > id_maximo).tuples()]
+                    ResumenObras.sumar_obras(nuevas, +1)
+                    cls._indexar_obras(nuevas)
+                duracion_derivadas = time.perf_counter() - inicio
+
+            agregar_filas(cantidad)
+            cls._registrar_origen(cls.huella_dataframe)
+            log.info(
+                f"Carga de {cantidad} obras completada ({velocidad:,.0f} filas/seg, modo '{modo}'; "
+                f"resumen e índices en {duracion_derivadas:.2f} s)."
+            )
+            log.info(f"(E) Carga de datos finalizada exitosamente.")
 
         except peewee.IntegrityError as e:
-            print(f"Error de integridad durante la carga de datos: {e}")
+            log.error(f"Error de integridad durante la carga de datos: {e}")
             db.rollback()
             raise e
         except Exception as e:
-            print(f"Error inesperado durante la carga de datos: {e}")
+            log.error(f"Error inesperado durante la carga de datos: {e}")
             db.rollback()
             raise
 
 
+    @classmethod
+    @medido()
+    def sincronizar_datos(cls, marcar_bajas=False, tamanio_lote=None):
+        """
+        Re-importación incremental del DataFrame limpio, usando 'codigo' como clave.
+        * obras nuevas -> se insertan
+        * obras cuya huella (hash_datos) cambió -> se actualizan
+        * obras iguales -> no se tocan
+        * marcar_bajas=True: las obras que ya no están en el CSV quedan con vigente=False
+        Devuelve un dict con los conteos.
+        """
+        if cls.dataframe is None:
+            log.error("No hay DataFrame para sincronizar.")
+            return None
+
+        log.info("Iniciando sincronización incremental de datos.")
+
+        try:
+            cls.mapear_orm()
+            caches_fk = cls._sincronizar_catalogos(cls.dataframe)
+
+            existentes = cls._estado_obras()
+
+            df = cls.dataframe
+            with db.atomic():
+                resultado, ids = cls._aplicar_cambios(df, caches_fk, existentes, tamanio_lote)
+                cls._indexar_obras(ids)
+                resultado['bajas'] = 0
+
+                if marcar_bajas:
+                    codigos_csv = set(df['codigo'])
+                    desaparecidas = [
+                        id_obra for codigo, (id_obra, _) in existentes.items()
+                        if codigo not in codigos_csv
+                    ]
+                    for ids_lote in peewee.chunked(desaparecidas, lote_maximo()):
+                        condicion = Obra.id.in_(ids_lote) & (Obra.vigente == True)
+                        # Las dadas de baja salen del resumen (y de los indicadores)
+                        ResumenObras.mover(condicion, {'vigente': False})
+                        resultado['bajas'] += (
+                            Obra.update(vigente=False, version=Obra.version + 1)
+                            .where(condicion)
+                            .execute()
+                        )
+
+            agregar_filas(len(df))
+            cls._registrar_origen(cls.huella_dataframe)
+            log.info(
+                f"(E) Sincronización completada: {resultado['insertadas']} insertadas, "
+                f"{resultado['actualizadas']} actualizadas, {resultado['sin_cambios']} sin cambios, "
+                f"{resultado['bajas']} dadas de baja."
+            )
+            return resultado
+
+        except Exception as e:
+            log.error(f"Error inesperado durante la sincronización de datos: {e}")
+            db.rollback()
+            raise
+
+    @classmethod
+    @medido()
+    def cargar_csv_por_partes(cls, tamanio_chunk=None, tamanio_lote=None):
+        """
+        Carga en streaming: lee el CSV de a partes (read_csv con chunksize) y cada parte
+        pasa por limpieza -> deduplicado -> carga, con su propio commit.
+        * La memoria queda acotada por el tamaño de la parte, no por el del archivo
+          (solo se recuerdan los 'codigo' ya vistos para deduplicar entre partes).
+        * Si el proceso se corta a mitad de camino, volver a correrlo retoma: las partes
+          ya confirmadas se detectan por codigo + huella y no se vuelven a escribir.
+        No usa cls.dataframe. Devuelve un dict con los conteos.
+        """
+        tamanio_chunk = tamanio_chunk or cls.TAMANIO_CHUNK
+        log.info(f"Iniciando carga del CSV por partes de {tamanio_chunk} filas.")
+        cls.fallos_parseo = {}
+
+        resultado = {'partes': 0, 'insertadas': 0, 'actualizadas': 0, 'sin_cambios': 0, 'duplicadas': 0}
+        codigos_vistos = set()
+        inicio = time.perf_counter()
+
+        try:
+            cls.mapear_orm()
+            lector = pandas.read_csv(cls.CSV_PATH, chunksize=tamanio_chunk, **cls.OPCIONES_CSV)
+
+            for parte in lector:
+                with tramo('parte', filas=len(parte)):
+                    with tramo('_limpiar', filas=len(parte)):
+                        limpio = cls._limpiar(parte)
+                    limpio = cls._deduplicar_parte(limpio, codigos_vistos, resultado)
+                    cls._escribir_parte(limpio, tamanio_lote, resultado)
+
+        except FileNotFoundError:
+            raise cls._csv_no_encontrado()
+        except Exception as e:
+            log.error(f"Error inesperado durante la carga por partes: {e}")
+            raise
+
+        return cls._finalizar_carga(resultado, inicio, "Carga por partes")
+
+    @classmethod
+    @medido()
+    def cargar_csv_en_tuberia(cls, tamanio_chunk=None, tamanio_lote=None, partes_en_cola=None):
+        """
+        Como cargar_csv_por_partes (mismo resultado, un commit por parte), pero con las etapas superpuestas:
+        un hilo lee partes del CSV, otro las limpia y deduplica, y un único hilo escritor las carga,
+        conectados por colas de hasta partes_en_cola partes. Si una etapa se atrasa las anteriores
+        esperan (la memoria queda acotada) y el tiempo total tiende al de la etapa más lenta, no a la suma.
+        El tiempo que cada etapa pasó esperando queda en los tramos '.../espera' (ver instrumentar()).
+        """
+        tamanio_chunk = tamanio_chunk or cls.TAMANIO_CHUNK
+        partes_en_cola = partes_en_cola or cls.PARTES_EN_COLA
+        if not Path(cls.CSV_PATH).exists():
+            raise cls._csv_no_encontrado()
+        log.info(f"Iniciando carga del CSV en tubería, por partes de {tamanio_chunk} filas.")
+        cls.fallos_parseo = {}
+        cls.mapear_orm()
+
+        resultado = {'partes': 0, 'insertadas': 0, 'actualizadas': 0, 'sin_cambios': 0, 'duplicadas': 0}
+        crudas = queue.Queue(partes_en_cola)
+        limpias = queue.Queue(partes_en_cola)
+        fin = object()
+        cancelar = threading.Event()  # lo prende la etapa que falla, para que las otras no queden esperando
+        errores = []
+        inicio = time.perf_counter()
+
+        def poner(cola, item):
+            with tramo('espera'):
+                while not cancelar.is_set():
+                    try:
+                        cola.put(item, timeout=0.1)
+                        return True
+                    except queue.Full:
+                        pass
+            return False
+
+        def sacar(cola):
+            with tramo('espera'):
+                while not cancelar.is_set():
+                    try:
+                        return cola.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+            return fin
+
+        def leer():
+            for parte in pandas.read_csv(cls.CSV_PATH, chunksize=tamanio_chunk, **cls.OPCIONES_CSV):
+                agregar_filas(len(parte))
+                if not poner(crudas, parte):
+                    return
+            poner(crudas, fin)
+
+        def limpiar():
+            codigos_vistos = set()
+            while (parte := sacar(crudas)) is not fin:
+                agregar_filas(len(parte))
+                limpio = cls._deduplicar_parte(cls._limpiar(parte), codigos_vistos, resultado)
+                if not poner(limpias, limpio):
+                    return
+            poner(limpias, fin)
+
+        def escribir():
+            try:
+                while (limpio := sacar(limpias)) is not fin:
+                    agregar_filas(len(limpio))
+                    cls._escribir_parte(limpio, tamanio_lote, resultado)
+            finally:
+                db.close()  # la conexión de este hilo
+
+        def etapa(nombre, funcion):
+            def correr():
+                try:
+                    with tramo(nombre):
+                        funcion()
+                except BaseException as e:
+                    errores.append(e)
+                    cancelar.set()
+            return threading.Thread(target=correr, name=f"tuberia-{nombre}", daemon=True)
+
+        hilos = [etapa('lectura', leer), etapa('limpieza', limpiar), etapa('escritura', escribir)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        if errores:
+            log.error(f"Error inesperado durante la carga en tubería: {errores[0]}")
+            raise errores[0]
+
+        return cls._finalizar_carga(resultado, inicio, "Carga en tubería")
+
+    # Pasos compartidos por cargar_csv_por_partes y cargar_csv_en_tuberia
+    @classmethod
+    def _deduplicar_parte(cls, limpio, codigos_vistos, resultado):
+        """Deduplicado entre partes: gana la primera aparición del codigo (igual que limpiar_datos)."""
+        repetida = limpio['codigo'].isin(codigos_vistos)
+        resultado['duplicadas'] += int(repetida.sum())
+        limpio = limpio[~repetida]
+        codigos_vistos.update(limpio['codigo'])
+        return limpio
+
+    @classmethod
+    def _escribir_parte(cls, limpio, tamanio_lote, resultado):
+        """Catálogos + obras de una parte ya limpia, en un commit; suma los conteos a resultado."""
+        with db.atomic():  # Un commit por parte
+            caches_fk = cls._sincronizar_catalogos(limpio)
+            existentes = cls._estado_obras(limpio['codigo'])
+            conteo, ids = cls._aplicar_cambios(limpio, caches_fk, existentes, tamanio_lote)
+            cls._indexar_obras(ids)
+        resultado['partes'] += 1
+        for clave, valor in conteo.items():
+            resultado[clave] += valor
+        log.info(f"  Parte {resultado['partes']}: {len(limpio)} obras procesadas.")
+
+    @classmethod
+    def _finalizar_carga(cls, resultado, inicio, descripcion):
+        """
+        Cierre de una carga por partes: origen y resumen por log. Devuelve resultado.
+        (Las tablas derivadas ya se actualizaron en el commit de cada parte: si el proceso
+        se corta entre partes, lo confirmado queda consistente.)
+        """
+        duracion = time.perf_counter() - inicio
+        filas = resultado['insertadas'] + resultado['actualizadas'] + resultado['sin_cambios']
+        velocidad = filas / duracion if duracion > 0 else 0
+        agregar_filas(filas)
+        cls._registrar_origen(None)  # no pasa por preparar_datos: la próxima vez se vuelve a sincronizar
+        log.info(
+            f"(E) {descripcion} completada: {resultado['partes']} partes, {resultado['insertadas']} insertadas, "
+            f"{resultado['actualizadas']} actualizadas, {resultado['sin_cambios']} sin cambios "
+            f"({velocidad:,.0f} filas/seg)."
+        )
+        cls._informar_fallos_parseo()
+        return resultado
+
+    @classmethod
+    @medido()
+    def _estado_obras(cls, codigos=None):
+        """
+        Estado actual de la BD: codigo -> (id, hash). Si se pasan codigos, solo trae esos.
+        Las dadas de baja no tienen huella válida, así que si reaparecen en el CSV
+        se reescriben (y vuelven a estar vigentes).
+        """
+        query = Obra.select(Obra.codigo, Obra.id, Obra.hash_datos, Obra.vigente)
+        if codigos is None:
+            consultas = [query.where(Obra.codigo.is_null(False))]
+        else:
+            codigos = list(codigos)
+            consultas = [
+                query.where(Obra.codigo.in_(lote))
+                for lote in peewee.chunked(codigos, lote_maximo())
+            ]
+
+        existentes = {}
+        for consulta in consultas:
+            for codigo, id_obra, huella, vigente in consulta.tuples():
+                existentes[codigo] = (id_obra, huella if vigente else None)
+        return existentes
+
+    @classmethod
+    @medido()
+    def _aplicar_cambios(cls, df, caches_fk, existentes, tamanio_lote=None):
+        """
+        Inserta las obras nuevas y reescribe las que cambiaron; las iguales no se tocan.
+        El resumen de indicadores se actualiza acá (hay que restar las reescritas antes de pisarlas).
+        Devuelve (conteos, ids de las obras escritas): quien llama reindexa esos ids
+        en la misma transacción (_indexar_obras).
+        """
+        huellas = cls._hash_filas(df)
+        huellas_bd = df['codigo'].map(lambda codigo: existentes.get(codigo, (None, None))[1])
+        es_nueva = ~df['codigo'].isin(existentes.keys())
+        cambio = ~es_nueva & (huellas != huellas_bd)
+
+        ids = []
+        a_escribir = df[es_nueva | cambio]
+        if len(a_escribir):
+            reescritas = [existentes[codigo][0] for codigo in df['codigo'][cambio]]
+            ResumenObras.sumar_obras(reescritas, -1)
+            cls._cargar_obras_bulk(a_escribir, caches_fk, tamanio_lote, actualizar=True)
+            ids = reescritas + cls._ids_por_codigo(df['codigo'][es_nueva])
+            ResumenObras.sumar_obras(ids, +1)
+
+        conteo = {
+            'insertadas': int(es_nueva.sum()),
+            'actualizadas': int(cambio.sum()),
+            'sin_cambios': int((~es_nueva & ~cambio).sum()),
+        }
+        return conteo, ids
+
+    @classmethod
+    def _ids_por_codigo(cls, codigos):
+        """ids de las obras con esos codigo (en tandas, por el máximo de variables de SQLite)."""
+        codigos = list(codigos)
+        ids = []
+        for lote in peewee.chunked(codigos, lote_maximo()):
+            ids += [id_obra for (id_obra,) in Obra.select(Obra.id).where(Obra.codigo.in_(lote)).tuples()]
+        return ids
+
+    @classmethod
+    @medido()
+    def _sincronizar_catalogos(cls, df):
+        """
+        Carga todas las tablas catálogo que aparecen en el DataFrame.
+        Devuelve {columna_fk: {nombre: id}} listo para resolver las FK de Obra.
+        """
+        caches_fk = {}
+
+        with db.atomic():
+            # Comunas y barrios: cada barrio queda asociado a la comuna de su primera aparición
+            pares = df[['comuna', 'barrio']].drop_duplicates()
+            comunas = pares['comuna'].where(pares['comuna'].notna() & (pares['comuna'] != ''), "Sin Comuna").astype(str)
+            barrios = pares['barrio'].where(pares['barrio'].notna() & (pares['barrio'] != ''), "Sin Barrio").astype(str)
+
+            comunas_ids = cls._sincronizar_catalogo(Comuna, comunas, campo='numero')
+            comuna_de_barrio = {}
+            for barrio_nom, comuna_num in zip(barrios, comunas):
+                comuna_de_barrio.setdefault(barrio_nom, {'comuna': comunas_ids[comuna_num]})
+            caches_fk['barrio'] = cls._sincronizar_catalogo(Barrio, barrios, extras=comuna_de_barrio)
+
+            modelos_catalogo = {
+                'tipo_obra': TipoObra,
+                'area_responsable': AreaResponsable,
+                'empresa': Empresa,
+                'etapa': Etapa,
+                'tipo_contratacion': TipoContratacion,
+                'fuente_financiamiento': FuenteFinanciamiento,
+            }
+            for columna, Modelo in modelos_catalogo.items():
+                valores = df[columna].dropna() if columna in df.columns else []
+                caches_fk[columna] = cls._sincronizar_catalogo(Modelo, valores)
+
+        return caches_fk
+
+    @classmethod
+    def _sincronizar_catalogo(cls, Modelo, valores, campo='nombre', extras=None):
+        """
+        Sincroniza un catálogo con una cantidad fija de consultas (no una por valor):
+        1. trae los nombres que ya existen,
+        2. inserta los que faltan en lote (INSERT OR IGNORE, no pisa lo existente),
+        3. relee el mapa nombre -> id.
+        extras: dict opcional nombre -> {campo: valor} con columnas adicionales (ej: la comuna del barrio).
+        """
+        with tramo(Modelo.__name__) as medicion:
+            columna = getattr(Modelo, campo)
+            existentes = {nombre for (nombre,) in Modelo.select(columna).tuples()}
+
+            faltantes = [v for v in dict.fromkeys(valores) if v not in existentes]
+            medicion.filas = len(faltantes)
+            if faltantes:
+                extras = extras or {}
+                filas = [{campo: v, **extras.get(v, {})} for v in faltantes]
+                lote = cls._tamanio_lote(len(filas[0]), len(filas))
+                for filas_lote in peewee.chunked(filas, lote):
+                    Modelo.insert_many(filas_lote).on_conflict_ignore().execute()
+                # insert_many no pasa por save(): el cache de catálogos no se entera solo
+                catalogos.invalidar(Modelo)
+
+            return {nombre: id_ for nombre, id_ in Modelo.select(columna, Modelo.id).tuples()}
+
+    @classmethod
+    def _filas_obra(cls, df, caches_fk):
+        """
+        Arma las columnas de Obra listas para la BD: FK resueltas a ids (vectorizado),
+        huella de cada fila y NaN/NaT de pandas convertidos a None.
+        """
+        columnas = {}
+
+        for campo in cls.CAMPOS_OBRA:
+            serie = df[campo] if campo in df.columns else pandas.Series(None, index=df.index, dtype=object)
+            if campo == 'porcentaje_avance':
+                serie = serie.fillna(0)
+            columnas[campo] = serie
+
+        # Las FK se pasan como ids (no como objetos) para no instanciar modelos
+        for campo in cls.CAMPOS_FK_OBRA:
+            columnas[campo] = df[campo].map(caches_fk[campo]) if campo in df.columns else None
+
+        columnas['hash_datos'] = cls._hash_filas(df)
+
+        datos = pandas.DataFrame(columnas, index=df.index).astype(object)
+        return datos.where(pandas.notnull(datos), None)
+
+    @classmethod
+    def _hash_filas(cls, df):
+        """Huella (hex de 64 bits) de cada fila limpia, sobre las columnas que se guardan en Obra."""
+        columnas = [c for c in cls.CAMPOS_OBRA + cls.CAMPOS_FK_OBRA if c in df.columns]
+        huellas = pandas.util.hash_pandas_object(df[columnas].astype(str), index=False)
+        return huellas.map('{:016x}'.format)
+
+    @classmethod
+    @medido()
+    def _cargar_obras_create(cls, df, caches_fk):
+        """Carga clásica: un Obra.create() por fila. Se mantiene por compatibilidad."""
+        # El DF pasa a ser una lista de diccionarios para iterar
+        filas_obras = cls._filas_obra(df, caches_fk).to_dict('records')
+
+        with db.atomic(): # Transacción masiva para todas las obras
+            for row in filas_obras:
+                # Usamos el método Model.create() como es pedido
+                Obra.create(**row)
+
+        agregar_filas(len(filas_obras))
+        return len(filas_obras)
+
+    @classmethod
+    @medido()
+    def _cargar_obras_bulk(cls, df, caches_fk, tamanio_lote=None, actualizar=False):
+        """
+        Carga por lotes: INSERT de varias filas por sentencia.
+        actualizar=True hace upsert sobre 'codigo' (las obras que ya existen se pisan con la fila nueva).
+        """
+        with tramo('_filas_obra', filas=len(df)):
+            datos = cls._filas_obra(df, caches_fk)
+            filas = list(datos.itertuples(index=False, name=None))
+
+        campos = [getattr(Obra, nombre) for nombre in datos.columns]
+        lote = cls._tamanio_lote(len(campos), tamanio_lote)
+
+        with db.atomic():
+            for filas_lote in peewee.chunked(filas, lote):
+                with tramo('lote', filas=len(filas_lote)):
+                    query = Obra.insert_many(filas_lote, fields=campos)
+                    if actualizar:
+                        # Si reaparece una obra dada de baja, vuelve a estar vigente; cada reescritura es una versión nueva
+                        query = query.on_conflict(
+                            conflict_target=[Obra.codigo],
+                            preserve=[c for c in campos if c is not Obra.codigo],
+                            update={Obra.vigente: True, Obra.version: Obra.version + 1},
+                        )
+                    query.execute()
+
+        agregar_filas(len(filas))
+        return len(filas)
+
+    @classmethod
+    def _tamanio_lote(cls, cantidad_columnas, tamanio_lote=None):
+        """Filas por INSERT sin pasarse del máximo de variables (?) que acepta SQLite (a lo sumo TAMANIO_LOTE)."""
+        return lote_maximo(cantidad_columnas, tamanio_lote or cls.TAMANIO_LOTE)
+
+
 #Helper para buscar y validar un Foreign Key por teclado.
     @classmethod
     def _buscar_fk(cls, Modelo, campo_busqueda='nombre'):
         """
         Helper robusto para buscar Foreign Keys.
-        1. Intenta búsqueda EXACTA (case-insensitive).
-        2. Si falla, intenta búsqueda PARCIAL (ilike).
-        3. Maneja ambigüedad.
+        1. Si lo ingresado coincide EXACTO (sin importar mayúsculas ni acentos), listo.
+        2. Si es prefijo de un solo nombre (o de sus palabras: "parq pat"), también.
+        3. Si hay varios candidatos, o solo parecidos (errores de tipeo), se listan para elegir.
+        Los candidatos salen del buscador en memoria del catálogo (ver BuscadorNombres):
+        no hay consultas a la BD por cada intento.
         """
+        if issubclass(Modelo, CatalogoModel) and campo_busqueda == Modelo.CAMPO_NOMBRE:
+            buscador = catalogos.buscador(Modelo)
+        else:
+            buscador = BuscadorNombres(Modelo.select(), nombre=lambda item: getattr(item, campo_busqueda))
+
         while True:
             valor_ingresado = input(f"  Ingrese {Modelo.__name__} (buscar por {campo_busqueda}): ")
             if not valor_ingresado:
@@ -342,44 +1089,41 @@ class GestionarObra(ABC):
                 continue
             
             try:
-                # --- NIVEL 1: BÚSQUEDA EXACTA ---
-                # Priorizamos si el usuario escribió el nombre completo
-                try:
-                    # .ilike(valor) SIN comodines % busca igualdad ignorando mayúsculas
-                    coincidencia_exacta = Modelo.get(getattr(Modelo, campo_busqueda).ilike(valor_ingresado))
-                    print(f"  Encontrado: {getattr(coincidencia_exacta, campo_busqueda)}")
-                    return coincidencia_exacta
-                except peewee.DoesNotExist:
-              
-                    pass
-                
-                # --- NIVEL 2: BÚSQUEDA PARCIAL (CONTAINS) ---
-                condicion = getattr(Modelo, campo_busqueda).ilike(f'%{valor_ingresado}%')
-                query = Modelo.select().where(condicion)
-                cantidad = query.count()
-
-                if cantidad == 1:
+                candidatos = buscador.buscar(valor_ingresado, k=5)
 
-                    instancia = query.get()
-                    print(f"  Encontrado (parcial): {getattr(instancia, campo_busqueda)}")
-                    return instancia
-
-                elif cantidad > 1:
+                # --- NIVEL 1: COINCIDENCIA EXACTA ---
+                if candidatos and candidatos[0].tipo == EXACTA:
+                    print(f"  Encontrado: {candidatos[0].nombre}")
+                    return candidatos[0].item
+                
+                # --- NIVEL 2: PREFIJO ÚNICO ---
+                seguros = [candidato for candidato in candidatos if candidato.tipo != APROXIMADA]
+                if len(seguros) == 1:
+                    print(f"  Encontrado (parcial): {seguros[0].nombre}")
+                    return seguros[0].item
 
-                    print(f" La búsqueda '{valor_ingresado}' es ambigua ({cantidad} coincidencias).")
-                    print("  Por favor sea más específico. Ejemplos encontrados:")
-                    for item in query.limit(5):
-                        print(f"   * {getattr(item, campo_busqueda)}")
+                # --- NIVEL 3: ELEGIR ENTRE CANDIDATOS ---
+                if candidatos:
+                    if seguros:
+                        print(f" La búsqueda '{valor_ingresado}' es ambigua. Coincidencias:")
+                    else:
+                        print(f"  No se encontró '{valor_ingresado}'. ¿Quiso decir...?")
+                    for numero, candidato in enumerate(candidatos, 1):
+                        print(f"   {numero}. {candidato.nombre}")
+                    eleccion = input("  Número de la opción (Enter para buscar de nuevo): ").strip()
+                    if eleccion.isdigit() and 1 <= int(eleccion) <= len(candidatos):
+                        elegido = candidatos[int(eleccion) - 1]
+                        print(f"  Seleccionado: {elegido.nombre}")
+                        return elegido.item
                     # Vuelve al inicio del while para pedir input de nuevo
                     continue
 
-                else:
-                    # Ninguno coincide
-                    print(f"  No se encontró nada similar a '{valor_ingresado}'.")
-                    if input(" ¿Desea ver una lista de opciones? (s/n): ").lower() == 's':
-                        print(f"    --- Lista de {Modelo.__name__} ---")
-                        for item in Modelo.select().limit(10): 
-                            print(f"    - {getattr(item, campo_busqueda)}")
+                # Ninguno coincide
+                print(f"  No se encontró nada similar a '{valor_ingresado}'.")
+                if input(" ¿Desea ver una lista de opciones? (s/n): ").lower() == 's':
+                    print(f"    --- Lista de {Modelo.__name__} ---")
+                    for item in Modelo.select().limit(10): 
+                        print(f"    - {getattr(item, campo_busqueda)}")
 
             except Exception as e:
                 print(f" Error inesperado en la búsqueda: {e}")
@@ -429,78 +1173,302 @@ class GestionarObra(ABC):
             print(f"Error: {e}")
             return None
 
+    # Búsqueda de obras por texto (índice FTS5, ver BusquedaObras)
+    @classmethod
+    def buscar_obras(cls, texto, pagina=1, por_pagina=20, solo_vigentes=True):
+        """
+        Busca obras por nombre, descripción, dirección, entorno, barrio o empresa, sin importar acentos.
+        Devuelve (obras de esa página ordenadas por relevancia, total de resultados).
+        """
+        return (
+            BusquedaObras.buscar(texto, pagina, por_pagina, solo_vigentes),
+            BusquedaObras.contar(texto, solo_vigentes),
+        )
 
-#G Obtiene y muestra indicadores de la base de datos.
+    # Consultas por ubicación (índice R*Tree, ver UbicacionObras)
     @classmethod
-    def obtener_indicadores(cls):
-        try:
-            #a. Listado de todas las áreas responsables 
-            print("\nÁreas Responsables:")
-            for area in AreaResponsable.select():
-                print(f"  - {area.nombre}")
-
-            # b.Listado de todos los tipos de obra 
-            print("\nTipos de Obra:")
-            for tipo in TipoObra.select():
-                print(f"  - {tipo.nombre}")
-
-            # c. Cantidad de obras que se encuentran en cada etapa
-            print("\nObras por Etapa:")
-            query_c = (
-                Etapa.select(Etapa.nombre, peewee.fn.COUNT(Obra.id).alias('cantidad'))
-                .join(Obra, peewee.JOIN.LEFT_OUTER)
-                .group_by(Etapa.nombre)
-                .order_by(peewee.fn.COUNT(Obra.id).desc())
-            )
-            for etapa in query_c:
-                print(f"  - {etapa.nombre}: {etapa.cantidad} obras")
-
-            # d. Cantidad de obras y monto total de inversión por tipo de obra 
-            print("\nInversión por Tipo de Obra:")
-            query_d = (
-                TipoObra.select(
-                    TipoObra.nombre,
-                    peewee.fn.COUNT(Obra.id).alias('cantidad'),
-                    peewee.fn.SUM(Obra.monto_contrato).alias('total')
-                )
-                .join(Obra, peewee.JOIN.LEFT_OUTER)
-                .group_by(TipoObra.nombre)
-                .order_by(peewee.fn.SUM(Obra.monto_contrato).desc())
+    def obras_cerca(cls, lat, lng, metros=500):
+        """Obras a menos de 'metros' del punto: lista de (obra, distancia), de la más cercana a la más lejana."""
+        return UbicacionObras.cerca(lat, lng, metros)
+
+    @classmethod
+    def obras_mas_cercanas(cls, lat, lng, cantidad=5):
+        """Las 'cantidad' obras más cercanas al punto: lista de (obra, distancia)."""
+        return UbicacionObras.mas_cercanas(lat, lng, cantidad)
+
+    @classmethod
+    def obras_por_zona(cls, lat, lng, metros=1000, por='barrio'):
+        """Obras a menos de 'metros' del punto, agrupadas por 'barrio' o 'comuna': nombre -> (cantidad, monto_total)."""
+        return UbicacionObras.resumen_por_zona(lat, lng, metros, por)
+
+    # Exportación columnar (Parquet / Feather) para análisis fuera de la app
+    @classmethod
+    @medido()
+    def exportar_columnar(cls, ruta=None, formato=None, tamanio_chunk=None):
+        """
+        Escribe todas las obras con los catálogos resueltos (etapa, barrio, comuna, empresa...)
+        en un archivo columnar, de a partes de tamanio_chunk obras. Devuelve la ruta.
+        """
+        ruta = Path(ruta or cls.EXPORTACION_PATH)
+        inicio = time.perf_counter()
+        cantidad = exportacion.exportar(ruta, formato, tamanio_chunk or cls.TAMANIO_CHUNK)
+        duracion = time.perf_counter() - inicio
+        agregar_filas(cantidad)
+        log.info(f"Exportadas {cantidad} obras a '{ruta}' en {duracion:.2f} s.")
+        return ruta
+
+    @classmethod
+    def leer_columnar(cls, ruta=None, columnas=None):
+        """DataFrame con una exportación hecha por exportar_columnar (opcionalmente, solo algunas columnas)."""
+        return exportacion.leer(ruta or cls.EXPORTACION_PATH, columnas)
+
+    # Lectura liviana para reportes (ver lectura.py)
+    @classmethod
+    def registros_obras(cls, campos=lectura.CAMPOS_REPORTE, condicion=None, orden=None):
+        """
+        Recorre las obras de a una como tuplas con nombre (solo 'campos', FK como nombres),
+        sin cargar la tabla entera en memoria. Ej:
+            for obra in GestionarObra.registros_obras(('nombre', 'comuna', 'monto_contrato')): ...
+        """
+        return lectura.registros(campos, condicion, orden)
+
+    # Instrumentación (ver instrumentacion.py)
+    @classmethod
+    def instrumentar(cls, umbral_lento=None):
+        """
+        Metricas para medir una corrida: tiempo de cada etapa y lote, consultas y tiempo de SQL
+        por etapa y por función, y las consultas lentas con su plan. Ej:
+            with GestionarObra.instrumentar() as metricas:
+                GestionarObra.cargar_datos()
+            metricas.guardar('metricas.json')
+        """
+        return Metricas(umbral_lento if umbral_lento is not None else cls.UMBRAL_CONSULTA_LENTA)
+
+    # Análisis en memoria (ver analitica.py)
+    @classmethod
+    def analisis(cls):
+        """
+        AnaliticaObras al día: la primera vez carga la foto de obras, después solo trae lo que cambió.
+        Ej: GestionarObra.analisis().agrupar(['comuna', 'anio'])
+        """
+        if cls.analitica is None:
+            cls.analitica = AnaliticaObras(db)
+        cls.analitica.actualizar()
+        return cls.analitica
+
+
+#G Indicadores: cada uno devuelve datos (no imprime) y pasa por el cache de indicadores.
+    # Los conteos y montos salen de la tabla de resumen (una fila por grupo),
+    # no de agrupar toda la tabla obras en cada llamada.
+    @classmethod
+    def _indicador(cls, nombre, calcular, *parametros):
+        """Devuelve el indicador desde el cache o lo calcula (clave: nombre + parámetros)."""
+        return cls.cache_indicadores.obtener(
+            (nombre, parametros), lambda: calcular(*parametros), ttl=cls.TTL_INDICADORES
+        )
+
+    @classmethod
+    def invalidar_indicadores(cls, indicador=None):
+        """Descarta los indicadores cacheados (todos, o solo los de un indicador)."""
+        cls.cache_indicadores.invalidar(indicador)
+
+    # Consultas de los indicadores: las usan los indicador_* y las revisa verificar_plan_consultas()
+    @classmethod
+    def _consulta_areas_responsables(cls):
+        return AreaResponsable.select(AreaResponsable.nombre)
+
+    @classmethod
+    def _consulta_tipos_obra(cls):
+        return TipoObra.select(TipoObra.nombre)
+
+    @classmethod
+    def _consulta_catalogo_con_resumen(cls, Modelo, dimension):
+        """(nombre, cantidad, monto_total) de cada fila del catálogo, con lo que tiene en el resumen (0 si nada)."""
+        en_resumen = (ResumenObras.dimension == dimension) & (ResumenObras.clave == Modelo.id.cast('TEXT'))
+        return (
+            Modelo.select(
+                Modelo.nombre,
+                peewee.fn.COALESCE(ResumenObras.cantidad, 0),
+                peewee.fn.COALESCE(ResumenObras.monto_total, 0),
             )
-            for tipo in query_d:
-                monto = tipo.total if tipo.total else 0
-                print(f"  - {tipo.nombre}: {tipo.cantidad} obras - Total: ${monto:,.2f}")
-
-            # e. Listado de todos los barrios pertenecientes a las comunas 1, 2 y 3
-            print("\nBarrios en Comunas 1, 2 y 3:")
-            query_e = (
-                Barrio.select(Barrio.nombre, Comuna.numero)
-                .join(Comuna)
-                .where(Comuna.numero.in_(['1', '2', '3']))
-                .order_by(Comuna.numero, Barrio.nombre)
+            .join(ResumenObras, peewee.JOIN.LEFT_OUTER, on=en_resumen)
+        )
+
+    @classmethod
+    def _consulta_obras_por_etapa(cls):
+        return cls._consulta_catalogo_con_resumen(Etapa, 'etapa')
+
+    @classmethod
+    def _consulta_inversion_por_tipo(cls):
+        return cls._consulta_catalogo_con_resumen(TipoObra, 'tipo_obra')
+
+    @classmethod
+    def _consulta_barrios_por_comuna(cls, comunas):
+        return (
+            Barrio.select(Comuna.numero, Barrio.nombre)
+            .join(Comuna)
+            .where(Comuna.numero.in_(comunas))
+            .order_by(Comuna.numero, Barrio.nombre)
+        )
+
+    @classmethod
+    def _consulta_finalizadas_en_plazo(cls, etapa_id, plazo_meses):
+        """Obras de la etapa con plazo <= plazo_meses, sumando los grupos 'id_etapa:plazo' del resumen."""
+        prefijo = f"{etapa_id}:"
+        plazo = peewee.fn.SUBSTR(ResumenObras.clave, len(prefijo) + 1)
+        return (
+            ResumenObras.select(peewee.fn.COALESCE(peewee.fn.SUM(ResumenObras.cantidad), 0))
+            .where(
+                (ResumenObras.dimension == 'etapa_plazo')
+                # ';' es el carácter que sigue a ':': el rango son las claves que empiezan con el prefijo
+                & (ResumenObras.clave >= prefijo) & (ResumenObras.clave < f"{etapa_id};")
+                & (plazo != '') & (plazo.cast('INTEGER') <= plazo_meses)
             )
-            for barrio in query_e:
-                print(f"  - Comuna {barrio.comuna.numero}: {barrio.nombre}")
-
-            # f. Cantidad de obras finalizadas en un plazo menor o igual a 24 meses 
-            print("\nObras finalizadas en 24 meses o menos:")
-            etapa_finalizada = Etapa.get_or_none(Etapa.nombre == "Finalizada")
-            if etapa_finalizada:
-                query_f = Obra.select().where(
-                    (Obra.etapa == etapa_finalizada) &
-                    (Obra.plazo_meses <= 24)
-                )
-                print(f"  - {query_f.count()} obras.")
-            else:
-                print("  - No se encontró la etapa 'Finalizada'.")
+        )
+
+    @classmethod
+    def _consulta_inversion_total(cls):
+        return ResumenObras.select(ResumenObras.monto_total).where(
+            (ResumenObras.dimension == 'total') & (ResumenObras.clave == '')
+        )
+
+    @classmethod
+    def indicador_areas_responsables(cls):
+        """a. Nombres de todas las áreas responsables."""
+        def calcular():
+            return tuple(nombre for (nombre,) in cls._consulta_areas_responsables().tuples())
+        return cls._indicador('areas_responsables', calcular)
 
-            # g. Monto total de inversión
-            print("\n[17.g] Monto Total de Inversión (Todas las obras):")
-            query_g = Obra.select(peewee.fn.SUM(Obra.monto_contrato).alias('total_general'))
-            total_g = query_g.scalar() or 0
-            print(f"  - ${total_g:,.2f}")
+    @classmethod
+    def indicador_tipos_obra(cls):
+        """b. Nombres de todos los tipos de obra."""
+        def calcular():
+            return tuple(nombre for (nombre,) in cls._consulta_tipos_obra().tuples())
+        return cls._indicador('tipos_obra', calcular)
 
+    @classmethod
+    def indicador_obras_por_etapa(cls):
+        """c. Cantidad de obras en cada etapa, de mayor a menor."""
+        def calcular():
+            filas = [ObrasPorEtapa(nombre, cantidad) for nombre, cantidad, _ in cls._consulta_obras_por_etapa().tuples()]
+            return tuple(sorted(filas, key=lambda fila: (-fila.cantidad, fila.etapa)))
+        return cls._indicador('obras_por_etapa', calcular)
+
+    @classmethod
+    def indicador_inversion_por_tipo(cls):
+        """d. Cantidad de obras y monto total por tipo de obra, de mayor a menor monto."""
+        def calcular():
+            filas = [InversionPorTipo(*fila) for fila in cls._consulta_inversion_por_tipo().tuples()]
+            return tuple(sorted(filas, key=lambda fila: (-fila.monto_total, fila.tipo_obra)))
+        return cls._indicador('inversion_por_tipo', calcular)
+
+    @classmethod
+    def indicador_barrios_por_comuna(cls, comunas=COMUNAS_INDICADOR):
+        """e. Barrios de las comunas pedidas (por número, como texto), ordenados por comuna y barrio."""
+        def calcular(comunas):
+            query = cls._consulta_barrios_por_comuna(comunas).tuples()
+            return tuple(BarrioDeComuna(numero, nombre) for numero, nombre in query)
+        return cls._indicador('barrios_por_comuna', calcular, tuple(str(c) for c in comunas))
+
+    @classmethod
+    def indicador_finalizadas_en_plazo(cls, plazo_meses=PLAZO_INDICADOR):
+        """f. Cantidad de obras finalizadas con plazo <= plazo_meses (None si no existe la etapa 'Finalizada')."""
+        def calcular(plazo_meses):
+            etapa_finalizada = catalogos.buscar(Etapa, "Finalizada")
+            if etapa_finalizada is None:
+                return None
+            return cls._consulta_finalizadas_en_plazo(etapa_finalizada.id, plazo_meses).scalar()
+        return cls._indicador('finalizadas_en_plazo', calcular, plazo_meses)
+
+    @classmethod
+    def indicador_inversion_total(cls):
+        """g. Monto total de inversión de todas las obras."""
+        def calcular():
+            return cls._consulta_inversion_total().scalar() or 0
+        return cls._indicador('inversion_total', calcular)
+
+    @classmethod
+    @medido()
+    def calcular_indicadores(cls, comunas=COMUNAS_INDICADOR, plazo_meses=PLAZO_INDICADOR):
+        """Todos los indicadores del punto 17 en un objeto Indicadores."""
+        return Indicadores(
+            areas_responsables=cls.indicador_areas_responsables(),
+            tipos_obra=cls.indicador_tipos_obra(),
+            obras_por_etapa=cls.indicador_obras_por_etapa(),
+            inversion_por_tipo=cls.indicador_inversion_por_tipo(),
+            barrios_por_comuna=cls.indicador_barrios_por_comuna(comunas),
+            finalizadas_en_plazo=cls.indicador_finalizadas_en_plazo(plazo_meses),
+            inversion_total=cls.indicador_inversion_total(),
+            comunas=tuple(str(c) for c in comunas),
+            plazo_meses=plazo_meses,
+        )
+
+    # Obtiene y muestra indicadores de la base de datos.
+    @classmethod
+    def obtener_indicadores(cls, comunas=COMUNAS_INDICADOR, plazo_meses=PLAZO_INDICADOR):
+        try:
+            indicadores = cls.calcular_indicadores(comunas, plazo_meses)
         except peewee.OperationalError as e:
-            print(f"Error al ejecutar las consultas de indicadores: {e}")
+            log.error(f"Error al ejecutar las consultas de indicadores: {e}")
+            return None
         except Exception as e:
-            print(f"Error inesperado al obtener indicadores: {e}")
+            log.error(f"Error inesperado al obtener indicadores: {e}")
+            return None
+
+        cls.mostrar_indicadores(indicadores)
+        return indicadores
+
+    @staticmethod
+    def mostrar_indicadores(indicadores):
+        """Imprime un objeto Indicadores por consola."""
+        #a. Listado de todas las áreas responsables 
+        print("\nÁreas Responsables:")
+        for area in indicadores.areas_responsables:
+            print(f"  - {area}")
+
+        # b.Listado de todos los tipos de obra 
+        print("\nTipos de Obra:")
+        for tipo in indicadores.tipos_obra:
+            print(f"  - {tipo}")
+
+        # c. Cantidad de obras que se encuentran en cada etapa
+        print("\nObras por Etapa:")
+        for fila in indicadores.obras_por_etapa:
+            print(f"  - {fila.etapa}: {fila.cantidad} obras")
+
+        # d. Cantidad de obras y monto total de inversión por tipo de obra 
+        print("\nInversión por Tipo de Obra:")
+        for fila in indicadores.inversion_por_tipo:
+            print(f"  - {fila.tipo_obra}: {fila.cantidad} obras - Total: ${fila.monto_total:,.2f}")
+
+        # e. Listado de todos los barrios pertenecientes a las comunas pedidas
+        if not indicadores.comunas:
+            print("\nBarrios por Comuna:")
+            print("  - No se pidió ninguna comuna.")
+        elif len(indicadores.comunas) == 1:
+            print(f"\nBarrios en Comuna {indicadores.comunas[0]}:")
+        else:
+            comunas = ", ".join(indicadores.comunas[:-1])
+            print(f"\nBarrios en Comunas {comunas} y {indicadores.comunas[-1]}:")
+        for fila in indicadores.barrios_por_comuna:
+            print(f"  - Comuna {fila.comuna}: {fila.barrio}")
+
+        # f. Cantidad de obras finalizadas en un plazo menor o igual al pedido
+        print(f"\nObras finalizadas en {indicadores.plazo_meses} meses o menos:")
+        if indicadores.finalizadas_en_plazo is None:
+            print("  - No se encontró la etapa 'Finalizada'.")
+        else:
+            print(f"  - {indicadores.finalizadas_en_plazo} obras.")
+
+        # g. Monto total de inversión
+        print("\n[17.g] Monto Total de Inversión (Todas las obras):")
+        print(f"  - ${indicadores.inversion_total:,.2f}")
+
+
+# Los indicadores cacheados son de la BD/conexión anterior
+agregar_observador_conexion(GestionarObra.invalidar_indicadores)
+
+
+def _limpiar_parte(df):
+    """Limpieza de una parte en un proceso de _limpiar_en_paralelo (función de módulo para poder mandarla)."""
+    return GestionarObra._limpiar_con_fallos(df)
@@ -0,0 +1,94 @@
+"""Tipos de resultado de los indicadores (punto 17) y cache de consultas."""
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+# Parámetros por defecto de los indicadores (e) y (f) del punto 17
+COMUNAS_INDICADOR = ('1', '2', '3')
+PLAZO_INDICADOR = 24
+
+
+@dataclass(frozen=True)
+class ObrasPorEtapa:
+    etapa: str
+    cantidad: int
+
+
+@dataclass(frozen=True)
+class InversionPorTipo:
+    tipo_obra: str
+    cantidad: int
+    monto_total: float
+
+
+@dataclass(frozen=True)
+class BarrioDeComuna:
+    comuna: str
+    barrio: str
+
+
+@dataclass(frozen=True)
+class Indicadores:
+    """Todos los indicadores juntos, para los parámetros con que se pidieron."""
+    areas_responsables: Tuple[str, ...]                 # a
+    tipos_obra: Tuple[str, ...]                         # b
+    obras_por_etapa: Tuple[ObrasPorEtapa, ...]          # c
+    inversion_por_tipo: Tuple[InversionPorTipo, ...]    # d
+    barrios_por_comuna: Tuple[BarrioDeComuna, ...]      # e
+    finalizadas_en_plazo: Optional[int]                 # f (None si no existe la etapa 'Finalizada')
+    inversion_total: float                              # g
+    comunas: Tuple[str, ...]
+    plazo_meses: int
+
+
+def version_bd(db):
+    """
+    Identifica el estado de la BD sin leer ninguna tabla: cambia con cualquier escritura
+    hecha por este proceso (db.escrituras, de cualquier conexión/hilo), por esta conexión
+    (total_changes) o confirmada por otro proceso (PRAGMA data_version).
+    data_version y total_changes solo se comparan dentro de una misma conexión: por eso va el
+    número de conexión (que, a diferencia de id(), no se reusa al reconectar).
+    """
+    numero = db.numero_conexion()
+    data_version = db.execute_sql('PRAGMA data_version').fetchone()[0]
+    return (numero, db.escrituras, db.connection().total_changes, data_version)
+
+
+class CacheIndicadores:
+    """
+    Cache de resultados por (indicador, parámetros). Una entrada se descarta si pasó
+    más de 'ttl' segundos o si la BD cambió desde que se calculó.
+    """
+
+    def __init__(self, db, ttl=60):
+        self.db = db
+        self.ttl = ttl
+        self._entradas = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, clave, calcular, ttl=None):
+        """ttl: pisa el del cache (para leerlo de la configuración en cada llamada)."""
+        ttl = self.ttl if ttl is None else ttl
+        version = version_bd(self.db)
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+        if entrada is not None:
+            valor, version_entrada, momento = entrada
+            if version_entrada == version and ahora - momento < ttl:
+                return valor
+
+        valor = calcular()
+        with self._lock:
+            self._entradas[clave] = (valor, version, ahora)
+        return valor
+
+    def invalidar(self, indicador=None):
+        """Borra todo el cache, o solo las entradas de un indicador."""
+        with self._lock:
+            if indicador is None:
+                self._entradas.clear()
+            else:
+                for clave in [c for c in self._entradas if c[0] == indicador]:
+                    del self._entradas[clave]
@@ -0,0 +1,237 @@
+"""
+Instrumentación del ETL: cuánto tarda cada etapa, cuántas consultas hace y cuáles son lentas.
+
+* tramo(nombre) mide una etapa o un lote (with tramo('lote') as t: ...; t.filas = n), y
+  @medido() hace lo mismo con una función entera. Los tramos se anidan por hilo
+  ('cargar_datos/_sincronizar_catalogos/Empresa') y se acumulan por esa ruta.
+* Mientras haya una Metricas activa (with Metricas() as metricas: ...), cada consulta que pasa por
+  la BD (observadores de modelo_orm) se cuenta en los tramos abiertos y en quién la hizo
+  (archivo:función, salteando peewee).
+* umbral_lento: las consultas que tardan más que eso se guardan y se loguean con su EXPLAIN QUERY PLAN.
+* metricas.como_dict() / metricas.guardar('metricas.json') para verlo después.
+
+Los mensajes de avance del ETL van por logging (logger 'obras'); main.py los muestra por consola.
+"""
+import functools
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+import peewee
+import playhouse
+
+import modelo_orm
+
+log = logging.getLogger('obras')
+
+# Métricas activas (normalmente una): todas reciben los tramos y las consultas
+activas = []
+_local = threading.local()
+
+# Frames que no cuentan como "quién hizo la consulta" (además del execute_sql de modelo_orm)
+_IGNORADOS = (peewee.__file__, os.path.dirname(playhouse.__file__), __file__)
+_COMPRENSIONES = ('<listcomp>', '<dictcomp>', '<setcomp>', '<genexpr>')
+# Consultas a las que se les puede pedir el plan
+_CON_PLAN = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT')
+
+
+def _pila():
+    pila = getattr(_local, 'pila', None)
+    if pila is None:
+        pila = _local.pila = []
+    return pila
+
+
+class Tramo:
+    """Un tramo medido. filas: cuántas filas procesó (opcional, para calcular filas/seg)."""
+
+    def __init__(self, nombre, filas=None):
+        self.nombre = nombre
+        self.filas = filas
+        self.ruta = None
+        self.segundos = None
+
+    def __enter__(self):
+        pila = _pila()
+        self.ruta = f"{pila[-1].ruta}/{self.nombre}" if pila else self.nombre
+        pila.append(self)
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *excepcion):
+        self.segundos = time.perf_counter() - self._inicio
+        _pila().pop()
+        for metricas in list(activas):
+            metricas._cerrar_tramo(self)
+        log.debug(f"{self.ruta}: {self.segundos:.3f} s")
+
+
+def tramo(nombre, filas=None):
+    return Tramo(nombre, filas)
+
+
+def medido(nombre=None):
+    """Decorador: cada llamada a la función es un tramo (por defecto, con el nombre de la función)."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with Tramo(nombre or funcion.__name__):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def agregar_filas(cantidad):
+    """Suma filas procesadas al tramo abierto más adentro (si hay uno)."""
+    pila = _pila()
+    if pila:
+        pila[-1].filas = (pila[-1].filas or 0) + cantidad
+
+
+def _llamador():
+    """'archivo.py:funcion' del primer frame fuera de peewee y de este módulo."""
+    frame = sys._getframe(1)
+    while frame is not None:
+        archivo = frame.f_code.co_filename
+        if archivo == modelo_orm.__file__ and frame.f_code.co_name == 'execute_sql':
+            pass
+        elif frame.f_code.co_name in _COMPRENSIONES:
+            pass  # se atribuye a la función que la contiene
+        elif not archivo.startswith(_IGNORADOS):
+            return f"{Path(archivo).name}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return '?'
+
+
+class Metricas:
+    """
+    Junta tramos y consultas mientras está activa (with, o iniciar()/detener()).
+    umbral_lento: segundos a partir de los cuales una consulta se considera lenta (None = no se registran).
+    """
+
+    def __init__(self, umbral_lento=None, maximo_lentas=100):
+        self.umbral_lento = umbral_lento
+        self.maximo_lentas = maximo_lentas
+        self.tramos = {}       # ruta -> estadísticas
+        self.llamadores = {}   # 'archivo:funcion' -> {'consultas', 'segundos_sql'}
+        self.lentas = []
+        self.consultas = 0
+        self.segundos_sql = 0.0
+        self._lock = threading.Lock()
+
+    def iniciar(self):
+        activas.append(self)
+        modelo_orm.agregar_observador(self._consulta)
+        return self
+
+    def detener(self):
+        modelo_orm.quitar_observador(self._consulta)
+        if self in activas:
+            activas.remove(self)
+        return self
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *excepcion):
+        self.detener()
+
+    def _estadisticas(self, ruta):
+        estadisticas = self.tramos.get(ruta)
+        if estadisticas is None:
+            estadisticas = self.tramos[ruta] = {
+                'veces': 0, 'segundos': 0.0, 'maximo': 0.0, 'filas': None, 'consultas': 0, 'segundos_sql': 0.0,
+            }
+        return estadisticas
+
+    def _cerrar_tramo(self, tramo):
+        with self._lock:
+            estadisticas = self._estadisticas(tramo.ruta)
+            estadisticas['veces'] += 1
+            estadisticas['segundos'] += tramo.segundos
+            estadisticas['maximo'] = max(estadisticas['maximo'], tramo.segundos)
+            if tramo.filas is not None:
+                estadisticas['filas'] = (estadisticas['filas'] or 0) + tramo.filas
+
+    def _consulta(self, sql, params, segundos):
+        llamador = _llamador()
+        abiertos = [tramo.ruta for tramo in _pila()]
+        with self._lock:
+            self.consultas += 1
+            self.segundos_sql += segundos
+            por_llamador = self.llamadores.setdefault(llamador, {'consultas': 0, 'segundos_sql': 0.0})
+            por_llamador['consultas'] += 1
+            por_llamador['segundos_sql'] += segundos
+            # La consulta cuenta en todos los tramos abiertos (un tramo incluye a los de adentro)
+            for ruta in abiertos:
+                estadisticas = self._estadisticas(ruta)
+                estadisticas['consultas'] += 1
+                estadisticas['segundos_sql'] += segundos
+
+        if self.umbral_lento is not None and segundos >= self.umbral_lento:
+            self._registrar_lenta(sql, params, segundos, llamador, abiertos[-1] if abiertos else None)
+
+    def _registrar_lenta(self, sql, params, segundos, llamador, ruta):
+        plan = None
+        if sql.lstrip().upper().startswith(_CON_PLAN):
+            try:
+                # Directo sobre la conexión: no pasa por execute_sql (ni por los observadores)
+                cursor = modelo_orm.db.connection().execute(f"EXPLAIN QUERY PLAN {sql}", params or ())
+                plan = [fila[-1] for fila in cursor.fetchall()]
+            except sqlite3.Error:
+                pass
+        log.warning(
+            f"Consulta lenta ({segundos * 1000:.1f} ms, {llamador}): {sql[:300]}"
+            + (f"\n  plan: {' | '.join(plan)}" if plan else "")
+        )
+        with self._lock:
+            if len(self.lentas) < self.maximo_lentas:
+                self.lentas.append({
+                    'sql': sql, 'params': [repr(p)[:100] for p in (params or ())][:20],
+                    'segundos': round(segundos, 6), 'llamador': llamador, 'tramo': ruta, 'plan': plan,
+                })
+
+    def como_dict(self):
+        with self._lock:
+            tramos = {}
+            for ruta, estadisticas in sorted(self.tramos.items()):
+                fila = dict(estadisticas)
+                fila['segundos'] = round(fila['segundos'], 6)
+                fila['maximo'] = round(fila['maximo'], 6)
+                fila['segundos_sql'] = round(fila['segundos_sql'], 6)
+                fila['filas_por_seg'] = round(fila['filas'] / fila['segundos']) if fila['filas'] and fila['segundos'] else None
+                tramos[ruta] = fila
+            llamadores = {
+                llamador: {'consultas': datos['consultas'], 'segundos_sql': round(datos['segundos_sql'], 6)}
+                for llamador, datos in sorted(self.llamadores.items(), key=lambda par: -par[1]['segundos_sql'])
+            }
+            return {
+                'consultas': self.consultas,
+                'segundos_sql': round(self.segundos_sql, 6),
+                'tramos': tramos,
+                'llamadores': llamadores,
+                'lentas': list(self.lentas),
+            }
+
+    def guardar(self, ruta):
+        Path(ruta).write_text(json.dumps(self.como_dict(), indent=2, ensure_ascii=False), encoding='utf-8')
+        return ruta
+
+    def resumen(self, nivel=logging.INFO):
+        """Loguea una línea por tramo y los llamadores que más tiempo de SQL usaron."""
+        datos = self.como_dict()
+        log.log(nivel, f"Métricas: {datos['consultas']} consultas, {datos['segundos_sql']:.3f} s de SQL")
+        for ruta, fila in datos['tramos'].items():
+            velocidad = f", {fila['filas_por_seg']:,} filas/seg" if fila['filas_por_seg'] else ""
+            log.log(
+                nivel,
+                f"  {ruta}: {fila['veces']}x {fila['segundos']:.3f} s, "
+                f"{fila['consultas']} consultas ({fila['segundos_sql']:.3f} s){velocidad}",
+            )
+        for llamador, fila in list(datos['llamadores'].items())[:10]:
+            log.log(nivel, f"  SQL de {llamador}: {fila['consultas']} consultas, {fila['segundos_sql']:.3f} s")
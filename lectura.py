@@ -0,0 +1,81 @@
+"""
+Lectura liviana de obras para reportes que recorren muchas filas.
+
+En vez de instancias de Obra (~45 atributos + objetos FK que se cargan de a uno),
+registros() devuelve tuplas con nombre (namedtuple, sin __dict__) con solo las columnas
+pedidas, y de a una: la consulta se recorre con .iterator(), sin guardar las filas ya leídas,
+así que la memoria no crece con el tamaño de la tabla.
+Las FK vienen como nombres, resueltos con el cache de catálogos (sin joins ni una consulta por fila);
+'comuna' sale del barrio de la obra.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+import peewee
+
+from modelo_orm import catalogos, Barrio, Comuna, Obra
+
+CAMPOS_REPORTE = ('id', 'nombre', 'etapa', 'tipo_obra', 'barrio', 'comuna', 'monto_contrato', 'porcentaje_avance')
+
+
+@lru_cache(maxsize=None)
+def tipo_registro(campos):
+    """Una clase de tupla por combinación de campos (se arma una sola vez)."""
+    return namedtuple('RegistroObra', campos)
+
+
+def _nombres(Modelo):
+    """id -> nombre del catálogo, desde el cache de catálogos."""
+    campo = Modelo.CAMPO_NOMBRE
+    return {item.id: getattr(item, campo) for item in catalogos.todos(Modelo)}
+
+
+def _comunas_por_barrio():
+    numeros = _nombres(Comuna)
+    return {barrio.id: numeros.get(barrio.comuna_id) for barrio in catalogos.todos(Barrio)}
+
+
+def registros(campos=CAMPOS_REPORTE, condicion=None, orden=None, nombres_fk=True):
+    """
+    Generador de RegistroObra con 'campos' (nombres de campos de Obra, más 'comuna').
+    condicion: expresión de peewee para filtrar (ej: Obra.vigente == True).
+    orden: campo o lista de campos (por defecto Obra.id).
+    nombres_fk=False deja las FK como ids.
+    """
+    campos = tuple(campos)
+    desconocidos = [c for c in campos if c != 'comuna' and c not in Obra._meta.fields]
+    if desconocidos:
+        raise ValueError(f"Obra no tiene los campos: {', '.join(desconocidos)}")
+
+    # Columnas a leer: las pedidas, y el barrio si hace falta para la comuna
+    leidos = [c for c in campos if c != 'comuna']
+    if 'comuna' in campos and 'barrio' not in leidos:
+        leidos.append('barrio')
+    posicion = {nombre: i for i, nombre in enumerate(leidos)}
+
+    # Cómo armar cada valor del registro: (posición en la fila, dict para traducir o None)
+    armado = []
+    for campo in campos:
+        if campo == 'comuna':
+            armado.append((posicion['barrio'], _comunas_por_barrio()))
+            continue
+        field = Obra._meta.fields[campo]
+        if nombres_fk and isinstance(field, peewee.ForeignKeyField):
+            armado.append((posicion[campo], _nombres(field.rel_model)))
+        else:
+            armado.append((posicion[campo], None))
+
+    if orden is None:
+        orden = [Obra.id]
+    elif not isinstance(orden, (list, tuple)):
+        orden = [orden]
+    query = Obra.select(*[getattr(Obra, c) for c in leidos]).order_by(*orden)
+    if condicion is not None:
+        query = query.where(condicion)
+
+    Registro = tipo_registro(campos)
+    for fila in query.tuples().iterator():
+        yield Registro._make(
+            fila[i] if traduccion is None else traduccion.get(fila[i])
+            for i, traduccion in armado
+        )
@@ -1,4 +1,5 @@
 from datetime import date
+import logging
 import peewee
 import keyboard
 import os
@@ -37,11 +38,19 @@ def salida_emergencia():
 # Configurar la escucha del teclado en segundo plano
 keyboard.add_hotkey('esc', salida_emergencia)
 
+# Los mensajes de avance del ETL van por logging: se muestran por consola como antes
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+# OBRAS_METRICAS=archivo.json guarda tiempos por etapa, consultas y consultas lentas de la corrida
+RUTA_METRICAS = os.environ.get('OBRAS_METRICAS')
+# OBRAS_IMPORTACION=tuberia carga el CSV con lectura, limpieza y escritura superpuestas (cargar_csv_en_tuberia)
+MODO_IMPORTACION = os.environ.get('OBRAS_IMPORTACION', '')
+
 def ejecutar_proceso_completo():
     """
     Función principal que ejecuta todos los pasos del TP.
     """
     print("--- INICIANDO TRABAJO PRÁCTICO FINAL ---")
+    metricas = GestionarObra.instrumentar().iniciar() if RUTA_METRICAS else None
     
     try:
         
@@ -54,19 +63,26 @@ def ejecutar_proceso_completo():
         # (c) Mapear ORM (crear tablas) 
         GestionarObra.mapear_orm()
         
-        # (a) Extraer datos del CSV 
-        GestionarObra.extraer_datos()
-        
-        # (d) Limpiar datos del DataFrame 
-        GestionarObra.limpiar_datos()
-
-
-        # (e) Cargar datos del DataFrame en la BD 
-        # (Se ejecuta solo si la tabla 'obra' está vacía para evitar duplicados)
-        if Obra.select().count() == 0:
-            GestionarObra.cargar_datos()
+        if MODO_IMPORTACION == 'tuberia':
+            # (a) + (d) + (e) en tubería: mientras se escribe una parte se limpia la siguiente
+            # (con codigo + huella, vale tanto para una BD vacía como para sincronizar una existente)
+            GestionarObra.cargar_csv_en_tuberia()
         else:
-            print("(e) La base de datos ya contenía datos. Se omite la carga inicial.")
+            # (a) Extraer datos del CSV + (d) Limpiar datos del DataFrame
+            # (si el CSV no cambió desde la última corrida, el DataFrame limpio sale del cache;
+            # si la BD ya se cargó con este CSV, no se lee nada)
+            estado = GestionarObra.preparar_datos()
+
+
+            # (e) Cargar datos del DataFrame en la BD 
+            # (Carga completa si la tabla 'obra' está vacía; si no, solo se aplican las diferencias con el CSV)
+            if estado == 'cargado':
+                print("(e) La base de datos ya tiene los datos de este CSV. No se vuelve a cargar.")
+            elif Obra.select().count() == 0:
+                GestionarObra.cargar_datos()
+            else:
+                print("(e) La base de datos ya contenía datos. Se sincroniza de forma incremental.")
+                GestionarObra.sincronizar_datos()
 
         
         # --- Punto 6: Crear nuevas instancias de Obra ---
@@ -163,6 +179,11 @@ def ejecutar_proceso_completo():
     except Exception as e:
         print(f"\nERROR INESPERADO: {e}")
     finally:
+        if metricas is not None:
+            metricas.detener()
+            metricas.resumen()
+            metricas.guardar(RUTA_METRICAS)
+            print(f"Métricas guardadas en '{RUTA_METRICAS}'.")
         if not db.is_closed():
             db.close()
             print("\n--- FIN DEL PROYECTO ---")
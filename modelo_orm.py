@@ -1,12 +1,317 @@
+import itertools
+import logging
+import math
 import peewee
 import os #Para manipular rutas en este caso
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from playhouse.pool import PooledSqliteDatabase
+from playhouse.sqlite_ext import FTS5Model, SearchField, VirtualModel
+from buscador import BuscadorNombres
+from normalizacion import sin_acentos
+
+log = logging.getLogger('obras')
+
+# Máximo de variables (?) por sentencia: SQLite < 3.32 acepta 999, las versiones nuevas 32766.
+# Los lotes dejan VARIABLES_RESERVADAS libres para el resto de la consulta (valores del SET, otros filtros)
+MAXIMO_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+VARIABLES_RESERVADAS = 99
+
+
+def lote_maximo(cantidad_columnas=1, tope=None):
+    """
+    Filas por INSERT (o ids por IN (...), con cantidad_columnas=1) sin pasarse de MAXIMO_VARIABLES.
+    tope: no más de esta cantidad (None = lo que entre).
+    """
+    lote = max(1, (MAXIMO_VARIABLES - VARIABLES_RESERVADAS) // cantidad_columnas)
+    return lote if tope is None else max(1, min(tope, lote))
 
 #Detecta el archivo obras_urbanas.db
 carpeta=os.path.dirname(os.path.abspath(__file__))
 #Construye la ruta, asi evitamos duplicar la base de datos
 ruta=os.path.join(carpeta, 'obras_urbanas.db')
+
+
+#CONFIGURACIÓN DE LA BASE DE DATOS
+#Todo se puede cambiar con variables de entorno, sin tocar este archivo:
+#  OBRAS_DB_RUTA              ruta del archivo .db
+#  OBRAS_DB_POOL              1 = pool de conexiones (varios hilos leyendo mientras otro escribe)
+#  OBRAS_DB_MAX_CONEXIONES    tamaño máximo del pool
+#  OBRAS_DB_TIMEOUT           segundos que se espera si la BD está bloqueada por otro escritor
+#  OBRAS_DB_JOURNAL_MODE, OBRAS_DB_SYNCHRONOUS, OBRAS_DB_CACHE_SIZE,
+#  OBRAS_DB_MMAP_SIZE, OBRAS_DB_TEMP_STORE   pragmas de SQLite
+#  OBRAS_DB_PRAGMAS           pragmas extra por conexión, ej: "wal_autocheckpoint=2000;page_size=8192"
+
+def _entorno(nombre, defecto, tipo=str):
+    valor = os.environ.get(nombre)
+    return defecto if valor in (None, '') else tipo(valor)
+
+
+def configuracion_db():
+    """Configuración de la BD a partir de las variables de entorno (o los valores por defecto)."""
+    pragmas = {
+        'journal_mode': _entorno('OBRAS_DB_JOURNAL_MODE', 'wal'),  # WAL: los lectores no bloquean al escritor
+        'synchronous': _entorno('OBRAS_DB_SYNCHRONOUS', 'normal'),  # con WAL, 'normal' es seguro y mucho más rápido
+        'cache_size': _entorno('OBRAS_DB_CACHE_SIZE', -64000, int),  # negativo = en KiB (64 MB)
+        'mmap_size': _entorno('OBRAS_DB_MMAP_SIZE', 256 * 1024 * 1024, int),
+        'temp_store': _entorno('OBRAS_DB_TEMP_STORE', 'memory'),
+        'foreign_keys': 1,
+    }
+    for pragma in _entorno('OBRAS_DB_PRAGMAS', '').split(';'):
+        if '=' in pragma:
+            clave, valor = pragma.split('=', 1)
+            pragmas[clave.strip()] = valor.strip()
+
+    return {
+        'ruta': _entorno('OBRAS_DB_RUTA', ruta),
+        'pool': _entorno('OBRAS_DB_POOL', '0').lower() in ('1', 'si', 'true', 'yes'),
+        'max_conexiones': _entorno('OBRAS_DB_MAX_CONEXIONES', 8, int),
+        'timeout': _entorno('OBRAS_DB_TIMEOUT', 5.0, float),
+        'pragmas': pragmas,
+    }
+
+
+# Observadores de consultas: funciones (sql, params, segundos) que se llaman después de cada
+# consulta que pasa por la BD, de cualquier hilo (para contar consultas, medir, loguear las lentas...)
+observadores_consultas = []
+
+
+def agregar_observador(observador):
+    observadores_consultas.append(observador)
+
+
+def quitar_observador(observador):
+    if observador in observadores_consultas:
+        observadores_consultas.remove(observador)
+
+
+# Observadores de conexión: funciones sin argumentos que se llaman cada vez que se abre una conexión
+# nueva y al cambiar de BD con configurar_db() (para vaciar caches que dependen de la conexión)
+observadores_conexion = []
+
+
+def agregar_observador_conexion(observador):
+    observadores_conexion.append(observador)
+
+
+# Número de cada conexión abierta (id(conexion) -> número). A diferencia de id(), un número no se
+# reusa: una conexión nueva nunca se confunde con una cerrada que estaba en la misma dirección
+_numeros_conexion = {}
+_contador_conexiones = itertools.count(1)
+_ESCRITURAS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+class _ConObservadores:
+    """
+    Mezcla para las clases de BD de peewee: avisa a los observadores de cada execute_sql,
+    cuenta las escrituras (escrituras) y numera las conexiones (numero_conexion).
+    """
+    escrituras = 0
+
+    def execute_sql(self, sql, params=None):
+        try:
+            if not observadores_consultas:
+                return super().execute_sql(sql, params)
+            inicio = time.perf_counter()
+            try:
+                return super().execute_sql(sql, params)
+            finally:
+                segundos = time.perf_counter() - inicio
+                for observador in list(observadores_consultas):
+                    observador(sql, params, segundos)
+        finally:
+            # Después de escribir: quien lea el contador antes de la escritura ve el valor viejo
+            if sql.lstrip()[:7].upper().startswith(_ESCRITURAS):
+                self.escrituras += 1
+
+    def _initialize_connection(self, conexion):
+        super()._initialize_connection(conexion)
+        for observador in list(observadores_conexion):
+            observador()
+
+    def numero_conexion(self):
+        """Número de la conexión de este hilo (distinto para cada conexión abierta, aunque se cierre y reabra)."""
+        clave = id(self.connection())
+        numero = _numeros_conexion.get(clave)
+        if numero is None:
+            numero = _numeros_conexion.setdefault(clave, next(_contador_conexiones))
+        return numero
+
+
+class SqliteObservada(_ConObservadores, peewee.SqliteDatabase):
+    def _close(self, conexion):
+        _numeros_conexion.pop(id(conexion), None)
+        super()._close(conexion)
+
+
+class PooledSqliteObservada(_ConObservadores, PooledSqliteDatabase):
+    def _close_raw(self, conexion):
+        # Solo cuando se cierra de verdad: las que vuelven al pool conservan su número
+        _numeros_conexion.pop(id(conexion), None)
+        super()._close_raw(conexion)
+
+
+class ContadorConsultas:
+    """
+    Cuenta las consultas que se hacen dentro de un with (de todos los hilos). Ej:
+        with ContadorConsultas() as conteo:
+            listado = [str(obra) for obra in Obra.con_relaciones()]
+        conteo.verificar(3)   # AssertionError si se hicieron más de 3
+    """
+
+    def __init__(self):
+        self.consultas = []  # (sql, params, segundos)
+
+    def __call__(self, sql, params, segundos):
+        self.consultas.append((sql, params, segundos))
+
+    def __enter__(self):
+        agregar_observador(self)
+        return self
+
+    def __exit__(self, *excepcion):
+        quitar_observador(self)
+
+    @property
+    def cantidad(self):
+        return len(self.consultas)
+
+    def verificar(self, maximo):
+        if self.cantidad > maximo:
+            detalle = '\n'.join(f"  {sql}" for sql, _, _ in self.consultas)
+            raise AssertionError(f"Se hicieron {self.cantidad} consultas (máximo {maximo}):\n{detalle}")
+        return self.cantidad
+
+
+def crear_db(ruta, pool=False, max_conexiones=8, timeout=5.0, pragmas=None):
+    """
+    Crea la base de datos de peewee. Los pragmas se aplican en cada conexión nueva.
+    pool=True usa PooledSqliteDatabase: cada hilo toma una conexión del pool y la devuelve
+    al cerrarla, así varios hilos pueden leer indicadores mientras una importación escribe.
+    """
+    if pool:
+        return PooledSqliteObservada(
+            ruta,
+            max_connections=max_conexiones,
+            stale_timeout=300,
+            timeout=timeout,
+            pragmas=pragmas,
+            check_same_thread=False,  # las conexiones del pool pasan de un hilo a otro
+        )
+    return SqliteObservada(ruta, timeout=timeout, pragmas=pragmas)
+
+
 #Definir la conexión a la base de datos
-db = peewee.SqliteDatabase(ruta)
+#Es un proxy: los modelos apuntan siempre a 'db' y configurar_db() decide qué base hay detrás
+db = peewee.DatabaseProxy()
+
+
+class CacheCatalogos:
+    """
+    Cache de proceso de los catálogos (etapas, tipos de obra, barrios, empresas, etc.):
+    cada tabla se carga entera con una sola consulta la primera vez que se pide
+    y después las búsquedas nombre -> instancia salen de memoria.
+    Los nombres se comparan sin acentos ni mayúsculas ("En Ejecución" == "en ejecucion").
+    Para búsquedas aproximadas (errores de tipeo, prefijos) está buscador(Modelo).
+    
+    Se invalida solo cuando se guarda/borra una fila con save()/delete_instance() y al cambiar
+    de BD (configurar_db). Quien escriba catálogos por afuera del modelo (insert_many, update)
+    tiene que llamar a invalidar(Modelo).
+    """
+
+    def __init__(self):
+        self._tablas = {}
+        self._ids = {}
+        self._buscadores = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def clave(valor):
+        return sin_acentos(str(valor)).strip().lower()
+
+    def _tabla(self, Modelo):
+        with self._lock:
+            tabla = self._tablas.get(Modelo)
+            if tabla is None:
+                campo = Modelo.CAMPO_NOMBRE
+                tabla = {self.clave(getattr(item, campo)): item for item in Modelo.select()}
+                self._tablas[Modelo] = tabla
+            return tabla
+
+    def buscar(self, Modelo, valor):
+        """Instancia con ese nombre, o None."""
+        return self._tabla(Modelo).get(self.clave(valor))
+
+    def obtener(self, Modelo, valor):
+        """Como get_or_create, pero sin ir a la BD si el nombre ya está en el cache."""
+        instancia = self.buscar(Modelo, valor)
+        if instancia is None:
+            with self._lock:
+                instancia, _ = Modelo.get_or_create(**{Modelo.CAMPO_NOMBRE: valor})
+                self._tabla(Modelo)[self.clave(valor)] = instancia
+                self._ids.pop(Modelo, None)
+        return instancia
+
+    def todos(self, Modelo):
+        return list(self._tabla(Modelo).values())
+
+    def por_id(self, Modelo):
+        """dict id -> instancia del catálogo (las mismas instancias que buscar())."""
+        with self._lock:
+            ids = self._ids.get(Modelo)
+            if ids is None:
+                ids = {item.id: item for item in self.todos(Modelo)}
+                self._ids[Modelo] = ids
+            return ids
+
+    def buscador(self, Modelo):
+        """BuscadorNombres del catálogo, armado una vez con las mismas instancias del cache."""
+        with self._lock:
+            buscador = self._buscadores.get(Modelo)
+            if buscador is None:
+                campo = Modelo.CAMPO_NOMBRE
+                buscador = BuscadorNombres(self.todos(Modelo), nombre=lambda item: getattr(item, campo))
+                self._buscadores[Modelo] = buscador
+            return buscador
+
+    def invalidar(self, Modelo=None):
+        """Descarta un catálogo (se vuelve a cargar en la próxima búsqueda), o todos."""
+        with self._lock:
+            if Modelo is None:
+                self._tablas.clear()
+                self._ids.clear()
+                self._buscadores.clear()
+            else:
+                self._tablas.pop(Modelo, None)
+                self._ids.pop(Modelo, None)
+                self._buscadores.pop(Modelo, None)
+
+
+catalogos = CacheCatalogos()
+
+
+def configurar_db(**opciones):
+    """
+    (Re)configura la BD de todos los modelos. Sin argumentos usa configuracion_db();
+    los argumentos (ruta, pool, max_conexiones, timeout, pragmas) pisan esa configuración.
+    """
+    config = configuracion_db()
+    pragmas = {**config['pragmas'], **(opciones.pop('pragmas', None) or {})}
+    config.update(opciones, pragmas=pragmas)
+
+    if db.obj is not None and not db.is_closed():
+        db.close()
+    db.initialize(crear_db(**config))
+    catalogos.invalidar()
+    for observador in list(observadores_conexion):
+        observador()
+    return db.obj
+
+
+configurar_db()
 
 #CLASE BASE (BaseModel) 
 class BaseModel(peewee.Model):
@@ -18,9 +323,25 @@ class BaseModel(peewee.Model):
 
 #TABLAS DE CATÁLOGO - 
 
-class Comuna(BaseModel):
+class CatalogoModel(BaseModel):
+    """Catálogo que se sirve desde 'catalogos' (ver CacheCatalogos)"""
+    CAMPO_NOMBRE = 'nombre'  #campo por el que se busca
+    
+    def save(self, *args, **kwargs):
+        resultado = super().save(*args, **kwargs)
+        catalogos.invalidar(type(self))
+        return resultado
+    
+    def delete_instance(self, *args, **kwargs):
+        resultado = super().delete_instance(*args, **kwargs)
+        catalogos.invalidar(type(self))
+        return resultado
+
+
+class Comuna(CatalogoModel):
     """Comunas de la Ciudad de Buenos Aires (1-15)"""
     numero = peewee.CharField(unique=True)  # "1", "2", "3", etc.
+    CAMPO_NOMBRE = 'numero'
     
     class Meta:
         table_name = 'comunas'
@@ -29,7 +350,7 @@ class Comuna(BaseModel):
         return f"Comuna {self.numero}"
 
 
-class Barrio(BaseModel):
+class Barrio(CatalogoModel):
     """Barrios de CABA - Cada barrio pertenece a UNA comuna"""
     nombre = peewee.CharField(unique=True)
     comuna = peewee.ForeignKeyField(Comuna, backref='barrios', null=True)
@@ -41,7 +362,7 @@ class Barrio(BaseModel):
         return self.nombre
 
 
-class TipoObra(BaseModel):
+class TipoObra(CatalogoModel):
     """Tipos de obra: Hidráulica, Arquitectura, Urbanización, etc."""
     nombre = peewee.CharField(unique=True)
     
@@ -52,7 +373,7 @@ class TipoObra(BaseModel):
         return self.nombre
 
 
-class AreaResponsable(BaseModel):
+class AreaResponsable(CatalogoModel):
     """Áreas/Ministerios responsables de las obras"""
     nombre = peewee.CharField(unique=True)
     
@@ -63,7 +384,7 @@ class AreaResponsable(BaseModel):
         return self.nombre
 
 
-class Empresa(BaseModel):
+class Empresa(CatalogoModel):
     """Empresas contratistas"""
     nombre = peewee.CharField(unique=True)
     cuit = peewee.CharField(null=True)  #Puede no estar disponible
@@ -75,7 +396,7 @@ class Empresa(BaseModel):
         return self.nombre
 
 
-class Etapa(BaseModel):
+class Etapa(CatalogoModel):
     """Etapas del ciclo de vida de una obra"""
     nombre = peewee.CharField(unique=True)
     #Ejemplos: "Proyecto", "Licitación", "En Ejecución", 
@@ -88,7 +409,7 @@ class Etapa(BaseModel):
         return self.nombre
 
 
-class TipoContratacion(BaseModel):
+class TipoContratacion(CatalogoModel):
     """Tipos de contratación: Licitación Pública, Directa, etc."""
     nombre = peewee.CharField(unique=True)
     
@@ -99,7 +420,7 @@ class TipoContratacion(BaseModel):
         return self.nombre
 
 
-class FuenteFinanciamiento(BaseModel):
+class FuenteFinanciamiento(CatalogoModel):
     """Fuentes de financiamiento de las obras"""
     nombre = peewee.CharField(unique=True)
     
@@ -112,6 +433,13 @@ class FuenteFinanciamiento(BaseModel):
 
 #TABLA PRINCIPAL- OBRA (Normalizada con Foreign Keys)
 
+#Paso del ciclo de vida para Obra.transicion_masiva()
+Transicion = namedtuple('Transicion', ['destino', 'desde', 'campos', 'fijos'])
+
+
+class ConflictoDeVersion(RuntimeError):
+    """Otro proceso modificó la obra desde que se leyó (ver Obra.CONTROL_VERSION)."""
+
 
 class Obra(BaseModel):
     
@@ -211,18 +539,299 @@ class Obra(BaseModel):
     pliego_descarga = peewee.CharField(null=True)
     estudio_ambiental_descarga = peewee.CharField(null=True)
     
+    #SINCRONIZACIÓN CON EL CSV
+    codigo = peewee.CharField(null=True, unique=True)  # "NOMBRE-BARRIO", clave de la fila en el CSV
+    hash_datos = peewee.CharField(null=True)  # Huella de la fila limpia, para detectar cambios
+    vigente = peewee.BooleanField(default=True, constraints=[peewee.SQL('DEFAULT 1')])  # False si desapareció del CSV
+    
+    #CONCURRENCIA
+    version = peewee.IntegerField(default=0, constraints=[peewee.SQL('DEFAULT 0')])  # +1 en cada UPDATE
+    
+    #True = save() falla con ConflictoDeVersion si la fila cambió desde que se leyó (en vez de pisarla).
+    #También se puede pedir por llamada: obra.save(controlar_version=True)
+    CONTROL_VERSION = False
+    
     class Meta:
         table_name = 'obras'
+        # Los UPDATE llevan solo las columnas que cambiaron (no reescriben descripcion, imágenes, etc.)
+        only_save_dirty = True
+        # Índices pensados para las consultas que realmente corremos (ver GestionarObra.verificar_plan_consultas):
+        # incluyen monto_contrato y vigente para que las sumas por grupo (solo de las vigentes)
+        # se resuelvan solo con el índice
+        indexes = (
+            (('etapa', 'plazo_meses', 'monto_contrato', 'vigente'), False),  # resumen por etapa y por etapa/plazo
+            (('tipo_obra', 'monto_contrato', 'vigente'), False),  # resumen por tipo de obra
+            (('barrio', 'monto_contrato', 'vigente'), False),  # resumen por barrio/comuna
+            (('fecha_inicio',), False),  # rangos de fechas
+            (('monto_contrato', 'vigente'), False),  # orden por monto, inversión total
+            (('lat', 'lng'), False),  # búsquedas por ubicación
+        )
     
     def __str__(self):
-        return f"Obra: {self.nombre} ({self.etapa})"
+        # Si la etapa no vino precargada sale del cache de catálogos (no una consulta por obra)
+        etapa = self.__rel__.get('etapa') or catalogos.por_id(Etapa).get(self.etapa_id, self.etapa_id)
+        return f"Obra: {self.nombre} ({etapa})"
+
+    # --- CARGA DE RELACIONES (evita el N+1 de obra.etapa, obra.barrio.comuna, etc.) ---
+
+    # 'comuna' es la del barrio (obra.barrio.comuna)
+    RELACIONES = (
+        'etapa', 'tipo_obra', 'area_responsable', 'barrio', 'comuna',
+        'empresa', 'tipo_contratacion', 'fuente_financiamiento',
+    )
+    # join: en la misma consulta (LEFT OUTER JOIN); prefetch: una consulta más por relación;
+    # cache: del cache de catálogos, sin consultas
+    MODOS_CARGA = ('join', 'prefetch', 'cache')
+
+    @classmethod
+    def _modos_carga(cls, relaciones, modo, modos):
+        relaciones = list(dict.fromkeys([*(relaciones or cls.RELACIONES), *modos]))
+        desconocidas = [r for r in relaciones if r not in cls.RELACIONES]
+        if desconocidas:
+            raise ValueError(f"Relaciones desconocidas: {', '.join(desconocidas)} (hay: {', '.join(cls.RELACIONES)})")
+        modo_de = {r: modos.get(r, modo) for r in relaciones}
+        invalidos = sorted({m for m in modo_de.values() if m not in cls.MODOS_CARGA})
+        if invalidos:
+            raise ValueError(f"Modos de carga inválidos: {', '.join(invalidos)} (hay: {', '.join(cls.MODOS_CARGA)})")
+        if 'comuna' in modo_de:
+            # La comuna cuelga del barrio: si no es del cache, se carga igual que el barrio
+            modo_barrio = modo_de.setdefault('barrio', modo_de['comuna'])
+            if modo_de['comuna'] != 'cache' and modo_de['comuna'] != modo_barrio:
+                raise ValueError(
+                    f"La comuna sale del barrio: con comuna='{modo_de['comuna']}' el barrio "
+                    f"tiene que cargarse igual (o usar comuna='cache')."
+                )
+        return modo_de
+
+    @classmethod
+    def con_relaciones(cls, *relaciones, query=None, modo='join', **modos):
+        """
+        Lista de obras con las relaciones ya cargadas: obra.etapa, obra.barrio.comuna, etc.
+        no hacen consultas. Sin relaciones = todas (RELACIONES).
+        modo: cómo cargarlas (MODOS_CARGA); modos: por relación, pisa a 'modo'. Ej:
+            Obra.con_relaciones('etapa', 'barrio', 'comuna', query=Obra.select().where(Obra.vigente == True))
+            Obra.con_relaciones(modo='cache', empresa='prefetch')
+        Con join son 1 consulta en total, con prefetch 1 + una por relación y con cache 1
+        (más la carga del catálogo si todavía no estaba en el cache).
+        """
+        modo_de = cls._modos_carga(relaciones, modo, modos)
+        query = cls.select() if query is None else query
+        foraneas = [r for r in modo_de if r != 'comuna']
+
+        for nombre in foraneas:
+            if modo_de[nombre] != 'join':
+                continue
+            campo = cls._meta.fields[nombre]
+            Modelo = campo.rel_model
+            query = query.select_extend(*Modelo._meta.sorted_fields).join(
+                Modelo, peewee.JOIN.LEFT_OUTER, on=(campo == Modelo.id)
+            )
+            if nombre == 'barrio' and modo_de.get('comuna') == 'join':
+                query = query.select_extend(*Comuna._meta.sorted_fields).join(
+                    Comuna, peewee.JOIN.LEFT_OUTER, on=(Barrio.comuna == Comuna.id)
+                )
+            query = query.switch(cls)
+
+        subconsultas = [cls._meta.fields[r].rel_model.select() for r in foraneas if modo_de[r] == 'prefetch']
+        if modo_de.get('comuna') == 'prefetch':
+            subconsultas.append(Comuna.select())
+        obras = peewee.prefetch(query, *subconsultas) if subconsultas else list(query)
+
+        for nombre in foraneas:
+            if modo_de[nombre] != 'cache':
+                continue
+            instancias = catalogos.por_id(cls._meta.fields[nombre].rel_model)
+            for obra in obras:
+                instancia = instancias.get(obra.__data__.get(nombre))
+                if instancia is not None:
+                    obra.__rel__[nombre] = instancia  # sin marcar el campo como modificado
+        if modo_de.get('comuna') == 'cache':
+            comunas = catalogos.por_id(Comuna)
+            for obra in obras:
+                barrio = obra.__rel__.get('barrio')
+                comuna = None if barrio is None else comunas.get(barrio.__data__.get('comuna'))
+                if comuna is not None:
+                    barrio.__rel__['comuna'] = comuna
+        return obras
+    
+    def save(self, force_insert=False, only=None, controlar_version=None):
+        """
+        Guarda la obra y mantiene al día la tabla de resumen de indicadores (ResumenObras).
+        Si la obra ya existe, el UPDATE lleva solo los campos modificados (o los de 'only') y suma 1 a 'version'.
+        controlar_version: None = lo que diga Obra.CONTROL_VERSION.
+        """
+        if self._pk is None or force_insert:
+            with db.atomic():
+                filas = super().save(force_insert=force_insert, only=only)
+                ResumenObras.sumar(self.__data__, +1)
+                BusquedaObras.indexar([self.id])
+                UbicacionObras.indexar([self.id])
+            return filas
+
+        campos = [campo for campo in (only or self.dirty_fields) if campo is not Obra.id]
+        if not campos:
+            return False  # No cambió nada: no hay nada que escribir
+        if controlar_version is None:
+            controlar_version = self.CONTROL_VERSION
+        if controlar_version and 'version' not in self.__data__:
+            # Sin la versión leída la condición sería "version = NULL", que nunca se cumple
+            raise ValueError(
+                f"La obra {self._pk} se leyó sin la columna 'version': no se puede controlar la versión. "
+                "Incluirla en el select o guardar con controlar_version=False."
+            )
+
+        cambios = {campo: self.__data__.get(campo.name) for campo in campos if campo is not Obra.version}
+        cambios[Obra.version] = Obra.version + 1
+        condicion = Obra.id == self._pk
+        if controlar_version:
+            condicion &= Obra.version.is_null() if self.version is None else (Obra.version == self.version)
+
+        with db.atomic():
+            anterior = None
+            if any(campo.name in ResumenObras.CAMPOS for campo in campos):
+                # Solo si cambió algo que afecta a los indicadores: leo cómo estaba antes de pisarla
+                anterior = self._datos_resumen(condicion)
+
+            filas = Obra.update(cambios).where(condicion).execute()
+            if filas == 0 and controlar_version:
+                raise ConflictoDeVersion(
+                    f"La obra {self._pk} fue modificada por otro proceso (versión leída: {self.version}). "
+                    "Volver a leerla y reintentar."
+                )
+
+            if anterior is not None:
+                # Lo nuevo es lo que había en la BD más lo que se escribió: la instancia puede no tener
+                # todos los campos (select parcial) o tener valores viejos de los que no se escriben
+                ResumenObras.sumar(anterior, -1)
+                ResumenObras.sumar({**anterior, **{campo.name: self.__data__.get(campo.name) for campo in campos}}, +1)
+            if any(campo.name in BusquedaObras.CAMPOS_OBRA for campo in campos):
+                BusquedaObras.indexar([self._pk])
+            if any(campo.name in UbicacionObras.CAMPOS_OBRA for campo in campos):
+                UbicacionObras.indexar([self._pk])
+
+        # Si el UPDATE no tocó ninguna fila (la obra ya no existe) no hay versión nueva ni nada guardado;
+        # con only= los campos modificados que no se escribieron siguen pendientes
+        if filas:
+            self.__data__['version'] = (self.version or 0) + 1  # sin marcarlo como modificado
+            for campo in campos:
+                self._dirty.discard(campo.name)
+        return filas
+    
+    @staticmethod
+    def _datos_resumen(condicion):
+        """Los campos de ResumenObras.CAMPOS de la obra tal como están en la BD (None si no hay fila)."""
+        return (
+            Obra.select(*[getattr(Obra, campo) for campo in ResumenObras.CAMPOS])
+            .where(condicion)
+            .dicts()
+            .get_or_none()
+        )
+    
+    def delete_instance(self, *args, **kwargs):
+        with db.atomic():
+            # Se resta lo que hay en la BD, no lo de la instancia (puede estar incompleta o desactualizada)
+            anterior = self._datos_resumen(Obra.id == self._pk)
+            if anterior is not None:
+                ResumenObras.sumar(anterior, -1)
+            BusquedaObras.delete().where(BusquedaObras.rowid == self._pk).execute()
+            UbicacionObras.delete().where(UbicacionObras.id == self._pk).execute()
+            return super().delete_instance(*args, **kwargs)
     
     
 
+    #TRANSICIONES MASIVAS - el mismo ciclo de vida, para muchas obras con un solo UPDATE
+    #nombre -> Transicion(etapa destino (None = no cambia), etapas de origen válidas (None = cualquiera),
+    #                     campos que se pueden pasar, valores fijos)
+    TRANSICIONES = {
+        'nuevo_proyecto': Transicion("Proyecto", None, (), {}),
+        'iniciar_contratacion': Transicion(
+            "En Licitación", ("Proyecto",), ('tipo_contratacion', 'nro_contratacion'), {}),
+        'adjudicar_obra': Transicion(
+            "Adjudicada", ("En Licitación",), ('empresa', 'nro_expediente'), {}),
+        'iniciar_obra': Transicion(
+            "En Ejecución", ("Adjudicada",),
+            ('destacada', 'fecha_inicio', 'fecha_fin_inicial', 'fuente_financiamiento', 'mano_obra'), {}),
+        'actualizar_porcentaje_avance': Transicion(None, ("En Ejecución",), ('porcentaje_avance',), {}),
+        'finalizar_obra': Transicion("Finalizada", ("En Ejecución",), (), {'porcentaje_avance': 100}),
+        'rescindir_obra': Transicion("Rescindida", None, (), {}),
+    }
+    
+    @classmethod
+    def transicion_masiva(cls, transicion, obras, desde=None, **valores):
+        """
+        Aplica una transición del ciclo de vida a muchas obras en una transacción,
+        con un solo UPDATE (por cada tanda de ids, si se pasa una lista muy larga).
+        
+        Args:
+            transicion: nombre del método equivalente ('finalizar_obra', 'adjudicar_obra', etc.)
+            obras: consulta de Obra, o lista de ids / instancias de Obra
+            desde: etapas de origen válidas (pisa las de TRANSICIONES); las obras en otra etapa no se tocan.
+                   Se comparan sin acentos ni mayúsculas ("En Ejecución" == "En Ejecucion").
+            valores: campos de la transición (todos), ej: empresa=..., nro_expediente=...
+        
+        Devuelve la cantidad de obras que cambiaron.
+        """
+        if transicion not in cls.TRANSICIONES:
+            raise ValueError(f"Transición desconocida: '{transicion}'")
+        destino, origenes, permitidos, fijos = cls.TRANSICIONES[transicion]
+        
+        sobrantes = set(valores) - set(permitidos)
+        if sobrantes:
+            raise ValueError(f"'{transicion}' no acepta los campos: {', '.join(sorted(sobrantes))}")
+        # Como en el método de instancia, todos los campos de la transición son obligatorios
+        faltantes = [campo for campo in permitidos if campo not in valores]
+        if faltantes:
+            raise ValueError(f"'{transicion}' necesita los campos: {', '.join(faltantes)}")
+        porcentaje = valores.get('porcentaje_avance')
+        if porcentaje is not None and not 0 <= porcentaje <= 100:
+            raise ValueError("El porcentaje debe estar entre 0 y 100")
+        
+        cambios = {**valores, **fijos}
+        condicion_etapa = None
+        if destino is not None:
+            etapa_destino = catalogos.obtener(Etapa, destino)
+            cambios['etapa'] = etapa_destino.id
+            # Las que ya están en la etapa destino no "se mueven"
+            condicion_etapa = Obra.etapa.is_null() | (Obra.etapa != etapa_destino.id)
+        
+        origenes = desde if desde is not None else origenes
+        if origenes is not None:
+            ids_origen = [
+                etapa.id for etapa in (catalogos.buscar(Etapa, nombre) for nombre in origenes)
+                if etapa is not None
+            ]
+            en_origen = Obra.etapa.in_(ids_origen)
+            condicion_etapa = en_origen if condicion_etapa is None else (condicion_etapa & en_origen)
+        
+        if isinstance(obras, peewee.SelectQuery):
+            condiciones_obras = [Obra.id.in_(obras.select(Obra.id))]
+        else:
+            ids = [obra.id if isinstance(obra, Obra) else obra for obra in obras]
+            # SQLite tiene un máximo de variables por sentencia
+            condiciones_obras = [Obra.id.in_(lote) for lote in peewee.chunked(ids, lote_maximo())]
+        
+        movidas = 0
+        with db.atomic():
+            for condicion in condiciones_obras:
+                if condicion_etapa is not None:
+                    condicion = condicion & condicion_etapa
+                if any(campo in ResumenObras.CAMPOS for campo in cambios):
+                    ResumenObras.mover(condicion, cambios)
+                # Si cambia un texto del índice (ej: la empresa al adjudicar), esas obras se reindexan
+                reindexar = []
+                if any(campo in BusquedaObras.CAMPOS_OBRA for campo in cambios):
+                    reindexar = [id_obra for (id_obra,) in Obra.select(Obra.id).where(condicion).tuples()]
+                movidas += Obra.update(**cambios, version=Obra.version + 1).where(condicion).execute()
+                if reindexar:
+                    BusquedaObras.indexar(reindexar)
+        
+        log.info(f"Transición '{transicion}' aplicada a {movidas} obras")
+        return movidas
+    
     #MÉTODOS DE INSTANCIA - Gestión del ciclo de vida de la obra
     def nuevo_proyecto(self):
         """Inicia una nueva obra en etapa 'Proyecto'"""
-        etapa_proyecto, _ = Etapa.get_or_create(nombre="Proyecto")
+        etapa_proyecto = catalogos.obtener(Etapa, "Proyecto")
         self.etapa = etapa_proyecto
         self.save()
         print(f"Obra '{self.nombre}' iniciada en etapa Proyecto")
@@ -239,7 +848,7 @@ class Obra(BaseModel):
         self.nro_contratacion = nro_contratacion
         
         #Cambiar etapa a "Licitación" o "En Licitación"
-        etapa_licitacion, _ = Etapa.get_or_create(nombre="En Licitación")
+        etapa_licitacion = catalogos.obtener(Etapa, "En Licitación")
         self.etapa = etapa_licitacion
         self.save()
         print(f"Contratación iniciada: {tipo_contratacion.nombre} - Nro: {nro_contratacion}")
@@ -255,7 +864,7 @@ class Obra(BaseModel):
         self.empresa = empresa
         self.nro_expediente = nro_expediente
         
-        etapa_adjudicada, _ = Etapa.get_or_create(nombre="Adjudicada")
+        etapa_adjudicada = catalogos.obtener(Etapa, "Adjudicada")
         self.etapa = etapa_adjudicada
         self.save()
         print(f"Obra adjudicada a {empresa.nombre} - Exp: {nro_expediente}")
@@ -278,7 +887,7 @@ class Obra(BaseModel):
         self.fuente_financiamiento = fuente_financiamiento
         self.mano_obra = mano_obra
         
-        etapa_ejecucion, _ = Etapa.get_or_create(nombre="En Ejecución")
+        etapa_ejecucion = catalogos.obtener(Etapa, "En Ejecución")
         self.etapa = etapa_ejecucion
         self.save()
         print(f" Obra iniciada el {fecha_inicio} con {mano_obra} trabajadores")
@@ -333,7 +942,7 @@ class Obra(BaseModel):
     
     def finalizar_obra(self):
         """Marca la obra como finalizada con 100% de avance"""
-        etapa_finalizada, _ = Etapa.get_or_create(nombre="Finalizada")
+        etapa_finalizada = catalogos.obtener(Etapa, "Finalizada")
         self.etapa = etapa_finalizada
         self.porcentaje_avance = 100
         self.save()
@@ -341,7 +950,522 @@ class Obra(BaseModel):
     
     def rescindir_obra(self):
         """Rescinde/cancela la obra"""
-        etapa_rescindida, _ = Etapa.get_or_create(nombre="Rescindida")
+        etapa_rescindida = catalogos.obtener(Etapa, "Rescindida")
         self.etapa = etapa_rescindida
         self.save()
-        print(f" Obra '{self.nombre}' RESCINDIDA")
\ No newline at end of file
+        print(f" Obra '{self.nombre}' RESCINDIDA")
+
+
+#METADATOS de la BD (clave -> valor)
+
+class Metadato(BaseModel):
+    """Datos sueltos sobre la BD misma, ej: la huella del CSV con el que se cargó."""
+    clave = peewee.CharField(primary_key=True)
+    valor = peewee.TextField(null=True)
+
+    class Meta:
+        table_name = 'metadatos'
+
+    @classmethod
+    def leer(cls, clave, defecto=None):
+        fila = cls.get_or_none(cls.clave == clave)
+        return defecto if fila is None else fila.valor
+
+    @classmethod
+    def escribir(cls, clave, valor):
+        """Guarda el valor (None borra la clave)."""
+        if valor is None:
+            cls.delete().where(cls.clave == clave).execute()
+        else:
+            cls.insert(clave=clave, valor=valor).on_conflict_replace().execute()
+
+
+#TABLA DE RESUMEN - Indicadores precalculados
+
+class ResumenObras(BaseModel):
+    """
+    Cantidad de obras y monto total agrupados por dimensión, para que los indicadores
+    se lean de acá (una fila por grupo) en lugar de agrupar toda la tabla obras.
+    Solo cuenta las obras vigentes: las dadas de baja (vigente=False) salen del resumen.
+    Se actualiza en Obra.save()/delete_instance(); las cargas por lote restan y suman las obras que
+    reescriben (sumar_obras) en la misma transacción, y reconstruir() queda para la carga inicial.
+
+    dimension / clave:
+      'total'       ''                  -> todas las obras
+      'etapa'       id de la etapa      ('' = sin etapa)
+      'tipo_obra'   id del tipo de obra
+      'barrio'      id del barrio       (las comunas se sacan sumando sus barrios)
+      'etapa_plazo' 'id_etapa:plazo'    -> para "finalizadas en N meses o menos"
+    """
+    dimension = peewee.CharField()
+    clave = peewee.CharField()
+    cantidad = peewee.IntegerField(default=0)
+    monto_total = peewee.FloatField(default=0)
+    
+    # Campos de Obra de los que dependen los grupos/sumas
+    CAMPOS = ('etapa', 'tipo_obra', 'barrio', 'plazo_meses', 'monto_contrato', 'vigente')
+    DIMENSIONES = ('total', 'etapa', 'tipo_obra', 'barrio', 'etapa_plazo')
+    
+    class Meta:
+        table_name = 'resumen_obras'
+        indexes = (
+            (('dimension', 'clave'), True),
+        )
+    
+    @staticmethod
+    def _texto(valor):
+        return '' if valor is None else str(valor)
+    
+    @classmethod
+    def claves(cls, datos):
+        """(dimension, clave) de los grupos a los que pertenece una obra (datos: dict campo -> valor de BD)."""
+        vigente = datos.get('vigente')
+        if vigente is not None and not vigente:
+            return []  # dada de baja: no cuenta en ningún grupo
+        etapa = cls._texto(Obra.etapa.db_value(datos.get('etapa')))
+        plazo = cls._texto(Obra.plazo_meses.db_value(datos.get('plazo_meses')))
+        return [
+            ('total', ''),
+            ('etapa', etapa),
+            ('tipo_obra', cls._texto(Obra.tipo_obra.db_value(datos.get('tipo_obra')))),
+            ('barrio', cls._texto(Obra.barrio.db_value(datos.get('barrio')))),
+            ('etapa_plazo', f"{etapa}:{plazo}"),
+        ]
+    
+    @classmethod
+    def _acumular(cls, deltas, datos, signo, cantidad=1, monto=None):
+        """Suma a deltas ((dimension, clave) -> (cantidad, monto)) lo que aporta una obra, o un grupo de obras iguales."""
+        if monto is None:
+            monto = Obra.monto_contrato.db_value(datos.get('monto_contrato')) or 0
+        for grupo in cls.claves(datos):
+            cantidad_grupo, monto_grupo = deltas.get(grupo, (0, 0))
+            deltas[grupo] = (cantidad_grupo + signo * cantidad, monto_grupo + signo * monto)
+    
+    @classmethod
+    def _guardar(cls, deltas):
+        """Aplica los deltas con INSERT ... ON CONFLICT (en tandas, por el máximo de variables de SQLite)."""
+        filas = [
+            {'dimension': dimension, 'clave': clave, 'cantidad': cantidad, 'monto_total': monto}
+            for (dimension, clave), (cantidad, monto) in deltas.items()
+            if cantidad or monto
+        ]
+        for lote in peewee.chunked(filas, lote_maximo(4)):
+            (cls.insert_many(lote)
+                .on_conflict(
+                    conflict_target=[cls.dimension, cls.clave],
+                    update={
+                        cls.cantidad: cls.cantidad + peewee.EXCLUDED.cantidad,
+                        cls.monto_total: cls.monto_total + peewee.EXCLUDED.monto_total,
+                    },
+                )
+                .execute())
+    
+    @classmethod
+    def _grupos(cls, condicion):
+        """Las obras que cumplen la condición, agrupadas por sus datos actuales: (datos, cantidad, monto)."""
+        campos = [getattr(Obra, campo) for campo in cls.CAMPOS if campo != 'monto_contrato']
+        grupos = (
+            Obra.select(*campos, peewee.fn.COUNT(Obra.id), peewee.fn.COALESCE(peewee.fn.SUM(Obra.monto_contrato), 0))
+            .where(condicion)
+            .group_by(*campos)
+            .tuples()
+        )
+        nombres = [campo.name for campo in campos]
+        for *valores, cantidad, monto in grupos:
+            yield dict(zip(nombres, valores)), cantidad, monto
+    
+    @classmethod
+    def sumar(cls, datos, signo, cantidad=1, monto=None):
+        """
+        Suma (signo=+1) o resta (signo=-1) una obra a todos sus grupos, en un solo INSERT ... ON CONFLICT.
+        cantidad/monto: para mover de una vez un grupo de obras que comparten los mismos datos.
+        """
+        deltas = {}
+        cls._acumular(deltas, datos, signo, cantidad, monto)
+        cls._guardar(deltas)
+    
+    @classmethod
+    def sumar_obras(cls, ids, signo):
+        """
+        Suma (+1) o resta (-1) las obras con esos ids tal como están ahora en la BD.
+        Para las cargas por lote: restar las que se van a reescribir, escribir, y sumar las escritas.
+        Agrupa por datos, así que son pocas consultas aunque sean muchas obras.
+        """
+        deltas = {}
+        for lote in peewee.chunked(ids, lote_maximo()):
+            for datos, cantidad, monto in cls._grupos(Obra.id.in_(lote)):
+                cls._acumular(deltas, datos, signo, cantidad, monto)
+        cls._guardar(deltas)
+    
+    @classmethod
+    def mover(cls, condicion, cambios):
+        """
+        Ajusta el resumen antes de un Obra.update(**cambios).where(condicion) masivo:
+        agrupa las obras afectadas por sus datos actuales y mueve cada grupo completo
+        (una resta y una suma por grupo, no por obra).
+        """
+        deltas = {}
+        for datos, cantidad, monto in cls._grupos(condicion):
+            cls._acumular(deltas, datos, -1, cantidad, monto)
+            cls._acumular(deltas, {**datos, **cambios}, +1, cantidad, monto)
+        cls._guardar(deltas)
+    
+    @classmethod
+    def _agrupar(cls):
+        """Consultas GROUP BY sobre obras que calculan el resumen desde cero (una por dimensión)."""
+        def texto(campo):
+            # coerce(False): que peewee no convierta el texto de vuelta al tipo del campo
+            return peewee.fn.COALESCE(campo.cast('TEXT'), '').coerce(False)
+        
+        # dimension -> (expresión de la clave, columnas por las que se agrupa).
+        # Se agrupa por las columnas crudas (no por la expresión) para que SQLite
+        # recorra los índices de Obra en orden y no arme un B-tree temporal
+        claves = {
+            'total': (peewee.Value(''), ()),
+            'etapa': (texto(Obra.etapa), (Obra.etapa,)),
+            'tipo_obra': (texto(Obra.tipo_obra), (Obra.tipo_obra,)),
+            'barrio': (texto(Obra.barrio), (Obra.barrio,)),
+            'etapa_plazo': (
+                texto(Obra.etapa).concat(':').concat(texto(Obra.plazo_meses)),
+                (Obra.etapa, Obra.plazo_meses),
+            ),
+        }
+        return {
+            dimension: Obra.select(
+                peewee.Value(dimension),
+                clave,
+                peewee.fn.COUNT(Obra.id),
+                peewee.fn.COALESCE(peewee.fn.SUM(Obra.monto_contrato), 0),
+            ).where(Obra.vigente == True).group_by(*agrupar)
+            for dimension, (clave, agrupar) in claves.items()
+        }
+    
+    @classmethod
+    def reconstruir(cls):
+        """Borra el resumen y lo vuelve a calcular desde la tabla obras."""
+        campos = [cls.dimension, cls.clave, cls.cantidad, cls.monto_total]
+        with db.atomic():
+            cls.delete().execute()
+            for query in cls._agrupar().values():
+                cls.insert_from(query, campos).execute()
+    
+    @classmethod
+    def verificar(cls, tolerancia=0.01):
+        """
+        Compara el resumen guardado con uno calculado desde cero.
+        Devuelve la lista de diferencias (vacía si está bien).
+        """
+        guardado = {
+            (d, c): (n, m) for d, c, n, m in
+            cls.select(cls.dimension, cls.clave, cls.cantidad, cls.monto_total).where(cls.cantidad != 0).tuples()
+        }
+        calculado = {}
+        for query in cls._agrupar().values():
+            for d, c, n, m in query.tuples():
+                calculado[(d, c)] = (n, m)
+        
+        diferencias = []
+        for grupo in sorted(set(guardado) | set(calculado)):
+            n_guardado, m_guardado = guardado.get(grupo, (0, 0))
+            n_calculado, m_calculado = calculado.get(grupo, (0, 0))
+            if n_guardado != n_calculado or abs(m_guardado - m_calculado) > tolerancia:
+                diferencias.append((grupo, (n_guardado, m_guardado), (n_calculado, m_calculado)))
+        return diferencias
+    
+    @classmethod
+    def leer(cls, dimension):
+        """clave -> (cantidad, monto_total) de una dimensión."""
+        return {
+            clave: (cantidad, monto)
+            for clave, cantidad, monto in
+            cls.select(cls.clave, cls.cantidad, cls.monto_total).where(cls.dimension == dimension).tuples()
+        }
+
+
+#BÚSQUEDA DE TEXTO - índice FTS5 sobre las obras
+
+class BusquedaObras(FTS5Model):
+    """
+    Índice de texto completo (SQLite FTS5) de las obras: rowid = id de la obra.
+    Guarda una copia de los textos, con los nombres de barrio y empresa ya resueltos.
+    
+    Obra.save()/delete_instance() actualizan la fila de esa obra y las cargas por lote (que no
+    pasan por save()) llaman a indexar() con las obras que escribieron; reconstruir() queda para
+    la carga inicial (tabla vacía) o para reparar el índice.
+    Si se renombra un barrio o una empresa, hay que reconstruir (o indexar esas obras).
+    
+    El tokenizer ignora acentos y mayúsculas: "educacion" encuentra "Educación".
+    """
+    nombre = SearchField()
+    descripcion = SearchField()
+    direccion = SearchField()
+    entorno = SearchField()
+    barrio = SearchField()
+    empresa = SearchField()
+    
+    #Campos de Obra que, si cambian, obligan a reindexar la obra
+    CAMPOS_OBRA = ('nombre', 'descripcion', 'direccion', 'entorno', 'barrio', 'empresa')
+    #Peso de cada columna en el ranking (bm25), en el orden de arriba
+    PESOS = (10.0, 1.0, 3.0, 1.0, 3.0, 2.0)
+    #Columnas de Obra que trae cada resultado de buscar()
+    COLUMNAS_RESULTADO = ('id', 'nombre', 'direccion', 'barrio', 'etapa', 'monto_contrato', 'porcentaje_avance', 'version')
+    _PALABRA = re.compile(r'\w+')
+    
+    class Meta:
+        database = db
+        table_name = 'busqueda_obras'
+        # prefix: índices extra para que las búsquedas por prefijo ("escu*") no recorran todo el vocabulario
+        options = {'tokenize': 'unicode61 remove_diacritics 2', 'prefix': '2 3'}
+    
+    @classmethod
+    def _textos(cls):
+        """SELECT con las columnas del índice, a partir de obras + barrios + empresas."""
+        return (
+            Obra.select(Obra.id, Obra.nombre, Obra.descripcion, Obra.direccion, Obra.entorno,
+                        Barrio.nombre, Empresa.nombre)
+            .join(Barrio, peewee.JOIN.LEFT_OUTER)
+            .switch(Obra)
+            .join(Empresa, peewee.JOIN.LEFT_OUTER)
+        )
+    
+    @classmethod
+    def indexar(cls, ids):
+        """(Re)indexa las obras con esos ids (las que ya no existen quedan fuera del índice)."""
+        campos = [cls.rowid, cls.nombre, cls.descripcion, cls.direccion, cls.entorno, cls.barrio, cls.empresa]
+        with db.atomic():
+            for lote in peewee.chunked(ids, lote_maximo()):
+                cls.delete().where(cls.rowid.in_(lote)).execute()
+                cls.insert_from(cls._textos().where(Obra.id.in_(lote)), campos).execute()
+    
+    @classmethod
+    def reconstruir(cls):
+        """Borra el índice y lo vuelve a armar desde la tabla obras."""
+        campos = [cls.rowid, cls.nombre, cls.descripcion, cls.direccion, cls.entorno, cls.barrio, cls.empresa]
+        with db.atomic():
+            cls.delete().execute()
+            cls.insert_from(cls._textos(), campos).execute()
+            # Junta los segmentos que dejan las inserciones en uno solo (búsquedas más rápidas)
+            cls.optimize()
+    
+    @classmethod
+    def expresion(cls, texto):
+        """
+        Arma la consulta FTS5 a partir de lo que escribió el usuario: cada palabra entre comillas
+        (así los signos del texto no se toman como sintaxis de FTS5) y como prefijo.
+        'escuela prim' -> '"escuela"* "prim"*' (tienen que estar todas). None si no hay palabras.
+        """
+        palabras = cls._PALABRA.findall(texto or '')
+        if not palabras:
+            return None
+        return ' '.join(f'"{palabra}"*' for palabra in palabras)
+    
+    @classmethod
+    def _coincidencias(cls, expresion, solo_vigentes, *columnas):
+        query = Obra.select(*columnas).join(cls, on=(cls.rowid == Obra.id)).where(cls.match(expresion))
+        if solo_vigentes:
+            query = query.where(Obra.vigente == True)
+        return query
+    
+    @classmethod
+    def buscar(cls, texto, pagina=1, por_pagina=20, solo_vigentes=True):
+        """
+        Obras que contienen todas las palabras de 'texto', de la más a la menos relevante,
+        de a 'por_pagina' (pagina empieza en 1). Cada obra trae su 'relevancia' (menor = mejor, bm25).
+        Las obras vienen solo con las columnas de COLUMNAS_RESULTADO (leer las ~45 columnas de cada
+        resultado cuesta más que la búsqueda); la obra completa se pide con Obra.get_by_id().
+        """
+        expresion = cls.expresion(texto)
+        if expresion is None:
+            return []
+        relevancia = cls.bm25(*cls.PESOS)
+        columnas = [getattr(Obra, campo) for campo in cls.COLUMNAS_RESULTADO]
+        query = (
+            cls._coincidencias(expresion, solo_vigentes, *columnas, relevancia.alias('relevancia'))
+            .order_by(relevancia, Obra.id)
+            .paginate(pagina, por_pagina)
+        )
+        return list(query)
+    
+    @classmethod
+    def contar(cls, texto, solo_vigentes=True):
+        """Cantidad total de resultados de buscar() (para saber cuántas páginas hay)."""
+        expresion = cls.expresion(texto)
+        return 0 if expresion is None else cls._coincidencias(expresion, solo_vigentes, Obra.id).count()
+
+
+#UBICACIÓN - índice espacial R*Tree sobre lat/lng
+
+RADIO_TIERRA_METROS = 6_371_000
+METROS_POR_GRADO = math.pi * RADIO_TIERRA_METROS / 180  # ~111 km (de latitud)
+
+
+def distancia_metros(lat1, lng1, lat2, lng2):
+    """Distancia sobre la superficie de la Tierra (haversine), en metros."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    delta_phi = phi2 - phi1
+    delta_lambda = math.radians(lng2 - lng1)
+    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+    return 2 * RADIO_TIERRA_METROS * math.asin(math.sqrt(a))
+
+
+class UbicacionObras(VirtualModel):
+    """
+    Índice espacial (SQLite R*Tree) de las obras con coordenadas: id = id de la obra,
+    cada obra es un "rectángulo" de un punto (lat_min == lat_max, lng_min == lng_max).
+    
+    El R*Tree guarda las coordenadas en float de 32 bits (redondeadas hacia afuera), así que
+    sirve para descartar rápido lo que está lejos; la distancia exacta se calcula con
+    Obra.lat/Obra.lng de las que quedan.
+    Se mantiene igual que BusquedaObras (Obra.save()/delete_instance() + indexar() tras cargas por lote).
+    """
+    id = peewee.IntegerField(primary_key=True)
+    lat_min = peewee.FloatField()
+    lat_max = peewee.FloatField()
+    lng_min = peewee.FloatField()
+    lng_max = peewee.FloatField()
+    
+    #Campos de Obra que, si cambian, obligan a reindexar la obra
+    CAMPOS_OBRA = ('lat', 'lng')
+    #mas_cercanas() deja de agrandar el radio acá (CABA mide ~20 km de punta a punta)
+    RADIO_MAXIMO = 50_000
+    
+    class Meta:
+        database = db
+        table_name = 'ubicacion_obras'
+        extension_module = 'rtree'
+    
+    @classmethod
+    def _puntos(cls):
+        return (
+            Obra.select(Obra.id, Obra.lat, Obra.lat, Obra.lng, Obra.lng)
+            .where(Obra.lat.is_null(False) & Obra.lng.is_null(False))
+        )
+    
+    @classmethod
+    def indexar(cls, ids):
+        """(Re)indexa las obras con esos ids (las que no existen o no tienen coordenadas quedan fuera)."""
+        campos = [cls.id, cls.lat_min, cls.lat_max, cls.lng_min, cls.lng_max]
+        with db.atomic():
+            for lote in peewee.chunked(ids, lote_maximo()):
+                cls.delete().where(cls.id.in_(lote)).execute()
+                cls.insert_from(cls._puntos().where(Obra.id.in_(lote)), campos).execute()
+    
+    @classmethod
+    def reconstruir(cls):
+        """Borra el índice y lo vuelve a armar desde la tabla obras."""
+        campos = [cls.id, cls.lat_min, cls.lat_max, cls.lng_min, cls.lng_max]
+        with db.atomic():
+            cls.delete().execute()
+            cls.insert_from(cls._puntos(), campos).execute()
+    
+    @staticmethod
+    def rectangulo(lat, lng, metros):
+        """(lat_min, lng_min, lat_max, lng_max) que contiene el círculo de 'metros' alrededor del punto."""
+        delta_lat = metros / METROS_POR_GRADO
+        delta_lng = metros / (METROS_POR_GRADO * max(math.cos(math.radians(lat)), 1e-6))
+        return lat - delta_lat, lng - delta_lng, lat + delta_lat, lng + delta_lng
+    
+    @classmethod
+    def en_rectangulo(cls, lat_min, lng_min, lat_max, lng_max, *columnas, solo_vigentes=True):
+        """
+        Consulta de las obras dentro del rectángulo (bordes incluidos).
+        columnas: las de Obra a traer (por defecto, todas).
+        """
+        dentro = cls.select(cls.id).where(
+            (cls.lat_max >= lat_min) & (cls.lat_min <= lat_max) &
+            (cls.lng_max >= lng_min) & (cls.lng_min <= lng_max)
+        )
+        query = Obra.select(*columnas).where(
+            Obra.id.in_(dentro) &
+            Obra.lat.between(lat_min, lat_max) &
+            Obra.lng.between(lng_min, lng_max)
+        )
+        if solo_vigentes:
+            query = query.where(Obra.vigente == True)
+        return query
+    
+    @classmethod
+    def _distancias(cls, lat, lng, metros, solo_vigentes):
+        """(distancia, id) de las obras a menos de 'metros' del punto, ordenadas. Solo lee id y coordenadas."""
+        query = cls.en_rectangulo(
+            *cls.rectangulo(lat, lng, metros), Obra.id, Obra.lat, Obra.lng, solo_vigentes=solo_vigentes
+        ).tuples()
+        distancias = []
+        for id_obra, lat_obra, lng_obra in query:
+            distancia = distancia_metros(lat, lng, lat_obra, lng_obra)
+            if distancia <= metros:
+                distancias.append((distancia, id_obra))
+        distancias.sort()
+        return distancias
+    
+    @staticmethod
+    def _con_obras(distancias, columnas):
+        """[(distancia, id)] -> [(obra, distancia)], trayendo solo esas obras."""
+        if columnas and not any(columna is Obra.id for columna in columnas):
+            columnas = (Obra.id, *columnas)
+        obras = {}
+        for lote in peewee.chunked([id_obra for _, id_obra in distancias], lote_maximo()):
+            obras.update((obra.id, obra) for obra in Obra.select(*columnas).where(Obra.id.in_(lote)))
+        return [(obras[id_obra], distancia) for distancia, id_obra in distancias]
+    
+    @classmethod
+    def cerca(cls, lat, lng, metros, *columnas, solo_vigentes=True):
+        """
+        Lista de (obra, distancia en metros) a menos de 'metros' del punto, de la más cercana a la más lejana.
+        columnas: las de Obra a traer (por defecto, todas).
+        """
+        if columnas:
+            # Hacen falta para calcular la distancia y ordenar (los campos se comparan por identidad:
+            # 'in' usaría el == de peewee, que arma una expresión SQL)
+            columnas += tuple(campo for campo in (Obra.id, Obra.lat, Obra.lng) if not any(campo is c for c in columnas))
+        resultado = []
+        for obra in cls.en_rectangulo(*cls.rectangulo(lat, lng, metros), *columnas, solo_vigentes=solo_vigentes):
+            distancia = distancia_metros(lat, lng, obra.lat, obra.lng)
+            if distancia <= metros:
+                resultado.append((obra, distancia))
+        resultado.sort(key=lambda par: (par[1], par[0].id))
+        return resultado
+    
+    @classmethod
+    def mas_cercanas(cls, lat, lng, k=5, *columnas, solo_vigentes=True, radio_inicial=250):
+        """
+        Las k obras más cercanas al punto, como (obra, distancia). Busca en un radio que se
+        duplica hasta juntar k (o llegar a RADIO_MAXIMO): las k más cercanas dentro de un círculo
+        son las k más cercanas de todas, así que no hace falta recorrer la tabla.
+        """
+        metros = radio_inicial
+        while True:
+            distancias = cls._distancias(lat, lng, metros, solo_vigentes)
+            if len(distancias) >= k or metros >= cls.RADIO_MAXIMO:
+                return cls._con_obras(distancias[:k], columnas)
+            metros = min(metros * 2, cls.RADIO_MAXIMO)
+    
+    @classmethod
+    def resumen_por_zona(cls, lat, lng, metros, por='barrio', solo_vigentes=True):
+        """
+        Obras a menos de 'metros' del punto agrupadas por barrio o por comuna:
+        dict nombre -> (cantidad, monto_total), de la zona con más obras a la de menos.
+        """
+        if por == 'barrio':
+            zona = Barrio.nombre
+        elif por == 'comuna':
+            zona = Comuna.numero
+        else:
+            raise ValueError(f"No se puede agrupar por '{por}' (usar 'barrio' o 'comuna').")
+        
+        query = (
+            cls.en_rectangulo(
+                *cls.rectangulo(lat, lng, metros),
+                Obra.lat, Obra.lng, Obra.monto_contrato, zona,
+                solo_vigentes=solo_vigentes,
+            )
+            .join(Barrio, peewee.JOIN.LEFT_OUTER)
+            .join(Comuna, peewee.JOIN.LEFT_OUTER)
+            .tuples()
+        )
+        zonas = {}
+        for lat_obra, lng_obra, monto, nombre in query:
+            if distancia_metros(lat, lng, lat_obra, lng_obra) <= metros:
+                cantidad, total = zonas.get(nombre, (0, 0.0))
+                zonas[nombre] = (cantidad + 1, total + (monto or 0))
+        return dict(sorted(zonas.items(), key=lambda par: (-par[1][0], str(par[0]))))
@@ -0,0 +1,60 @@
+"""Canonización de los textos de catálogo (barrios, etapas, empresas, etc.) del CSV."""
+import re
+import unicodedata
+from functools import lru_cache
+
+import numpy
+import pandas
+
+# Correcciones puntuales del dataset, en el orden en que se aplican.
+# (columnas a las que aplica o None = todas, texto a buscar sin importar mayúsculas, reemplazo)
+REGLAS = [
+    (('barrio',), "Monserrat", "Montserrat"),
+    (None, "Secretari A", "Secretaria"),  # "Secretaría" llega roto por el encoding del CSV
+]
+
+_REGLAS_COMPILADAS = [
+    (columnas, re.compile(re.escape(buscar), re.IGNORECASE), reemplazo)
+    for columnas, buscar, reemplazo in REGLAS
+]
+_ESPACIOS = re.compile(r'\s+')
+
+
+def sin_acentos(texto):
+    """'Educación' -> 'Educacion' (descompone y descarta lo que no es ASCII)."""
+    return unicodedata.normalize('NFD', texto).encode('ascii', 'ignore').decode('utf-8')
+
+
+@lru_cache(maxsize=None)
+def canonizar(valor, columna=None):
+    """
+    Forma canónica de un valor de catálogo:
+    strip + title ("en ejecución" -> "En Ejecucion"), sin acentos, reglas de REGLAS
+    y espacios colapsados. El texto "None" se toma como nulo.
+    Se memoiza: cada valor distinto se normaliza una sola vez por proceso.
+    """
+    if valor is None:
+        return None
+
+    texto = str(valor).strip().title()
+    if texto == "None":
+        return None
+
+    texto = sin_acentos(texto)
+    for columnas, patron, reemplazo in _REGLAS_COMPILADAS:
+        if columnas is None or columna in columnas:
+            texto = patron.sub(reemplazo, texto)
+    texto = _ESPACIOS.sub(' ', texto).strip()
+
+    return None if texto == "None" else texto
+
+
+def canonizar_serie(serie, columna=None):
+    """
+    Aplica canonizar() a una columna entera: factoriza, normaliza solo los valores
+    únicos y vuelve a expandir con los códigos. Los nulos quedan como None.
+    """
+    codigos, unicos = pandas.factorize(serie)
+    # El último lugar es para los nulos (factorize les asigna el código -1)
+    canonicos = numpy.array([canonizar(valor, columna) for valor in unicos] + [None], dtype=object)
+    return pandas.Series(canonicos[codigos], index=serie.index, name=serie.name)
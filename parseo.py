@@ -0,0 +1,94 @@
+"""
+Parseo vectorizado de números y fechas en formato argentino (es-AR).
+
+Cada función recibe una columna de texto y devuelve (valores, fallos): la columna
+tipada y la cantidad de valores no vacíos que no se pudieron interpretar.
+Todo se resuelve con operaciones de columna (regex de pandas + to_numeric/to_datetime),
+sin funciones de Python por elemento.
+"""
+import pandas
+
+# Textos que en el CSV significan "sin dato" (no cuentan como fallo)
+NULOS = ['', '.', '-', 'A/D', 'S/D', 's/d', 'None', 'nan']
+
+FORMATOS_FECHA = ('%d/%m/%Y', '%d-%m-%Y')
+
+# (patrón que tiene que matchear completo, separador de miles a quitar, separador decimal a pasar a '.')
+# Se prueban en orden: primero el formato local y después los que aparecen mezclados en el dataset.
+_FORMATOS_NUMERO = [
+    (r'-?\d{1,3}(?:\.\d{3})*(?:,\d+)?', '.', ','),    # 67.065.700,00 | -34,567 | 100
+    (r'-?\d{1,3}(?:,\d{3})+(?:\.\d+)?', ',', None),   # 53,160,000.00 | 28,470,000
+    (r'-?\d+,\d+', None, ','),                        # 69896275,94
+    (r'-?\d+\.\d+', None, None),                      # 40.78
+    (r'-?\d+', None, None),                           # 6595600
+    (r'-?\d+(?:[.,]\d+)?[eE][+-]?\d+', None, ','),    # -3,46E+01
+]
+
+
+def _texto_limpio(serie):
+    """Primera línea, sin aclaraciones entre paréntesis, símbolo de moneda, % ni espacios."""
+    texto = serie.astype('string')
+    texto = texto.str.split('\n').str[0].astype('string')
+    texto = texto.str.replace(r'\(.*\)', '', regex=True)
+    texto = texto.str.replace(r'[\s$%\xa0]', '', regex=True)
+    return texto.mask(texto.isin(NULOS))
+
+
+def _contar_fallos(texto, valores):
+    return int((texto.notna() & valores.isna()).sum())
+
+
+def parsear_numero(serie):
+    """'$ 67.065.700,00' -> 67065700.0, '-34,56715312' -> -34.56715312, '40%' -> 40.0."""
+    texto = _texto_limpio(serie)
+    normalizado = pandas.Series(pandas.NA, index=serie.index, dtype='string')
+
+    for patron, miles, decimal in _FORMATOS_NUMERO:
+        coincide = normalizado.isna() & texto.str.fullmatch(patron).fillna(False)
+        if not coincide.any():
+            continue
+        parte = texto[coincide]
+        if miles:
+            parte = parte.str.replace(miles, '', regex=False)
+        if decimal:
+            parte = parte.str.replace(decimal, '.', regex=False)
+        normalizado[coincide] = parte
+
+    valores = pandas.to_numeric(normalizado, errors='coerce').astype('float64')
+    return valores, _contar_fallos(texto, valores)
+
+
+def parsear_coordenada(serie, maximo, digitos_enteros=2):
+    """
+    Como parsear_numero, pero para lat/lng. Algunas coordenadas llegan con los puntos
+    de miles que les agregó una planilla ('-34.578.254', '-584.699.185'): si el valor
+    queda fuera de rango se rearma con los dígitos, poniendo la coma después de
+    'digitos_enteros' cifras (en CABA: lat -34.x, lng -58.x).
+    """
+    texto = _texto_limpio(serie)
+    valores, _ = parsear_numero(serie)
+
+    fuera_de_rango = valores.abs() > maximo
+    if fuera_de_rango.any():
+        parte = texto[fuera_de_rango]
+        signo = parte.str[:1].where(parte.str.startswith('-'), '')
+        digitos = parte.str.replace(r'\D', '', regex=True)
+        rearmado = signo + digitos.str[:digitos_enteros] + '.' + digitos.str[digitos_enteros:]
+        valores[fuera_de_rango] = pandas.to_numeric(rearmado, errors='coerce')
+        valores[valores.abs() > maximo] = float('nan')
+
+    return valores, _contar_fallos(texto, valores)
+
+
+def parsear_fecha(serie, formatos=FORMATOS_FECHA):
+    """'16/3/2015' -> 2015-03-16 (datetime64). Cada formato se prueba solo sobre lo que falta parsear."""
+    texto = _texto_limpio(serie)
+    valores = pandas.Series(pandas.NaT, index=serie.index, dtype='datetime64[ns]')
+
+    for formato in formatos:
+        pendientes = valores.isna() & texto.notna()
+        if not pendientes.any():
+            break
+        valores[pendientes] = pandas.to_datetime(texto[pendientes], format=formato, errors='coerce')
+
+    return valores, _contar_fallos(texto, valores)
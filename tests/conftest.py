@@ -0,0 +1,50 @@
+"""
+Fixtures de los tests: una BD temporal (configurar_db) cargada con el CSV del Observatorio.
+Correr desde la carpeta del proyecto: python -m pytest
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import modelo_orm
+from gestionar_obras import GestionarObra
+
+
+def _cargar(ruta):
+    modelo_orm.configurar_db(ruta=str(ruta))
+    GestionarObra.invalidar_indicadores()
+    GestionarObra.mapear_orm()
+    GestionarObra.extraer_datos()
+    GestionarObra.limpiar_datos()
+    GestionarObra.cargar_datos()
+    return modelo_orm.db
+
+
+@pytest.fixture(scope='session')
+def bd_cargada(tmp_path_factory):
+    """BD temporal con todas las obras del CSV (extraer + limpiar + cargar). Al final vuelve a la BD de siempre."""
+    yield _cargar(tmp_path_factory.mktemp('bd') / 'obras.db')
+    GestionarObra.invalidar_indicadores()
+    modelo_orm.configurar_db()
+
+
+@pytest.fixture
+def bd_nueva(bd_cargada, tmp_path):
+    """Como bd_cargada pero solo para este test, para los que modifican obras. Después vuelve a la de la sesión."""
+    ruta_sesion = bd_cargada.database
+    yield _cargar(tmp_path / 'obras.db')
+    GestionarObra.invalidar_indicadores()
+    modelo_orm.configurar_db(ruta=ruta_sesion)
+
+
+@pytest.fixture
+def bd_vacia(bd_cargada, tmp_path):
+    """BD temporal con las tablas creadas y sin obras (para probar las cargas). Después vuelve a la de la sesión."""
+    ruta_sesion = bd_cargada.database
+    modelo_orm.configurar_db(ruta=str(tmp_path / 'obras.db'))
+    GestionarObra.mapear_orm()
+    yield modelo_orm.db
+    GestionarObra.invalidar_indicadores()
+    modelo_orm.configurar_db(ruta=ruta_sesion)
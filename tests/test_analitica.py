@@ -0,0 +1,27 @@
+"""Los indicadores de la foto en memoria (AnaliticaObras) son los mismos que los de la BD."""
+import pytest
+
+from gestionar_obras import GestionarObra
+
+
+def test_indicadores_iguales_despues_de_bajas(bd_nueva):
+    GestionarObra.analisis()  # foto tomada antes de las bajas: se pone al día sola
+    completo = GestionarObra.dataframe
+    GestionarObra.dataframe = completo.iloc[100:]
+    try:
+        resultado = GestionarObra.sincronizar_datos(marcar_bajas=True)
+    finally:
+        GestionarObra.dataframe = completo
+    assert resultado['bajas'] == 100
+
+    GestionarObra.invalidar_indicadores()
+    en_bd = GestionarObra.calcular_indicadores()
+    en_memoria = GestionarObra.analisis().indicadores()
+
+    assert en_memoria.inversion_total == pytest.approx(en_bd.inversion_total)
+    assert en_memoria.finalizadas_en_plazo == en_bd.finalizadas_en_plazo
+    assert set(en_memoria.obras_por_etapa) == set(en_bd.obras_por_etapa)
+    assert {fila.tipo_obra: fila.cantidad for fila in en_memoria.inversion_por_tipo} == {
+        fila.tipo_obra: fila.cantidad for fila in en_bd.inversion_por_tipo
+    }
+    assert (en_memoria.comunas, en_memoria.plazo_meses) == (en_bd.comunas, en_bd.plazo_meses)
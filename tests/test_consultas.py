@@ -0,0 +1,48 @@
+"""Listar obras con todas sus relaciones cuesta la misma cantidad de consultas con 100 obras que con todas (sin N+1)."""
+import pytest
+
+from modelo_orm import ContadorConsultas, Obra, catalogos
+
+# Consultas esperadas por estrategia, con el cache de catálogos vacío:
+#   join: todo en la consulta de obras; prefetch: obras + una por relación (8);
+#   cache: obras (con barrio/comuna y empresa por join, que son los catálogos grandes)
+#   + la carga de los 5 catálogos chicos
+ESTRATEGIAS = {
+    'join': ({'modo': 'join'}, 1),
+    'prefetch': ({'modo': 'prefetch'}, 9),
+    'cache': ({'modo': 'cache', 'barrio': 'join', 'comuna': 'join', 'empresa': 'join'}, 6),
+}
+
+
+def _relaciones(obra):
+    barrio = obra.barrio
+    return (
+        str(obra), obra.etapa, obra.tipo_obra, obra.area_responsable, barrio,
+        barrio and barrio.comuna, obra.empresa, obra.tipo_contratacion, obra.fuente_financiamiento,
+    )
+
+
+@pytest.mark.parametrize('limite', [100, None], ids=['100_obras', 'todas'])
+@pytest.mark.parametrize('estrategia', list(ESTRATEGIAS))
+def test_consultas_fijas_por_estrategia(bd_cargada, estrategia, limite):
+    modos, esperadas = ESTRATEGIAS[estrategia]
+    query = Obra.select().order_by(Obra.id)
+    if limite is not None:
+        query = query.limit(limite)
+
+    catalogos.invalidar()
+    with ContadorConsultas() as conteo:
+        obras = Obra.con_relaciones(query=query, **modos)
+        listado = [_relaciones(obra) for obra in obras]  # sin consultas perezosas por obra
+
+    assert len(listado) == (limite or Obra.select().count())
+    assert conteo.cantidad == esperadas, [sql for sql, _, _ in conteo.consultas]
+
+
+def test_cache_caliente_una_sola_consulta(bd_cargada):
+    # Con los catálogos ya en memoria, el modo cache es solo la consulta de obras
+    Obra.con_relaciones(query=Obra.select().limit(1), modo='cache')
+    with ContadorConsultas() as conteo:
+        obras = Obra.con_relaciones(modo='cache')
+        [_relaciones(obra) for obra in obras]
+    assert conteo.cantidad == 1
@@ -0,0 +1,46 @@
+"""Cache de indicadores: se descarta con escrituras de este proceso, de otro y al reconectar."""
+import sqlite3
+
+from gestionar_obras import GestionarObra
+from indicadores import version_bd
+from modelo_orm import Obra
+
+
+def _escribir_desde_otro_proceso(bd, monto):
+    conexion = sqlite3.connect(bd.database)
+    with conexion:
+        conexion.execute(
+            "UPDATE resumen_obras SET monto_total = monto_total + ? WHERE dimension = 'total'", (monto,)
+        )
+    conexion.close()
+
+
+def test_escritura_externa_y_reconexion(bd_nueva):
+    GestionarObra.invalidar_indicadores()
+    antes = GestionarObra.indicador_inversion_total()
+    version = version_bd(bd_nueva)
+
+    bd_nueva.close()
+    _escribir_desde_otro_proceso(bd_nueva, 1000)
+    bd_nueva.connect()
+
+    assert version_bd(bd_nueva) != version  # otra conexión: no se compara su data_version con la vieja
+    assert GestionarObra.indicador_inversion_total() == antes + 1000
+
+
+def test_escritura_propia_cambia_la_version(bd_nueva):
+    version = version_bd(bd_nueva)
+    Obra.update(nombre=Obra.nombre).where(Obra.id == 0).execute()  # no toca filas, pero es una escritura
+    assert version_bd(bd_nueva) != version
+
+
+def test_ttl_se_lee_al_consultar(bd_cargada, monkeypatch):
+    GestionarObra.invalidar_indicadores()
+    llamadas = []
+    calcular = lambda: llamadas.append(1) or len(llamadas)
+
+    assert GestionarObra._indicador('prueba_ttl', calcular) == 1
+    assert GestionarObra._indicador('prueba_ttl', calcular) == 1  # cacheado
+    monkeypatch.setattr(GestionarObra, 'TTL_INDICADORES', 0)
+    assert GestionarObra._indicador('prueba_ttl', calcular) == 2
+    GestionarObra.invalidar_indicadores('prueba_ttl')
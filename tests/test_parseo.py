@@ -0,0 +1,77 @@
+"""Parseo de números, coordenadas y fechas en formato argentino: valor esperado y fallos contados."""
+import math
+
+import pandas
+import pytest
+
+from parseo import parsear_coordenada, parsear_fecha, parsear_numero
+
+
+def _uno(parsear, texto, *args):
+    valores, fallos = parsear(pandas.Series([texto], dtype=object), *args)
+    return valores.iloc[0], fallos
+
+
+def _igual(valor, esperado):
+    if esperado is None:
+        return pandas.isna(valor)
+    return math.isclose(valor, esperado)
+
+
+@pytest.mark.parametrize('texto, esperado, fallos', [
+    ('$ 67.065.700,00', 67065700.0, 0),      # formato local
+    ('-34,56715312', -34.56715312, 0),
+    ('100', 100.0, 0),
+    ('53,160,000.00', 53160000.0, 0),        # miles con coma, decimales con punto
+    ('28,470,000', 28470000.0, 0),
+    ('69896275,94', 69896275.94, 0),         # decimales con coma, sin miles
+    ('40.78', 40.78, 0),                     # decimales con punto
+    ('6595600', 6595600.0, 0),
+    ('-3,46E+01', -34.6, 0),                 # notación científica
+    ('40%', 40.0, 0),
+    ('12,5 (aprox)\notra línea', 12.5, 0),   # solo la primera línea, sin aclaraciones
+    ('s/d', None, 0),                        # sin dato: no es fallo
+    ('', None, 0),
+    (None, None, 0),
+    ('abc', None, 1),
+    ('1.2.3', None, 1),
+])
+def test_parsear_numero(texto, esperado, fallos):
+    valor, contados = _uno(parsear_numero, texto)
+    assert _igual(valor, esperado)
+    assert contados == fallos
+
+
+@pytest.mark.parametrize('texto, maximo, esperado, fallos', [
+    ('-34,56715312', 90, -34.56715312, 0),
+    ('-34.578.254', 90, -34.578254, 0),      # puntos de miles de una planilla: se rearma
+    ('-584.699.185', 180, -58.4699185, 0),
+    ('-58,4699185', 180, -58.4699185, 0),
+    ('s/d', 90, None, 0),
+    ('abc', 180, None, 1),
+])
+def test_parsear_coordenada(texto, maximo, esperado, fallos):
+    valor, contados = _uno(parsear_coordenada, texto, maximo)
+    assert _igual(valor, esperado)
+    assert contados == fallos
+
+
+@pytest.mark.parametrize('texto, esperado, fallos', [
+    ('16/3/2015', pandas.Timestamp(2015, 3, 16), 0),
+    ('16-03-2015', pandas.Timestamp(2015, 3, 16), 0),
+    ('31/2/2020', None, 1),                  # fecha que no existe
+    ('2015-03-16', None, 1),                 # formato no previsto
+    ('s/d', None, 0),
+])
+def test_parsear_fecha(texto, esperado, fallos):
+    valor, contados = _uno(parsear_fecha, texto)
+    assert pandas.isna(valor) if esperado is None else valor == esperado
+    assert contados == fallos
+
+
+def test_fallos_se_cuentan_por_columna():
+    serie = pandas.Series(['$ 1.000,50', 'abc', 's/d', '53,160,000.00', '???', None], dtype=object)
+    valores, fallos = parsear_numero(serie)
+    assert fallos == 2
+    assert valores.iloc[0] == 1000.5 and valores.iloc[3] == 53160000.0
+    assert valores.iloc[[1, 2, 4, 5]].isna().all()
@@ -0,0 +1,39 @@
+"""Las consultas de los indicadores y del resumen usan índices (EXPLAIN QUERY PLAN) y son las que corren de verdad."""
+import peewee
+
+from gestionar_obras import COMUNAS_INDICADOR, PLAZO_INDICADOR, GestionarObra
+from modelo_orm import Etapa, Obra, TipoObra, catalogos
+
+INDICADORES = (
+    'areas_responsables', 'tipos_obra', 'obras_por_etapa', 'inversion_por_tipo',
+    'barrios_por_comuna', 'finalizadas_en_plazo', 'inversion_total',
+)
+
+
+def test_consultas_frecuentes_sin_recorrer_tablas(bd_cargada):
+    # RuntimeError (con los planes) si alguna hace "SCAN tabla" sin índice
+    planes = GestionarObra.verificar_plan_consultas()
+    assert set(INDICADORES) <= set(planes)
+    assert any(nombre.startswith('reconstruir_resumen_') for nombre in planes)
+
+
+def test_indicadores_coinciden_con_obras(bd_cargada):
+    # Las consultas revisadas arriba son las de los indicadores: lo que devuelven tiene que
+    # coincidir con calcularlo directo desde obras (solo las vigentes)
+    GestionarObra.invalidar_indicadores()
+    indicadores = GestionarObra.calcular_indicadores()
+    vigentes = Obra.select().where(Obra.vigente == True)
+
+    assert sum(fila.cantidad for fila in indicadores.obras_por_etapa) == vigentes.count()
+    total = vigentes.select(peewee.fn.SUM(Obra.monto_contrato)).scalar()
+    assert abs(indicadores.inversion_total - total) < 0.01
+
+    por_tipo = {fila.tipo_obra: fila.cantidad for fila in indicadores.inversion_por_tipo}
+    for tipo in TipoObra.select():
+        assert por_tipo[tipo.nombre] == vigentes.where(Obra.tipo_obra == tipo).count()
+
+    finalizada = catalogos.buscar(Etapa, "Finalizada")
+    en_plazo = vigentes.where((Obra.etapa == finalizada) & (Obra.plazo_meses <= PLAZO_INDICADOR)).count()
+    assert indicadores.finalizadas_en_plazo == en_plazo
+
+    assert {fila.comuna for fila in indicadores.barrios_por_comuna} <= set(COMUNAS_INDICADOR)
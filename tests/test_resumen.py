@@ -0,0 +1,41 @@
+"""Obra.save()/delete_instance(): el resumen (ResumenObras) sigue igual a calcularlo desde cero, y el control de versión."""
+import pytest
+
+from modelo_orm import BusquedaObras, Etapa, Obra, ResumenObras
+
+
+def test_guardar_obra_parcial(bd_nueva):
+    # Los resultados de buscar() traen solo algunas columnas (sin tipo_obra, plazo_meses ni vigente)
+    obra = BusquedaObras.buscar('escuela')[0]
+    obra.etapa = Etapa.select().where(Etapa.id != obra.etapa_id).first()
+    assert obra.save()
+    assert ResumenObras.verificar() == []
+
+
+def test_guardar_obra_desactualizada(bd_nueva):
+    # Otro proceso cambia el tipo de obra; esta instancia sigue con el viejo y guarda solo el monto
+    obra = Obra.select().where(Obra.tipo_obra.is_null(False)).first()
+    otro_tipo = Obra.select(Obra.tipo_obra).where(Obra.tipo_obra != obra.tipo_obra_id).first().tipo_obra_id
+    Obra.update(tipo_obra=otro_tipo).where(Obra.id == obra.id).execute()
+    ResumenObras.reconstruir()
+
+    obra.monto_contrato = (obra.monto_contrato or 0) + 1000
+    assert obra.save()
+    assert ResumenObras.verificar() == []
+
+
+def test_borrar_obra_parcial(bd_nueva):
+    obra = Obra.select(Obra.id, Obra.nombre).where(Obra.vigente == True).first()
+    obra.delete_instance()
+    assert ResumenObras.verificar() == []
+
+
+def test_controlar_version_sin_columna_version(bd_nueva):
+    obra = Obra.select(Obra.id, Obra.nombre).first()
+    obra.nombre = obra.nombre + ' (bis)'
+    with pytest.raises(ValueError, match="'version'"):
+        obra.save(controlar_version=True)
+
+    obra = Obra.select(Obra.id, Obra.nombre, Obra.version).first()
+    obra.nombre = obra.nombre + ' (bis)'
+    assert obra.save(controlar_version=True) == 1
@@ -0,0 +1,58 @@
+"""Re-importación incremental (sincronizar_datos) y carga por partes que se retoma después de un corte."""
+import pandas
+import pytest
+
+from gestionar_obras import GestionarObra
+from modelo_orm import Obra, ResumenObras
+
+
+def test_sincronizar_cuenta_cambios(bd_nueva):
+    completo = GestionarObra.dataframe
+    df = completo.iloc[10:].copy()                         # 10 que desaparecen del CSV
+    cambiadas = df.index[:5]
+    df.loc[cambiadas, 'monto_contrato'] = df.loc[cambiadas, 'monto_contrato'].fillna(0) + 1000
+    nuevas = completo.iloc[:3].copy()                      # 3 obras nuevas (otro codigo)
+    nuevas['nombre'] = nuevas['nombre'] + ' (nueva)'
+    nuevas['codigo'] = nuevas['codigo'] + ' (NUEVA)'
+    df = pandas.concat([df, nuevas], ignore_index=True)
+
+    GestionarObra.dataframe = df
+    try:
+        resultado = GestionarObra.sincronizar_datos(marcar_bajas=True)
+    finally:
+        GestionarObra.dataframe = completo
+
+    assert resultado == {
+        'insertadas': 3, 'actualizadas': 5, 'sin_cambios': len(completo) - 10 - 5, 'bajas': 10,
+    }
+    assert Obra.select().where(Obra.vigente == True).count() == len(completo) - 10 + 3
+    assert ResumenObras.verificar() == []
+
+
+class _Corte(Exception):
+    pass
+
+
+def test_carga_por_partes_retoma(bd_vacia, monkeypatch):
+    escribir = GestionarObra._escribir_parte
+    partes = []
+
+    def escribir_y_cortar(limpio, tamanio_lote, resultado):
+        if len(partes) == 2:
+            raise _Corte()
+        partes.append(len(limpio))
+        return escribir(limpio, tamanio_lote, resultado)
+
+    monkeypatch.setattr(GestionarObra, '_escribir_parte', escribir_y_cortar)
+    with pytest.raises(_Corte):
+        GestionarObra.cargar_csv_por_partes(tamanio_chunk=300)
+    confirmadas = Obra.select().count()
+    assert confirmadas == sum(partes) > 0
+    assert ResumenObras.verificar() == []
+
+    monkeypatch.undo()
+    resultado = GestionarObra.cargar_csv_por_partes(tamanio_chunk=300)
+    assert resultado['sin_cambios'] == confirmadas             # lo ya confirmado no se reescribe
+    assert resultado['actualizadas'] == 0
+    assert confirmadas + resultado['insertadas'] == Obra.select().count() == GestionarObra.dataframe['codigo'].nunique()
+    assert ResumenObras.verificar() == []
@@ -0,0 +1,26 @@
+"""Transiciones masivas del ciclo de vida (Obra.transicion_masiva)."""
+import pytest
+
+from modelo_orm import Empresa, Obra
+
+
+@pytest.mark.parametrize('transicion, valores', [
+    ('actualizar_porcentaje_avance', {}),
+    ('adjudicar_obra', {'nro_expediente': 'EX-1'}),
+    ('iniciar_contratacion', {}),
+])
+def test_faltan_campos(bd_cargada, transicion, valores):
+    versiones = dict(Obra.select(Obra.id, Obra.version).tuples())
+    with pytest.raises(ValueError, match='necesita los campos'):
+        Obra.transicion_masiva(transicion, Obra.select(), **valores)
+    assert dict(Obra.select(Obra.id, Obra.version).tuples()) == versiones
+
+
+def test_adjudicar_con_todos_los_campos(bd_nueva):
+    empresa = Empresa.select().first()
+    movidas = Obra.transicion_masiva(
+        'adjudicar_obra', Obra.select(), desde=("En Licitación", "Proyecto"),
+        empresa=empresa.id, nro_expediente='EX-1',
+    )
+    assert movidas > 0
+    assert movidas == Obra.select().where((Obra.empresa == empresa) & (Obra.nro_expediente == 'EX-1')).count()